@@ -1,40 +1,133 @@
+from utils.startup import timeline
 import discord
-from discord.ext import commands
 import os
 from dotenv import load_dotenv
+import time
+from database.supabase_client import db
+from database.replica import LocalReplica
+from utils.command_tree import InstrumentedCommandTree
+from utils.metrics import metrics
+from utils.loop_monitor import loop_monitor
+from utils.shards import create_bot, install_shard_metrics, owns_shard_zero
+from utils.member_cache import member_cache_options, member_directory
+from utils.executor import compute
 
 load_dotenv()
+timeline.mark('import')
 
 # Bot setup
 intents = discord.Intents.default()
 intents.message_content = True
-intents.members = True
 
-bot = commands.Bot(command_prefix='!', intents=intents)
+# 'lean' skips the members intent, member cache and chunking; 'full' caches every member
+member_cache = member_cache_options(intents, os.getenv('MEMBER_CACHE', 'lean'))
+member_directory.capacity = int(os.getenv('MEMBER_DIRECTORY_SIZE', '2000'))
+member_directory.guild_capacity = int(os.getenv('MEMBER_DIRECTORY_GUILD_SIZE', '500'))
+
+# Worker processes for CPU-bound analytics (see utils/executor.py)
+compute.workers = int(os.getenv('COMPUTE_WORKERS', str(compute.workers)))
+compute.max_pending = int(os.getenv('COMPUTE_QUEUE_SIZE', str(compute.max_pending)))
+
+# A plain Bot unless SHARDING / SHARD_COUNT / SHARD_IDS are set (see utils/shards.py)
+bot = create_bot(command_prefix='!', intents=intents, tree_cls=InstrumentedCommandTree, **member_cache)
+install_shard_metrics(bot)
 
 @bot.event
 async def on_ready():
+    # Fires again on every reconnect, so keep this free of startup work
     print(f'{bot.user} has connected to Discord!')
+    
+    if not timeline.reported:
+        timeline.mark('ready')
+        print(timeline.report(release=os.getenv('BOT_RELEASE'), log_path=os.getenv('STARTUP_LOG')))
+
+async def sync_commands():
+    """Sync app commands once per process, and only if the tree changed"""
+    if not owns_shard_zero(bot):
+        # With multi-process clusters only the process running shard 0 syncs
+        return
+    
+    guild_id = os.getenv('SYNC_GUILD_ID')
+    guild = discord.Object(id=int(guild_id)) if guild_id else None
+    if guild:
+        bot.tree.copy_global_to(guild=guild)
+    
+    started = time.perf_counter()
     try:
-        synced = await bot.tree.sync()
-        print(f"Synced {len(synced)} command(s)")
+        synced = await bot.tree.sync_if_changed(
+            guild=guild,
+            state_path=os.getenv('COMMAND_SYNC_STATE', '.command_sync.json'),
+            force=os.getenv('FORCE_COMMAND_SYNC') == '1'
+        )
     except Exception as e:
         print(f"Failed to sync commands: {e}")
+        return
+    
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    scope = f"guild {guild_id}" if guild else "globally"
+    if synced is None:
+        print(f"Command tree unchanged, skipped sync ({elapsed_ms:.0f}ms)")
+    else:
+        print(f"Synced {len(synced)} command(s) {scope} in {elapsed_ms:.0f}ms")
+
+async def start_database():
+    await db.warm_up()
+    
+    # Serve reads from an in-memory copy of the tables unless LOCAL_REPLICA=0 (see database/replica.py)
+    if os.getenv('LOCAL_REPLICA', '1') != '0':
+        db.replica = LocalReplica(db, max_staleness=float(os.getenv('REPLICA_MAX_STALENESS', '60')))
+        db.replica.start(interval=float(os.getenv('REPLICA_POLL_SECONDS', '5')))
+
+# Loaded in this order; each load imports its module, which blocks the loop anyway
+COGS = [
+    'cogs.match_commands',
+    'cogs.profile_commands',
+    'cogs.team_commands',
+    'cogs.help_commands',
+    'cogs.admin_commands',
+    'cogs.analytics_commands',
+]
+
+async def load_cog(name: str):
+    with timeline.span(f"load {name}"):
+        await bot.load_extension(name)
 
 # Load cogs
 async def load_cogs():
-    await bot.load_extension('cogs.match_commands')
-    await bot.load_extension('cogs.profile_commands')
-    await bot.load_extension('cogs.team_commands')
-    await bot.load_extension('cogs.help_commands')
+    for name in COGS:
+        await load_cog(name)
 
 @bot.event
 async def setup_hook():
+    # setup_hook runs right after login
+    timeline.mark('login')
+    
+    # Watch for blocking calls stalling the event loop
+    loop_monitor.threshold = int(os.getenv('LOOP_LAG_THRESHOLD_MS', '250')) / 1000
+    loop_monitor.start(debug_slow_callbacks=os.getenv('LOOP_DEBUG') == '1')
+    
+    # The supabase client is imported lazily; warm it up off the loop while we finish starting
+    bot.loop.create_task(start_database())
+    
     await load_cogs()
+    timeline.mark('cogs')
+    
+    await sync_commands()
+    timeline.mark('sync')
+    
+    # Prometheus endpoint is opt-in; keep it bound to localhost unless told otherwise
+    metrics_port = os.getenv('METRICS_PORT')
+    if metrics_port:
+        metrics_host = os.getenv('METRICS_HOST', '127.0.0.1')
+        await metrics.start_http_server(metrics_host, int(metrics_port))
+        print(f"Serving metrics on http://{metrics_host}:{metrics_port}/metrics")
 
 if __name__ == '__main__':
     TOKEN = os.getenv('DISCORD_TOKEN')
     if not TOKEN:
         print("Error: DISCORD_TOKEN not found in .env file")
     else:
-        bot.run(TOKEN)
\ No newline at end of file
+        try:
+            bot.run(TOKEN)
+        finally:
+            compute.shutdown()
\ No newline at end of file
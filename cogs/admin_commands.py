@@ -0,0 +1,278 @@
+import discord
+from discord import app_commands
+from discord.ext import commands
+from database.exporter import DATASETS, export_dataset, export_filename
+from database.rebuild import rebuild, void_match
+from database.supabase_client import db
+from utils.executor import compute
+from utils.match_index import match_index
+from utils.match_registry import match_registry
+from utils.metrics import metrics
+from utils.profiler import SamplingProfiler
+from utils.shards import shard_stats
+from datetime import datetime
+from typing import Literal
+import asyncio
+import io
+import tempfile
+
+def owner_only():
+    """App command check restricting a command to the bot owner(s)"""
+    async def predicate(interaction: discord.Interaction) -> bool:
+        return await interaction.client.is_owner(interaction.user)
+    return app_commands.check(predicate)
+
+class AdminCommands(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self._profiling = asyncio.Lock()
+    
+    async def cog_app_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        if isinstance(error, app_commands.CheckFailure):
+            await interaction.response.send_message("❌ This command is restricted to the bot owner.", ephemeral=True)
+            return
+        raise error
+    
+    @app_commands.command(name="bot_metrics", description="Show command latency and database metrics (owner only)")
+    @owner_only()
+    async def show_metrics(self, interaction: discord.Interaction):
+        """Show per-command latency, errors and round trips"""
+        embed = discord.Embed(
+            title="📈 Bot Metrics",
+            color=discord.Color.dark_teal()
+        )
+        
+        latencies = metrics.histograms('bot_command_duration_seconds')
+        round_trips = metrics.histograms('bot_command_round_trips')
+        
+        # Slowest commands first
+        ranked = sorted(latencies.items(), key=lambda item: item[1].quantile(0.95), reverse=True)
+        
+        lines = []
+        for labels, hist in ranked[:10]:
+            command = dict(labels)['command']
+            errors = metrics.counter_value('bot_command_errors_total', {'command': command})
+            deferred = sum(count for key, count in metrics.counters('bot_command_deferred_total').items()
+                           if dict(key)['command'] == command)
+            trips = round_trips.get(labels)
+            lines.append(
+                f"`/{command}` ×{hist.count} - p50 {hist.quantile(0.5) * 1000:.0f}ms, "
+                f"p95 {hist.quantile(0.95) * 1000:.0f}ms, "
+                f"{trips.mean if trips else 0:.1f} trips, {errors:g} errors, {deferred:g} deferred"
+            )
+        
+        embed.add_field(
+            name="Commands (by p95)",
+            value="\n".join(lines) if lines else "No commands recorded yet",
+            inline=False
+        )
+        
+        retries = sum(metrics.counters('bot_db_retries_total').values())
+        hedges = sum(metrics.counters('bot_db_hedges_total').values())
+        db_lines = [
+            f"Circuit {db.breaker.state.replace('_', '-')}, {retries:g} retries, {hedges:g} hedged reads "
+            f"({metrics.counter_value('bot_db_hedges_total', {'winner': 'hedge'}):g} won by the hedge)"
+        ]
+        db_latencies = metrics.histograms('bot_db_call_duration_seconds')
+        for labels, hist in sorted(db_latencies.items(), key=lambda item: item[1].sum, reverse=True)[:8]:
+            method = dict(labels)['method']
+            errors = metrics.counter_value('bot_db_errors_total', {'method': method})
+            db_lines.append(
+                f"`{method}` ×{hist.count} - avg {hist.mean * 1000:.0f}ms, "
+                f"p95 {hist.quantile(0.95) * 1000:.0f}ms, {errors:g} errors"
+            )
+        
+        embed.add_field(
+            name="Database (by total time)",
+            value="\n".join(db_lines),
+            inline=False
+        )
+        lag = metrics.histogram('bot_event_loop_lag_seconds')
+        blocked = sorted(
+            metrics.counters('bot_event_loop_blocked_total').items(),
+            key=lambda item: item[1],
+            reverse=True
+        )
+        loop_lines = [
+            f"Lag p50 {lag.quantile(0.5) * 1000:.0f}ms, p99 {lag.quantile(0.99) * 1000:.0f}ms" if lag else "Lag not measured"
+        ]
+        for labels, count in blocked[:5]:
+            labels = dict(labels)
+            loop_lines.append(f"`{labels['site']}` blocked ×{count:g} (in `{labels['command']}`)")
+        
+        embed.add_field(name="Event Loop", value="\n".join(loop_lines), inline=False)
+        
+        compute_lines = [f"{compute.pending}/{compute.max_pending} queued or running on {compute.workers} workers"]
+        waits = metrics.histograms('bot_executor_wait_seconds')
+        for labels, hist in sorted(metrics.histograms('bot_executor_run_seconds').items(), key=lambda item: item[1].sum, reverse=True)[:5]:
+            wait = waits.get(labels)
+            compute_lines.append(
+                f"`{dict(labels)['task']}` ×{hist.count} - run p95 {hist.quantile(0.95) * 1000:.0f}ms, "
+                f"wait p95 {wait.quantile(0.95) * 1000 if wait else 0:.0f}ms"
+            )
+        embed.add_field(name="Compute Pool", value="\n".join(compute_lines), inline=False)
+        
+        replica = db.replica
+        if replica is None:
+            replica_line = "Disabled (reads go to the backend)"
+        elif replica.store is None:
+            replica_line = "Loading"
+        else:
+            local_reads = sum(metrics.counters('bot_replica_reads_total').values())
+            replica_line = (f"{'Serving' if replica.ready else 'Stale, not serving'} - "
+                            f"{replica.staleness:.1f}s behind, {local_reads:g} local reads")
+        embed.add_field(name="Local Replica", value=replica_line, inline=False)
+        
+        shard_lines = [
+            f"Shard {s['shard_id']}: {s['guilds']} guilds, "
+            + ("closed" if s['closed'] else f"{s['latency'] * 1000:.0f}ms")
+            for s in shard_stats(self.bot)[:10]
+        ]
+        embed.add_field(name="Shards", value="\n".join(shard_lines), inline=False)
+        embed.set_footer(text="Full Prometheus dump attached")
+        
+        dump = discord.File(io.BytesIO(metrics.render_prometheus().encode()), filename="metrics.txt")
+        await interaction.response.send_message(embed=embed, file=dump, ephemeral=True)
+    
+    @app_commands.command(name="debug_profile", description="Sample the live process and return a flamegraph-ready profile (owner only)",
+                          extras={'auto_defer': False})
+    @app_commands.describe(seconds="How long to sample for (1-60 seconds)")
+    @owner_only()
+    async def debug_profile(self, interaction: discord.Interaction, seconds: app_commands.Range[int, 1, 60] = 10):
+        """Run the sampling profiler and attach collapsed stacks"""
+        if self._profiling.locked():
+            await interaction.response.send_message("❌ A profile is already running.", ephemeral=True)
+            return
+        
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        
+        async with self._profiling:
+            # Sampling happens on a worker thread so the loop keeps serving (and gets sampled)
+            result = await asyncio.to_thread(SamplingProfiler().run, seconds)
+        
+        embed = discord.Embed(
+            title="🔬 Profile Complete",
+            description=f"{result.samples} rounds ({result.thread_samples} thread samples) over {result.duration:.1f}s",
+            color=discord.Color.dark_teal()
+        )
+        
+        def share(counter):
+            lines = [
+                f"`{label}` - {result.share(count) * 100:.1f}%"
+                for label, count in counter.most_common(5)
+            ]
+            return "\n".join(lines) if lines else "No samples"
+        
+        embed.add_field(name="Cogs (share of thread samples)", value=share(result.cogs), inline=False)
+        embed.add_field(name="Database methods", value=share(result.db_methods), inline=False)
+        embed.set_footer(text="Open the attachment with speedscope.app or flamegraph.pl")
+        
+        filename = f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}.collapsed"
+        profile = discord.File(io.BytesIO(result.collapsed().encode()), filename=filename)
+        await interaction.followup.send(embed=embed, file=profile, ephemeral=True)
+    
+    @app_commands.command(name="export_data", description="Export match and player data as gzipped JSONL/CSV (owner only)",
+                          extras={'auto_defer': False})
+    @app_commands.describe(
+        dataset="What to export (default: everything)",
+        format="File format inside the gzip (default: jsonl)"
+    )
+    @owner_only()
+    async def export_data(self, interaction: discord.Interaction,
+                          dataset: Literal['all', 'users', 'matches', 'games', 'player_results', 'matches_archive',
+                                           'games_archive', 'player_results_archive', 'match_events'] = 'all',
+                          format: Literal['jsonl', 'csv'] = 'jsonl'):
+        """Stream tables into gzip files and attach them"""
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        
+        datasets = list(DATASETS) if dataset == 'all' else [dataset]
+        limit = interaction.guild.filesize_limit if interaction.guild else discord.utils.DEFAULT_FILE_SIZE_LIMIT_BYTES
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        
+        files, lines, too_large = [], [], []
+        try:
+            for name in datasets:
+                # Spill to disk rather than holding large exports in memory
+                handle = tempfile.TemporaryFile()
+                rows = await export_dataset(name, handle, format)
+                size = handle.tell()
+                if size > limit:
+                    handle.close()
+                    too_large.append(name)
+                    lines.append(f"`{name}` - {rows} rows, {size / 1e6:.1f} MB (too large to upload)")
+                    continue
+                handle.seek(0)
+                files.append(discord.File(handle, filename=export_filename(name, format, stamp)))
+                lines.append(f"`{name}` - {rows} rows, {size / 1e3:.1f} kB")
+            
+            embed = discord.Embed(
+                title="📦 Export Complete",
+                description="\n".join(lines),
+                color=discord.Color.dark_teal()
+            )
+            if too_large:
+                embed.set_footer(text="Use python -m tools.export_data for exports over the upload limit")
+            
+            await interaction.followup.send(embed=embed, files=files, ephemeral=True)
+        finally:
+            for file in files:
+                file.close()
+    
+    def _rebuild_embed(self, title: str, report: dict) -> discord.Embed:
+        start = f"snapshot #{report['base_snapshot']}" if report['base_snapshot'] else "an empty state"
+        embed = discord.Embed(
+            title=title,
+            description=f"Replayed {report['events_replayed']} events from {start} in {report['elapsed']:.2f}s",
+            color=discord.Color.dark_teal()
+        )
+        embed.add_field(name="Users Updated", value=str(report['users_updated']), inline=True)
+        embed.add_field(name="Aggregates Written", value=str(report['aggregates_written']), inline=True)
+        embed.add_field(name="Voided Matches", value=str(report['voided_matches']), inline=True)
+        if report['snapshot']:
+            embed.set_footer(text=f"Saved snapshot #{report['snapshot']}")
+        return embed
+    
+    @app_commands.command(name="stats_rebuild", description="Recompute player stats from the match event log (owner only)",
+                          extras={'auto_defer': False})
+    @app_commands.describe(
+        from_scratch="Replay the whole log instead of starting from the latest snapshot",
+        snapshot="Save a snapshot afterwards (default: only after large replays)"
+    )
+    @owner_only()
+    async def stats_rebuild(self, interaction: discord.Interaction, from_scratch: bool = False, snapshot: bool = None):
+        """Replay match_events into users and user_series_stats"""
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        report = await rebuild(from_scratch=from_scratch, snapshot=snapshot)
+        await interaction.followup.send(embed=self._rebuild_embed("🔁 Stats Rebuilt", report), ephemeral=True)
+    
+    @app_commands.command(name="match_void", description="Remove a match from everyone's stats (owner only)",
+                          extras={'auto_defer': False})
+    @app_commands.describe(match_id="The match ID", reason="Why the match is being voided")
+    @owner_only()
+    async def match_void(self, interaction: discord.Interaction, match_id: str, reason: str):
+        """Log a void event for a match and rebuild stats without it"""
+        match = await db.get_match(match_id)
+        if not match:
+            if await db.get_archived_match(match_id):
+                # Its season's standings are frozen and its rows archived
+                await interaction.response.send_message("❌ This match is from an ended season and can't be voided!",
+                                                        ephemeral=True)
+            else:
+                await interaction.response.send_message("❌ Match not found!", ephemeral=True)
+            return
+        
+        if match['status'] == 'voided':
+            await interaction.response.send_message("❌ This match is already voided!", ephemeral=True)
+            return
+        
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        report = await void_match(match_id, reason)
+        match_registry.remove(match_id)
+        match_index.set_status(match_id, 'voided')
+        self.bot.dispatch('match_voided', match_id)
+        embed = self._rebuild_embed("🗑️ Match Voided", report)
+        embed.add_field(name="Match", value=f"`{match_id}`\n{reason}", inline=False)
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+async def setup(bot):
+    await bot.add_cog(AdminCommands(bot))
\ No newline at end of file
@@ -0,0 +1,222 @@
+import discord
+from discord import app_commands
+from discord.ext import commands
+from database.supabase_client import db
+from utils.member_cache import member_directory
+from utils.executor import ExecutorBusy, compute
+from utils.synergy import SynergyMatrix, build_matrices
+from typing import Dict, List, Optional, Tuple
+import asyncio
+
+# Pairs with fewer games than this are left out of the rankings
+MIN_GAMES = 3
+
+def _rate(wins: int, games: int) -> str:
+    return f"{wins / games * 100:.0f}% ({wins}-{games - wins})" if games else "no games"
+
+class AnalyticsCommands(commands.Cog):
+    """Teammate and opponent records, from per-guild matrices kept in memory
+
+    The matrices cover every game of matches that weren't voided: the games
+    table plus games_archive for seasons ended with --archive table. Seasons
+    archived to files are offline, so they drop out at the next rebuild.
+    """
+    
+    def __init__(self, bot):
+        self.bot = bot
+        self.matrices: Dict[Optional[int], SynergyMatrix] = {}
+        self._empty = SynergyMatrix(capacity=1)
+        self._loaded = asyncio.Event()
+        self._failed = False
+        # (games row, guild_id, winner it replaced) recorded while a rebuild runs
+        self._pending: List[Tuple[Dict, Optional[int], Optional[int]]] = []
+        self._loader = None
+    
+    async def cog_load(self):
+        # Build in the background so startup doesn't wait on the whole games table
+        self._reload()
+    
+    async def cog_unload(self):
+        if self._loader is not None:
+            self._loader.cancel()
+    
+    def _reload(self):
+        if self._loader is not None:
+            self._loader.cancel()
+        self._failed = False
+        self._loader = asyncio.create_task(self.rebuild())
+    
+    async def rebuild(self):
+        """Rebuild the matrices from the games tables, then apply games recorded meanwhile"""
+        self._loaded.clear()
+        self._pending.clear()
+        try:
+            games: Dict[Tuple[str, int], Dict] = {}
+            for table in ('games', 'games_archive'):
+                async for page in db.iter_table(table, 'id', columns='id, match_id, game_number, team1_players, team2_players, winner'):
+                    games.update(((game['match_id'], game['game_number']), game) for game in page)
+            
+            # Read after the games, so every game read has its match; voided matches are left out
+            guilds: Dict[str, Optional[int]] = {}
+            for table in ('matches', 'matches_archive'):
+                async for page in db.iter_table(table, 'match_id', columns='match_id, guild_id, status'):
+                    guilds.update((match['match_id'], match['guild_id']) for match in page if match['status'] != 'voided')
+            
+            # Games recorded while reading are newer than whatever the read saw
+            pending, self._pending = self._pending, []
+            for game, guild_id, _ in pending:
+                games[(game['match_id'], game['game_number'])] = game
+                guilds.setdefault(game['match_id'], guild_id)
+            
+            by_guild: Dict[Optional[int], List[Dict]] = {}
+            for game in games.values():
+                if game['match_id'] in guilds:
+                    by_guild.setdefault(guilds[game['match_id']], []).append(game)
+            
+            # The matrix build is CPU-bound, so it runs in the compute pool
+            try:
+                matrices = await compute.run(build_matrices, by_guild)
+            except ExecutorBusy:
+                matrices = build_matrices(by_guild)
+        except Exception as e:
+            self._failed = True
+            print(f"Failed to build synergy matrices: {e}")
+            return
+        
+        self.matrices = matrices
+        for game, guild_id, replaced in self._pending:
+            self._apply(game, guild_id, replaced)
+        self._pending.clear()
+        
+        self._loaded.set()
+        print(f"Synergy matrices built from {sum(m.games for m in matrices.values())} games in {len(matrices)} guilds")
+    
+    def _apply(self, game: Dict, guild_id: Optional[int], replaced: Optional[int]):
+        if replaced == game['winner']:
+            return
+        matrix = self.matrices.setdefault(guild_id, SynergyMatrix())
+        if replaced is not None:
+            matrix.remove_game({**game, 'winner': replaced})
+        matrix.add_game(game)
+    
+    @commands.Cog.listener()
+    async def on_game_recorded(self, game: Dict, guild_id: Optional[int] = None, replaced: Optional[int] = None):
+        """A games row was written; replaced is the winner it overwrote, if the game was recorded before"""
+        if self._loaded.is_set():
+            self._apply(game, guild_id, replaced)
+        else:
+            self._pending.append((game, guild_id, replaced))
+    
+    @commands.Cog.listener()
+    async def on_matches_imported(self, report):
+        # Bulk imports are rare; re-reading the table is simpler than replaying them
+        self._reload()
+    
+    @commands.Cog.listener()
+    async def on_match_voided(self, match_id: str):
+        # As rare as imports, and the matrices don't keep which games came from which match
+        self._reload()
+    
+    def _matrix(self, interaction: discord.Interaction) -> SynergyMatrix:
+        return self.matrices.get(interaction.guild_id, self._empty)
+    
+    async def _not_ready(self, interaction: discord.Interaction) -> bool:
+        if self._loaded.is_set():
+            return False
+        if self._failed:
+            self._reload()
+            await interaction.response.send_message("⚠️ Analytics failed to load and are being reloaded, try again in a moment.",
+                                                    ephemeral=True)
+            return True
+        await interaction.response.send_message("⏳ Analytics are still loading, try again in a moment.", ephemeral=True)
+        return True
+    
+    async def _names(self, interaction: discord.Interaction, *rankings: List[Tuple[int, int, int]]) -> Dict[int, str]:
+        """Names of ranked players, looked up in the server when the directory doesn't have them"""
+        if interaction.guild is None:
+            return {}
+        player_ids = [player_id for ranking in rankings for player_id, _, _ in ranking]
+        members = await member_directory.resolve_many(interaction.guild, player_ids)
+        return {player_id: member.name for player_id, member in members.items()}
+    
+    def _ranking(self, entries: List[Tuple[int, int, int]], names: Dict[int, str]) -> str:
+        if not entries:
+            return f"Not enough games yet (min {MIN_GAMES})"
+        return "\n".join(
+            f"{i}. {names.get(player_id) or member_directory.name(player_id, f'<@{player_id}>')} - {_rate(wins, games)}"
+            for i, (player_id, games, wins) in enumerate(entries, 1)
+        )
+    
+    @app_commands.command(name="synergy", description="Which teammates a player wins with", extras={'round_trip_budget': 0})
+    @app_commands.describe(
+        player="The player to analyze (leave empty for yourself)",
+        partner="Show only this duo"
+    )
+    async def synergy(self, interaction: discord.Interaction, player: discord.User = None, partner: discord.User = None):
+        """Show a player's best and worst teammates, or one duo's record"""
+        if await self._not_ready(interaction):
+            return
+        
+        matrix = self._matrix(interaction)
+        target = player or interaction.user
+        member_directory.remember(target)
+        games, wins = matrix.record(target.id)
+        
+        embed = discord.Embed(
+            title=f"🤝 {target.name}'s Synergy",
+            description=f"Overall: {_rate(wins, games)}",
+            color=discord.Color.purple()
+        )
+        
+        if partner is not None:
+            member_directory.remember(partner)
+            pair = matrix.pair(target.id, partner.id)
+            embed.title = f"🤝 {target.name} + {partner.name}"
+            embed.add_field(name="Together", value=_rate(pair['together_wins'], pair['together_games']), inline=True)
+            embed.add_field(name="Against each other", value=_rate(pair['against_wins'], pair['against_games']), inline=True)
+        else:
+            best, worst = matrix.partners(target.id, MIN_GAMES), matrix.partners(target.id, MIN_GAMES, best=False)
+            names = await self._names(interaction, best, worst)
+            embed.add_field(name="✅ Best Teammates", value=self._ranking(best, names), inline=False)
+            embed.add_field(name="❌ Worst Teammates", value=self._ranking(worst, names), inline=False)
+        
+        embed.set_footer(text=f"Based on {matrix.games} recorded games")
+        
+        await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="h2h", description="Head-to-head record between two players", extras={'round_trip_budget': 0})
+    @app_commands.describe(
+        player1="First player",
+        player2="Second player (leave empty to see player1's rivals)"
+    )
+    async def h2h(self, interaction: discord.Interaction, player1: discord.User, player2: discord.User = None):
+        """Show two players' record against each other, or a player's easiest and toughest opponents"""
+        if await self._not_ready(interaction):
+            return
+        
+        matrix = self._matrix(interaction)
+        member_directory.remember(player1)
+        embed = discord.Embed(color=discord.Color.red())
+        
+        if player2 is not None:
+            member_directory.remember(player2)
+            pair = matrix.pair(player1.id, player2.id)
+            against, won = pair['against_games'], pair['against_wins']
+            embed.title = f"⚔️ {player1.name} vs {player2.name}"
+            embed.add_field(name=f"{player1.name} wins", value=str(won), inline=True)
+            embed.add_field(name=f"{player2.name} wins", value=str(against - won), inline=True)
+            embed.add_field(name="Games", value=str(against), inline=True)
+            embed.add_field(name="As teammates", value=_rate(pair['together_wins'], pair['together_games']), inline=False)
+        else:
+            embed.title = f"⚔️ {player1.name}'s Rivals"
+            easiest, toughest = matrix.opponents(player1.id, MIN_GAMES), matrix.opponents(player1.id, MIN_GAMES, best=False)
+            names = await self._names(interaction, easiest, toughest)
+            embed.add_field(name="😎 Easiest Opponents", value=self._ranking(easiest, names), inline=False)
+            embed.add_field(name="😰 Toughest Opponents", value=self._ranking(toughest, names), inline=False)
+        
+        embed.set_footer(text=f"Based on {matrix.games} recorded games")
+        
+        await interaction.response.send_message(embed=embed)
+
+async def setup(bot):
+    await bot.add_cog(AnalyticsCommands(bot))
\ No newline at end of file
@@ -44,7 +44,8 @@ class HelpCommands(commands.Cog):
                 "`/match_record` - Record game results\n"
                 "`/match_status` - Check match progress\n"
                 "`/match_history` - View recent matches\n"
-                "`/match_import` - Import past completed matches"
+                "`/match_import` - Import past completed matches\n"
+                "`/match_import_bulk` - Import a CSV/JSONL file of past matches"
             ),
             inline=False
         )
@@ -61,6 +62,16 @@ class HelpCommands(commands.Cog):
             inline=False
         )
         
+        # Analytics Commands
+        embed.add_field(
+            name="🤝 Analytics",
+            value=(
+                "`/synergy` - Best and worst teammates, or one duo's record\n"
+                "`/h2h` - Head-to-head record between two players"
+            ),
+            inline=False
+        )
+        
         # Team Commands
         embed.add_field(
             name="🎲 Team Generation",
@@ -129,7 +140,7 @@ class HelpCommands(commands.Cog):
                 "**Record the result of an individual game**\n"
                 "**Usage:** `/match_record [match_id] [game_number] [winner]`\n"
                 "**Parameters:**\n"
-                "• `match_id`: The ID from /match_create\n"
+                "• `match_id`: The ID from /match_create (start typing it to pick from ongoing matches)\n"
                 "• `game_number`: 1, 2, 3, etc.\n"
                 "• `winner`: 1 or 2 (which team won)\n"
                 "**Auto-completes** when a team wins 2/3 (BO3) or 3/5 (BO5)\n"
@@ -144,6 +155,8 @@ class HelpCommands(commands.Cog):
             value=(
                 "**Check current match status and scores**\n"
                 "**Usage:** `/match_status [match_id]`\n"
+                "• `match_id` suggests this server's ongoing and recent matches as you type\n"
+                "• Leave `match_id` empty to see the ongoing match you're playing in\n"
                 "Shows: Teams, current score, game results, match status\n"
                 "**Example:** `/match_status abc123`"
             ),
@@ -154,7 +167,7 @@ class HelpCommands(commands.Cog):
         embed.add_field(
             name="`/match_history`",
             value=(
-                "**View recently played matches**\n"
+                "**View recently played matches in this server**\n"
                 "**Usage:** `/match_history [limit]`\n"
                 "• `limit`: Number of matches (1-20, default: 5)\n"
                 "**Example:** `/match_history 10`"
@@ -179,7 +192,20 @@ class HelpCommands(commands.Cog):
             inline=False
         )
         
-        embed.set_footer(text="💡 Match IDs are long UUID strings - copy them when creating matches!")
+        # Bulk Import
+        embed.add_field(
+            name="`/match_import_bulk`",
+            value=(
+                "**Import many past matches from a file**\n"
+                "**Usage:** `/match_import_bulk file:matches.csv [dry_run]`\n"
+                "• One series per row: `series_type, winner_team, team1_score, team2_score, team1, team2`\n"
+                "• Teams are space separated player IDs; optional `games` and `played_at` columns\n"
+                "• `dry_run`: Only validate the file"
+            ),
+            inline=False
+        )
+        
+        embed.set_footer(text="💡 Match IDs are long UUID strings - type the first few characters and pick from the suggestions!")
         
         await interaction.response.send_message(embed=embed)
     
@@ -199,7 +225,7 @@ class HelpCommands(commands.Cog):
                 "**Usage:** `/profile [@user]`\n"
                 "• Leave empty to view your own profile\n"
                 "• Mention someone to view their profile\n"
-                "Shows: Total games, wins, losses, win rate, recent matches\n"
+                "Shows: Total games, wins, losses, win rate, global rank (across every server), recent matches\n"
                 "**Examples:**\n"
                 "• `/profile` (your stats)\n"
                 "• `/profile @Alice` (Alice's stats)"
@@ -228,8 +254,10 @@ class HelpCommands(commands.Cog):
             name="`/leaderboard`",
             value=(
                 "**View top players ranking**\n"
-                "**Usage:** `/leaderboard [limit]`\n"
+                "**Usage:** `/leaderboard [limit] [everywhere] [season]`\n"
                 "• `limit`: Number of players (1-25, default: 10)\n"
+                "• `everywhere`: Rank series from every server, not just this one\n"
+                "• `season`: Final standings of an ended season\n"
                 "• Ranked by win rate (minimum 1 game)\n"
                 "• Shows: Rank, name, win rate, record\n"
                 "**Example:** `/leaderboard 20`"
@@ -2,16 +2,37 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from database.supabase_client import db
+from utils.member_cache import member_directory
+from utils.series_stats import ALL_SERIES, FORM_WINDOW, empty_aggregate, form_results
+import asyncio
 
 class ProfileCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self._loader = None
     
-    @app_commands.command(name="profile", description="View a user's profile and stats")
+    async def cog_load(self):
+        # Load in the background; profiles leave the rank out until it's ready
+        self._loader = asyncio.create_task(self.load_ranks())
+    
+    async def cog_unload(self):
+        if self._loader is not None:
+            self._loader.cancel()
+    
+    async def load_ranks(self):
+        try:
+            await db.load_ranks()
+        except Exception as e:
+            print(f"Failed to load the rank index: {e}")
+            return
+        print(f"Rank index loaded ({len(db.ranks)} ranked players)")
+    
+    @app_commands.command(name="profile", description="View a user's profile and stats", extras={'round_trip_budget': 4})
     @app_commands.describe(user="The user to view (leave empty for yourself)")
     async def profile(self, interaction: discord.Interaction, user: discord.User = None):
         """View user profile"""
         target_user = user or interaction.user
+        member_directory.remember(target_user)
         
         # Get or create user
         user_data = await db.get_or_create_user(target_user.id, target_user.name)
@@ -31,15 +52,25 @@ class ProfileCommands(commands.Cog):
         embed.add_field(name="💔 Losses", value=str(user_data['total_games'] - user_data['total_wins']), inline=True)
         embed.add_field(name="📈 Win Rate", value=f"{win_rate:.1f}%", inline=True)
         
+        # Kept in memory, so this costs no round trips. It ranks series from every
+        # server, like /leaderboard everywhere:True, not just this one
+        standing = db.ranks.standing(target_user.id)
+        if standing:
+            embed.add_field(
+                name="🏅 Global Rank",
+                value=f"#{standing.rank} of {standing.players} (top {standing.top_percent}%)",
+                inline=True
+            )
+        
         # Get recent match history
         match_history = await db.get_user_match_history(target_user.id, limit=5)
         
         if match_history:
             history_text = []
             for match in match_history:
-                result_emoji = "✅" if match.get('user_result') == 'win' else "❌"
+                result_emoji = {'win': "✅", 'voided': "🚫"}.get(match.get('user_result'), "❌")
                 team = match.get('user_team', '?')
-                status = "Complete" if match['status'] == 'completed' else "Ongoing"
+                status = {'completed': "Complete", 'voided': "Voided"}.get(match['status'], "Ongoing")
                 history_text.append(f"{result_emoji} {match['series_type']} - Team {team} - {status}")
             
             embed.add_field(
@@ -52,20 +83,26 @@ class ProfileCommands(commands.Cog):
         
         await interaction.response.send_message(embed=embed)
     
-    @app_commands.command(name="stats", description="View detailed stats for a user")
+    @app_commands.command(name="stats", description="View detailed stats for a user", extras={'round_trip_budget': 2})
     @app_commands.describe(user="The user to view stats for")
     async def stats(self, interaction: discord.Interaction, user: discord.User = None):
         """View detailed user statistics"""
         target_user = user or interaction.user
         
-        user_data = await db.get_user_stats(target_user.id)
+        # Career aggregates are maintained at settlement, so this is a single lookup
+        aggregates = await db.get_user_series_stats(target_user.id)
+        career = aggregates.get(ALL_SERIES)
         
-        if not user_data:
-            await interaction.response.send_message("User not found in database!", ephemeral=True)
-            return
+        if not career:
+            # Registered players with no settled series have no aggregate rows yet
+            user_data = await db.get_user_stats(target_user.id)
+            if not user_data:
+                await interaction.response.send_message("User not found in database!", ephemeral=True)
+                return
+            career = empty_aggregate(target_user.id, ALL_SERIES)
         
-        total_games = user_data['total_games']
-        total_wins = user_data['total_wins']
+        total_games = career['games']
+        total_wins = career['wins']
         total_losses = total_games - total_wins
         win_rate = (total_wins / total_games * 100) if total_games > 0 else 0
         
@@ -81,74 +118,91 @@ class ProfileCommands(commands.Cog):
         embed.add_field(name="Win Rate", value=f"{win_rate:.2f}%", inline=True)
         embed.add_field(name="Total Games", value=str(total_games), inline=True)
         
-        # Match history breakdown
-        match_history = await db.get_user_match_history(target_user.id, limit=20)
-        
-        if match_history:
-            # Count BO3 vs BO5
-            bo3_games = [m for m in match_history if m['series_type'] == 'BO3']
-            bo5_games = [m for m in match_history if m['series_type'] == 'BO5']
-            
-            bo3_wins = sum(1 for m in bo3_games if m.get('user_result') == 'win')
-            bo5_wins = sum(1 for m in bo5_games if m.get('user_result') == 'win')
-            
-            if bo3_games:
-                bo3_wr = (bo3_wins / len(bo3_games) * 100)
+        # BO3 vs BO5 breakdown
+        for series_type in ['BO3', 'BO5']:
+            series = aggregates.get(series_type)
+            if series and series['games']:
+                series_wr = series['wins'] / series['games'] * 100
                 embed.add_field(
-                    name="BO3 Stats",
-                    value=f"{bo3_wins}W - {len(bo3_games) - bo3_wins}L ({bo3_wr:.1f}%)",
-                    inline=True
-                )
-            
-            if bo5_games:
-                bo5_wr = (bo5_wins / len(bo5_games) * 100)
-                embed.add_field(
-                    name="BO5 Stats",
-                    value=f"{bo5_wins}W - {len(bo5_games) - bo5_wins}L ({bo5_wr:.1f}%)",
+                    name=f"{series_type} Stats",
+                    value=f"{series['wins']}W - {series['games'] - series['wins']}L ({series_wr:.1f}%)",
                     inline=True
                 )
+        
+        if total_games:
+            # Streaks
+            streak = career['current_streak']
+            streak_text = f"{'W' if streak > 0 else 'L'}{abs(streak)}" if streak else "-"
+            embed.add_field(
+                name="Streaks",
+                value=f"Current: {streak_text}\nBest win streak: {career['best_streak']}",
+                inline=False
+            )
             
-            # Recent form (last 10 games)
-            recent_10 = match_history[:10]
-            recent_wins = sum(1 for m in recent_10 if m.get('user_result') == 'win')
-            form_emojis = []
-            for m in recent_10:
-                if m.get('user_result') == 'win':
-                    form_emojis.append("🟢")
-                elif m.get('user_result') == 'loss':
-                    form_emojis.append("🔴")
-                else:
-                    form_emojis.append("⚪")
+            # Recent form (last 10 series)
+            recent = form_results(career)
+            recent_wins = sum(recent)
+            form_emojis = "".join("🟢" if won else "🔴" for won in recent)
             
             embed.add_field(
-                name="Recent Form (Last 10)",
-                value=f"{recent_wins}W - {len([m for m in recent_10 if m.get('user_result') == 'loss'])}L\n{''.join(form_emojis)}",
+                name=f"Recent Form (Last {FORM_WINDOW})",
+                value=f"{recent_wins}W - {len(recent) - recent_wins}L\n{form_emojis}",
                 inline=False
             )
         
         await interaction.response.send_message(embed=embed)
     
-    @app_commands.command(name="leaderboard", description="View the top players")
-    @app_commands.describe(limit="Number of players to show (default: 10)")
-    async def leaderboard(self, interaction: discord.Interaction, limit: int = 10):
+    @app_commands.command(name="leaderboard", description="View the top players", extras={'round_trip_budget': 2})
+    @app_commands.describe(
+        limit="Number of players to show (default: 10)",
+        everywhere="Rank series from every server instead of just this one",
+        season="Show the final standings of an ended season (its number)"
+    )
+    async def leaderboard(self, interaction: discord.Interaction, limit: int = 10, everywhere: bool = False,
+                          season: int = None):
         """View leaderboard"""
         if limit > 25:
             limit = 25
         
-        top_players = await db.get_leaderboard(limit)
+        # Outside a server (DMs) there is only the global board
+        guild_id = None if everywhere else interaction.guild_id
+        title = "🏆 Leaderboard - Top Players"
+        if season is not None:
+            # Ended seasons are read from their frozen standings
+            season_data = await db.get_season(season)
+            if not season_data:
+                latest = await db.get_latest_season()
+                ended = latest['number'] if latest else 0
+                if season == ended + 1:
+                    message = f"❌ Season {season} is still being played - its standings are frozen when it ends!"
+                elif ended:
+                    message = f"❌ There's no season {season}! The latest to end was season {ended}."
+                else:
+                    message = f"❌ There's no season {season}! No season has ended yet."
+                await interaction.response.send_message(message, ephemeral=True)
+                return
+            top_players = await db.get_season_leaderboard(season_data['id'], limit, guild_id)
+            title = f"🏆 {season_data['name']} - Final Standings"
+        else:
+            top_players = await db.get_leaderboard(limit, guild_id)
         
         if not top_players:
             await interaction.response.send_message("No players found!", ephemeral=True)
             return
         
         embed = discord.Embed(
-            title="🏆 Leaderboard - Top Players",
+            title=title,
             description="Ranked by Win Rate (minimum 1 game)",
             color=discord.Color.gold()
         )
         
         medal_emojis = ["🥇", "🥈", "🥉"]
         
+        # Players the directory doesn't hold are looked up in the server (fetched under the lean cache policy)
+        members = {}
+        if interaction.guild is not None:
+            members = await member_directory.resolve_many(interaction.guild, [player['discord_id'] for player in top_players])
+        
         leaderboard_text = []
         for i, player in enumerate(top_players, 1):
             medal = medal_emojis[i-1] if i <= 3 else f"{i}."
@@ -157,20 +211,25 @@ class ProfileCommands(commands.Cog):
             total_games = player['total_games']
             total_wins = player['total_wins']
             
-            # Try to get Discord user
+            # Try the server's member, then the Discord user, then players we've seen, then the stored name
+            member = members.get(player['discord_id'])
+            member_directory.remember_row(player['discord_id'], player['username'], interaction.guild_id)
             user = self.bot.get_user(player['discord_id'])
-            username = user.name if user else player['username']
+            if member is not None:
+                username = member.name
+            else:
+                username = user.name if user else member_directory.name(player['discord_id'], player['username'], interaction.guild_id)
             
             leaderboard_text.append(
                 f"{medal} **{username}** - {win_rate:.1f}% ({total_wins}W-{total_games - total_wins}L)"
             )
         
         embed.description = "\n".join(leaderboard_text)
-        embed.set_footer(text=f"Showing top {len(top_players)} players")
+        embed.set_footer(text=f"Showing top {len(top_players)} players {'in this server' if guild_id else 'across all servers'}")
         
         await interaction.response.send_message(embed=embed)
     
-    @app_commands.command(name="my_matches", description="View your match history")
+    @app_commands.command(name="my_matches", description="View your match history", extras={'round_trip_budget': 2})
     @app_commands.describe(limit="Number of matches to show (default: 10)")
     async def my_matches(self, interaction: discord.Interaction, limit: int = 10):
         """View your match history"""
@@ -198,6 +257,9 @@ class ProfileCommands(commands.Cog):
             elif result == 'loss':
                 result_emoji = "❌ LOSS"
                 color = "🔴"
+            elif result == 'voided':
+                result_emoji = "🚫 VOIDED"
+                color = "⚫"
             else:
                 result_emoji = "⏳ ONGOING"
                 color = "⚪"
@@ -3,6 +3,7 @@ from discord import app_commands
 from discord.ext import commands
 from utils.team_generator import TeamGenerator
 from utils.rps import play_rps, RPSGame
+from utils.member_cache import member_directory
 from typing import List, Dict, Optional
 import asyncio
 
@@ -65,6 +66,9 @@ class TeamCommands(commands.Cog):
             await interaction.response.send_message("❌ Captains must be different players!", ephemeral=True)
             return
         
+        member_directory.remember(captain1)
+        member_directory.remember(captain2)
+        
         # Start RPS to determine first pick
         await interaction.response.send_message(
             f"🎮 **Captain Draft Starting!**\n\n"
@@ -124,6 +128,7 @@ class PlayerSelectionView(discord.ui.View):
         
         # Add player
         self.players.append(user)
+        member_directory.remember(user)
         
         # Update embed
         embed = self.message.embeds[0]
@@ -288,6 +293,7 @@ class RoleSelectionView(discord.ui.View):
         
         # Add to role
         self.role_assignments[role].append(user)
+        member_directory.remember(user)
         await self._update_embed(interaction)
     
     @discord.ui.button(label="Top", style=discord.ButtonStyle.primary, row=0)
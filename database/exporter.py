@@ -0,0 +1,69 @@
+"""
+Streaming export of match and player data to gzipped JSONL or CSV.
+
+Tables are read a page at a time and written straight into the gzip stream, so
+memory use stays at one page regardless of table size.
+"""
+import csv
+import gzip
+import io
+import json
+from typing import BinaryIO, Dict
+from database.supabase_client import db
+
+PAGE_SIZE = 1000
+FORMATS = ('jsonl', 'csv')
+
+# Export name -> table and a unique column to page by
+DATASETS: Dict[str, Dict[str, str]] = {
+    'users': {'table': 'users', 'order': 'discord_id'},
+    'matches': {'table': 'matches', 'order': 'match_id'},
+    'games': {'table': 'games', 'order': 'id'},
+    'player_results': {'table': 'player_match_stats', 'order': 'id'},
+    'matches_archive': {'table': 'matches_archive', 'order': 'match_id'},
+    'games_archive': {'table': 'games_archive', 'order': 'id'},
+    'player_results_archive': {'table': 'player_match_stats_archive', 'order': 'id'},
+    'match_events': {'table': 'match_events', 'order': 'id'},
+}
+
+def export_filename(dataset: str, fmt: str, stamp: str) -> str:
+    return f"{dataset}-{stamp}.{fmt}.gz"
+
+def _csv_value(value):
+    """Flatten arrays (team player lists) and nulls for CSV cells"""
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        return ' '.join(str(item) for item in value)
+    return value
+
+async def export_dataset(dataset: str, fileobj: BinaryIO, fmt: str = 'jsonl', page_size: int = PAGE_SIZE) -> int:
+    """Write one dataset to a binary file object as gzip; returns the number of rows"""
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown dataset: {dataset!r} (expected one of {', '.join(DATASETS)})")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt!r} (expected one of {', '.join(FORMATS)})")
+    
+    source = DATASETS[dataset]
+    rows = 0
+    # mtime=0 keeps the output byte-identical for identical data
+    with gzip.GzipFile(fileobj=fileobj, mode='wb', mtime=0) as compressed:
+        out = io.TextIOWrapper(compressed, encoding='utf-8', newline='')
+        writer = None
+        
+        async for page in db.iter_table(source['table'], source['order'], page_size=page_size):
+            for row in page:
+                if fmt == 'jsonl':
+                    out.write(json.dumps(row, default=str, ensure_ascii=False) + '\n')
+                else:
+                    if writer is None:
+                        # Header from the first row; later rows are written in the same column order
+                        writer = csv.DictWriter(out, fieldnames=list(row), extrasaction='ignore')
+                        writer.writeheader()
+                    writer.writerow({key: _csv_value(value) for key, value in row.items()})
+            rows += len(page)
+        
+        out.flush()
+        out.detach()
+    
+    return rows
\ No newline at end of file
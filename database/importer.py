@@ -0,0 +1,262 @@
+"""
+Streaming bulk import of past series from CSV or JSONL.
+
+One completed series per row:
+
+    series_type,winner_team,team1_score,team2_score,team1,team2,games,played_at
+    BO3,1,2,1,111:alice 222:bob,333:carol 444:dave,1 2 1,2024-03-01T20:00:00
+
+Players are discord IDs or mentions, optionally followed by :username. games is
+optional (winner of each game in order); without it game winners are estimated
+from the final score like /match_import does. JSONL rows use the same keys and
+may give team1, team2 and games as lists.
+
+Match ids are derived from the guild and each row's contents, so importing a
+file again (e.g. after a failed run) adds nothing twice: rows already imported
+are left alone, and settlement picks up wherever the last run stopped.
+
+played_at is an ISO 8601 date or date and time. Streaks and form fold results in
+the order they're settled, so history can only be imported going forward: rows
+played before the latest series already settled for one of their players are
+refused. Undated rows count as played now.
+"""
+import csv
+import json
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+from database.supabase_client import db
+
+BATCH_SIZE = 100
+MAX_REPORTED_ERRORS = 20
+FORMATS = ('csv', 'jsonl')
+
+_PLAYER = re.compile(r'^<@!?(\d+)>$|^(\d+)$')
+# Namespace of imported match ids (uuid5 over the guild and the row)
+IMPORT_NAMESPACE = uuid.UUID('6f1c7a52-3b8e-4d0a-9a51-2f4e8c1d7b30')
+
+class ImportRowError(ValueError):
+    pass
+
+class ImportReport:
+    def __init__(self):
+        self.imported = 0
+        self.games = 0
+        self.players = set()
+        self.errors: List[Tuple[int, str]] = []
+        self.skipped = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+    
+    def add_error(self, line: int, message: str):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+    
+    def summary(self) -> str:
+        rate = self.imported / self.elapsed if self.elapsed else 0
+        return (f"Imported {self.imported} matches ({self.games} games, {len(self.players)} players) "
+                f"in {self.elapsed:.2f}s ({rate:.0f} matches/s), skipped {self.skipped} rows")
+
+def detect_format(filename: str) -> Optional[str]:
+    """Import format from a file name (.csv, .jsonl / .ndjson)"""
+    name = filename.lower()
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    return None
+
+def iter_rows(stream: TextIO, fmt: str) -> Iterator[Tuple[int, Dict]]:
+    """Yield (line number, raw row) without reading the whole stream"""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, {'_error': f"invalid JSON ({e.msg})"}
+            continue
+        yield line_number, row if isinstance(row, dict) else {'_error': "expected a JSON object"}
+
+def _parse_players(value) -> Dict[int, str]:
+    """discord_id -> username from '111:alice <@222> 333' or a list of the same tokens"""
+    tokens = value if isinstance(value, list) else str(value or '').replace(',', ' ').split()
+    players = {}
+    for token in tokens:
+        player_id, _, username = str(token).partition(':')
+        match = _PLAYER.match(player_id.strip())
+        if not match:
+            raise ImportRowError(f"invalid player {token!r}")
+        discord_id = int(match.group(1) or match.group(2))
+        if discord_id in players:
+            raise ImportRowError(f"player {discord_id} listed twice")
+        players[discord_id] = username.strip() or str(discord_id)
+    return players
+
+def _parse_int(row: Dict, key: str) -> int:
+    try:
+        return int(row.get(key))
+    except (TypeError, ValueError):
+        raise ImportRowError(f"{key} must be a number")
+
+def parse_row(row: Dict) -> Dict:
+    """Validate one raw row into a match ready for SupabaseDB.import_matches"""
+    if '_error' in row:
+        raise ImportRowError(row['_error'])
+    
+    series_type = str(row.get('series_type') or '').strip().upper()
+    if series_type not in ['BO3', 'BO5']:
+        raise ImportRowError("series_type must be BO3 or BO5")
+    
+    winner_team = _parse_int(row, 'winner_team')
+    if winner_team not in [1, 2]:
+        raise ImportRowError("winner_team must be 1 or 2")
+    
+    scores = {1: _parse_int(row, 'team1_score'), 2: _parse_int(row, 'team2_score')}
+    wins_needed = 2 if series_type == 'BO3' else 3
+    loser_team = 2 if winner_team == 1 else 1
+    if scores[winner_team] != wins_needed or not 0 <= scores[loser_team] < wins_needed:
+        raise ImportRowError(f"score {scores[1]}-{scores[2]} is not a finished {series_type} won by team {winner_team}")
+    
+    team1 = _parse_players(row.get('team1'))
+    team2 = _parse_players(row.get('team2'))
+    if not team1 or not team2:
+        raise ImportRowError("both teams need at least one player")
+    if team1.keys() & team2.keys():
+        raise ImportRowError("a player is on both teams")
+    
+    games = row.get('games')
+    if games:
+        tokens = games if isinstance(games, list) else str(games).replace(',', ' ').split()
+        if any(str(winner) not in ('1', '2') for winner in tokens):
+            raise ImportRowError("games must list the winning team (1 or 2) of each game")
+        winners = [int(winner) for winner in tokens]
+        if winners.count(1) != scores[1] or winners.count(2) != scores[2] or winners[-1] != winner_team:
+            raise ImportRowError("games do not add up to the final score")
+    else:
+        # Same estimate as /match_import: team 1's wins first
+        winners = [1] * scores[1] + [2] * scores[2]
+    
+    played_at = str(row.get('played_at') or '').strip() or None
+    if played_at is not None:
+        try:
+            _timestamp(played_at)
+        except ValueError:
+            raise ImportRowError("played_at must be an ISO 8601 date or date and time")
+    
+    return {
+        'series_type': series_type,
+        'winner_team': winner_team,
+        'team1': team1,
+        'team2': team2,
+        'winners': winners,
+        'played_at': played_at
+    }
+
+def _timestamp(value: str) -> datetime:
+    """A played_at or completed_at value as a naive UTC datetime, to compare them"""
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+def import_match_id(match: Dict, guild_id: Optional[int], occurrence: int = 1) -> str:
+    """Stable id of a parsed row; occurrence tells identical rows in one file apart"""
+    name = json.dumps([
+        guild_id, match['series_type'], sorted(match['team1']), sorted(match['team2']),
+        match['winners'], match['played_at'], occurrence
+    ])
+    return str(uuid.uuid5(IMPORT_NAMESPACE, name))
+
+async def import_stream(stream: TextIO, fmt: str, batch_size: int = BATCH_SIZE, dry_run: bool = False,
+                        guild_id: Optional[int] = None) -> ImportReport:
+    """Validate and import every row of a CSV/JSONL stream
+
+    Rows are inserted a batch at a time (users, matches, player_match_stats and
+    games in one insert each) and user totals are settled once at the end, in
+    played_at order, after everything settled before. guild_id is the guild the
+    matches were played in, if any.
+    Settlement applies each result once, so if it fails, importing the same
+    stream again completes it.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown import format: {fmt!r} (expected one of {', '.join(FORMATS)})")
+    
+    report = ImportReport()
+    batch: List[Dict] = []
+    results: List[Tuple[Optional[str], str, int, str, bool]] = []
+    # Rows seen per id, so identical rows get ids of their own
+    seen: Dict[str, int] = {}
+    lines: Dict[str, int] = {}
+    # When each player's latest settled series was played, read once per player
+    latest: Dict[int, Optional[datetime]] = {}
+    
+    async def refuse_older():
+        """Drop new dated rows played before a series already settled for one of their players"""
+        dated = [match for match in batch if match['played_at']]
+        if not dated:
+            return
+        # Rows imported by an earlier run were checked then; this run only resumes them
+        existing = await db.get_existing_match_ids([match['match_id'] for match in dated])
+        new = [match for match in dated if match['match_id'] not in existing]
+        unread = list({discord_id for match in new for team in ('team1', 'team2') for discord_id in match[team]} - latest.keys())
+        if unread:
+            found = await db.get_latest_results(unread)
+            latest.update({discord_id: _timestamp(found[discord_id]) if discord_id in found else None for discord_id in unread})
+        
+        for match in new:
+            played_at = _timestamp(match['played_at'])
+            later = [discord_id for team in ('team1', 'team2') for discord_id in match[team]
+                     if latest[discord_id] is not None and latest[discord_id] > played_at]
+            if later:
+                report.add_error(lines[match['match_id']], f"played before the latest settled series of player {later[0]}")
+                batch.remove(match)
+    
+    async def flush():
+        await refuse_older()
+        if not dry_run:
+            await db.import_matches(batch, guild_id)
+        for match in batch:
+            match_id = match['match_id']
+            report.imported += 1
+            report.games += len(match['winners'])
+            for team_number in (1, 2):
+                for discord_id in match[f'team{team_number}']:
+                    report.players.add(discord_id)
+                    results.append((match['played_at'], match_id, discord_id, match['series_type'],
+                                    team_number == match['winner_team']))
+        batch.clear()
+    
+    for line_number, row in iter_rows(stream, fmt):
+        try:
+            match = parse_row(row)
+        except ImportRowError as e:
+            report.add_error(line_number, str(e))
+            continue
+        first_id = import_match_id(match, guild_id)
+        seen[first_id] = seen.get(first_id, 0) + 1
+        match['match_id'] = first_id if seen[first_id] == 1 else import_match_id(match, guild_id, seen[first_id])
+        lines[match['match_id']] = line_number
+        batch.append(match)
+        if len(batch) >= batch_size:
+            await flush()
+    
+    if batch:
+        await flush()
+    
+    if not dry_run:
+        # Undated rows keep their file order after the dated ones
+        results.sort(key=lambda result: (result[0] is None, result[0] or ''))
+        await db.settle([result[1:] for result in results], guild_id)
+    
+    report.elapsed = time.perf_counter() - report.started
+    return report
\ No newline at end of file
@@ -0,0 +1,278 @@
+import copy
+import itertools
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Primary key columns per table; anything not listed gets a serial 'id'
+PRIMARY_KEYS = {
+    'users': ('discord_id',),
+    'matches': ('match_id',),
+    'user_series_stats': ('discord_id', 'series_type', 'guild_id'),
+    'matches_archive': ('match_id',),
+}
+
+class MemoryResponse:
+    def __init__(self, data: List[Dict], count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+class MemoryQuery:
+    """Chainable query mirroring the subset of the postgrest builder SupabaseDB uses"""
+    
+    def __init__(self, client: 'MemoryClient', table: str):
+        self.client = client
+        self.table_name = table
+        self.operation = 'select'
+        self.columns: Optional[List[str]] = None
+        self.payload: Any = None
+        self.on_conflict: Optional[str] = None
+        self.ignore_duplicates = False
+        self.count_mode: Optional[str] = None
+        self.filters: List[Tuple[str, str, Any]] = []
+        self.order_by: List[Tuple[str, bool]] = []
+        self.limit_count: Optional[int] = None
+        self.offset = 0
+    
+    # ============ OPERATIONS ============
+    
+    def select(self, columns: str = '*', count: Optional[str] = None) -> 'MemoryQuery':
+        self.operation = 'select'
+        self.count_mode = count
+        if columns.strip() != '*':
+            self.columns = [c.strip() for c in columns.split(',')]
+        return self
+    
+    def insert(self, rows) -> 'MemoryQuery':
+        self.operation = 'insert'
+        self.payload = rows
+        return self
+    
+    def upsert(self, rows, on_conflict: Optional[str] = None, ignore_duplicates: bool = False) -> 'MemoryQuery':
+        self.operation = 'upsert'
+        self.payload = rows
+        self.on_conflict = on_conflict
+        self.ignore_duplicates = ignore_duplicates
+        return self
+    
+    def update(self, values: Dict) -> 'MemoryQuery':
+        self.operation = 'update'
+        self.payload = values
+        return self
+    
+    def delete(self) -> 'MemoryQuery':
+        self.operation = 'delete'
+        return self
+    
+    # ============ FILTERS ============
+    
+    def _filter(self, op: str, column: str, value: Any) -> 'MemoryQuery':
+        self.filters.append((op, column, value))
+        return self
+    
+    def eq(self, column: str, value: Any) -> 'MemoryQuery':
+        return self._filter('eq', column, value)
+    
+    def neq(self, column: str, value: Any) -> 'MemoryQuery':
+        return self._filter('neq', column, value)
+    
+    def gt(self, column: str, value: Any) -> 'MemoryQuery':
+        return self._filter('gt', column, value)
+    
+    def gte(self, column: str, value: Any) -> 'MemoryQuery':
+        return self._filter('gte', column, value)
+    
+    def lt(self, column: str, value: Any) -> 'MemoryQuery':
+        return self._filter('lt', column, value)
+    
+    def lte(self, column: str, value: Any) -> 'MemoryQuery':
+        return self._filter('lte', column, value)
+    
+    def in_(self, column: str, values: List[Any]) -> 'MemoryQuery':
+        # A set: the replica runs these against whole tables
+        return self._filter('in', column, set(values))
+    
+    def is_(self, column: str, value: Any) -> 'MemoryQuery':
+        return self._filter('is', column, None if value in (None, 'null') else value)
+    
+    def order(self, column: str, desc: bool = False) -> 'MemoryQuery':
+        self.order_by.append((column, desc))
+        return self
+    
+    def limit(self, count: int) -> 'MemoryQuery':
+        self.limit_count = count
+        return self
+    
+    def range(self, start: int, end: int) -> 'MemoryQuery':
+        self.offset = start
+        self.limit_count = end - start + 1
+        return self
+    
+    @property
+    def blocking(self) -> bool:
+        """Whether SupabaseDB should run this query on a worker thread"""
+        return self.client.blocking
+    
+    def execute(self) -> MemoryResponse:
+        return self.client._run(self)
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    'eq': lambda a, b: a == b,
+    'neq': lambda a, b: a != b,
+    'gt': lambda a, b: a is not None and a > b,
+    'gte': lambda a, b: a is not None and a >= b,
+    'lt': lambda a, b: a is not None and a < b,
+    'lte': lambda a, b: a is not None and a <= b,
+    'in': lambda a, b: a in b,
+    'is': lambda a, b: a is b,
+}
+
+class MemoryClient:
+    """In-memory stand-in for the Supabase client, used by tools and local runs"""
+    
+    # Queries finish instantly, so they run on the event loop
+    blocking = False
+    
+    def __init__(self):
+        self.tables: Dict[str, Dict[Any, Dict]] = {}
+        self._serials = itertools.count(1)
+        self.request_count = 0
+    
+    def table(self, name: str) -> MemoryQuery:
+        return MemoryQuery(self, name)
+    
+    def primary_key(self, table: str) -> Tuple[str, ...]:
+        return PRIMARY_KEYS.get(table, ('id',))
+    
+    @staticmethod
+    def _key(row: Dict, columns: Tuple[str, ...]) -> Tuple:
+        return tuple(row.get(c) for c in columns)
+    
+    def _rows(self, table: str) -> Dict[Any, Dict]:
+        return self.tables.setdefault(table, {})
+    
+    def _with_defaults(self, table: str, row: Dict) -> Dict:
+        row = dict(row)
+        key = self.primary_key(table)
+        if len(key) == 1 and row.get(key[0]) is None:
+            row[key[0]] = str(uuid.uuid4()) if key[0] == 'match_id' else next(self._serials)
+        row.setdefault('created_at', datetime.now(timezone.utc).isoformat())
+        return row
+    
+    def _matches(self, row: Dict, filters: List[Tuple[str, str, Any]]) -> bool:
+        return all(_OPERATORS[op](row.get(column), value) for op, column, value in filters)
+    
+    def _project(self, row: Dict, columns: Optional[List[str]]) -> Dict:
+        if columns is None:
+            return copy.deepcopy(row)
+        return {c: copy.deepcopy(row.get(c)) for c in columns}
+    
+    def _run(self, query: MemoryQuery) -> MemoryResponse:
+        self.request_count += 1
+        rows = self._rows(query.table_name)
+        key = self.primary_key(query.table_name)
+        
+        if query.operation in ('insert', 'upsert'):
+            payload = query.payload if isinstance(query.payload, list) else [query.payload]
+            conflict = tuple(c.strip() for c in query.on_conflict.split(',')) if query.on_conflict else key
+            written = []
+            # Rows by their conflict columns, when those aren't the primary key
+            by_conflict = None
+            if query.operation == 'upsert' and conflict != key:
+                by_conflict = {self._key(r, conflict): r for r in rows.values()}
+            for new in payload:
+                existing = None
+                if query.operation == 'upsert':
+                    if by_conflict is None:
+                        existing = rows.get(self._key(new, key))
+                    else:
+                        existing = by_conflict.get(self._key(new, conflict))
+                if existing is not None:
+                    if query.ignore_duplicates:
+                        continue
+                    existing.update(copy.deepcopy(new))
+                    written.append(existing)
+                    continue
+                
+                row = self._with_defaults(query.table_name, copy.deepcopy(new))
+                if self._key(row, key) in rows:
+                    raise ValueError(f"duplicate key value violates unique constraint on {query.table_name}{key}")
+                rows[self._key(row, key)] = row
+                if by_conflict is not None:
+                    by_conflict[self._key(row, conflict)] = row
+                written.append(row)
+            return MemoryResponse([copy.deepcopy(r) for r in written])
+        
+        selected = [r for r in rows.values() if self._matches(r, query.filters)]
+        
+        if query.operation == 'update':
+            for row in selected:
+                row.update(copy.deepcopy(query.payload))
+            return MemoryResponse([copy.deepcopy(r) for r in selected])
+        
+        if query.operation == 'delete':
+            for row in selected:
+                del rows[self._key(row, key)]
+            return MemoryResponse(selected)
+        
+        total = len(selected)
+        for column, desc in reversed(query.order_by):
+            selected.sort(key=lambda r: (r.get(column) is None, r.get(column)), reverse=desc)
+        
+        end = None if query.limit_count is None else query.offset + query.limit_count
+        selected = selected[query.offset:end]
+        
+        return MemoryResponse(
+            [self._project(r, query.columns) for r in selected],
+            total if query.count_mode else None
+        )
+
+class FaultyClient(MemoryClient):
+    """MemoryClient that fails, loses responses and stalls on demand, for chaos testing
+
+    failure_rate: requests that fail before reaching the tables (ConnectionError)
+    lost_response_rate: requests that are applied but whose response never arrives (TimeoutError)
+    slow_rate / slow_seconds: requests that take slow_seconds instead of latency
+    down: every request fails, as during an outage
+
+    Requests run on worker threads like the real client's, one at a time.
+    """
+    
+    blocking = True
+    
+    def __init__(self, failure_rate: float = 0.0, lost_response_rate: float = 0.0, slow_rate: float = 0.0,
+                 slow_seconds: float = 1.0, latency: float = 0.0, seed: Optional[int] = None):
+        super().__init__()
+        self.failure_rate = failure_rate
+        self.lost_response_rate = lost_response_rate
+        self.slow_rate = slow_rate
+        self.slow_seconds = slow_seconds
+        self.latency = latency
+        self.down = False
+        self.faults = {'failed': 0, 'lost': 0, 'slow': 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+    
+    def _roll(self, rate: float) -> bool:
+        with self._lock:
+            return self._random.random() < rate
+    
+    def _run(self, query: MemoryQuery) -> MemoryResponse:
+        slow = self._roll(self.slow_rate)
+        if slow:
+            self.faults['slow'] += 1
+        time.sleep(self.slow_seconds if slow else self.latency)
+        
+        if self.down or self._roll(self.failure_rate):
+            self.faults['failed'] += 1
+            raise ConnectionError(f"injected failure on {query.table_name}")
+        
+        with self._lock:
+            response = super()._run(query)
+        if self._roll(self.lost_response_rate):
+            self.faults['lost'] += 1
+            raise TimeoutError(f"injected lost response on {query.table_name}")
+        return response
\ No newline at end of file
@@ -0,0 +1,16 @@
+-- Per-user, per-series-type career aggregates maintained at settlement time.
+-- series_type is 'BO3', 'BO5' or 'ALL' (career-wide).
+-- Backfill existing history with: python -m tools.rebuild_stats --seed
+
+create table if not exists user_series_stats (
+    discord_id bigint not null references users (discord_id) on delete cascade,
+    series_type text not null,
+    games integer not null default 0,
+    wins integer not null default 0,
+    current_streak integer not null default 0,  -- > 0 win streak, < 0 loss streak
+    best_streak integer not null default 0,     -- longest win streak
+    form_bits integer not null default 0,       -- last 10 results, bit 0 = most recent, 1 = win
+    form_len smallint not null default 0,
+    created_at timestamptz not null default now(),
+    primary key (discord_id, series_type)
+);
@@ -0,0 +1,49 @@
+-- Append-only log of settled and voided series, and snapshots of the stats derived from it.
+-- users.total_games / total_wins and user_series_stats can always be recomputed with:
+--     python -m tools.rebuild_stats [--from-scratch] [--snapshot]
+-- Existing history is turned into events once with: python -m tools.rebuild_stats --seed
+
+create table if not exists match_events (
+    id bigserial primary key,
+    event_type text not null,  -- 'match_settled' or 'match_voided'
+    match_id uuid not null,
+    payload jsonb not null default '{}'::jsonb,
+    created_at timestamptz not null default now()
+);
+
+create index if not exists match_events_type_id on match_events (event_type, id);
+create index if not exists match_events_match on match_events (match_id);
+
+-- The log is never rewritten; corrections are new events
+create or replace function match_events_append_only() returns trigger as $$
+begin
+    raise exception 'match_events is append-only';
+end;
+$$ language plpgsql;
+
+drop trigger if exists match_events_append_only on match_events;
+create trigger match_events_append_only
+    before update or delete on match_events
+    for each row execute function match_events_append_only();
+
+-- Derived state as of last_event_id; rebuilds replay only the events after it
+create table if not exists stat_snapshots (
+    id bigserial primary key,
+    last_event_id bigint not null,
+    players integer not null,
+    created_at timestamptz not null default now()
+);
+
+create table if not exists stat_snapshot_rows (
+    id bigserial primary key,
+    snapshot_id bigint not null references stat_snapshots (id) on delete cascade,
+    discord_id bigint not null,
+    series_type text not null,
+    games integer not null,
+    wins integer not null,
+    current_streak integer not null,
+    best_streak integer not null,
+    form_bits integer not null,
+    form_len smallint not null,
+    unique (snapshot_id, discord_id, series_type)
+);
@@ -0,0 +1,27 @@
+-- Keys that make every write SupabaseDB sends safe to retry (see SupabaseDB._write).
+-- Inserts become upserts on these keys, and settlement records the last event
+-- applied to each row so a repeated settlement doesn't count a result twice.
+
+-- One row per player per match and per game number per match. This fails if
+-- earlier duplicates exist; find them with
+--     select match_id, game_number, count(*) from games group by 1, 2 having count(*) > 1;
+do $$ begin
+    if not exists (select 1 from pg_constraint where conname = 'player_match_stats_match_player') then
+        alter table player_match_stats
+            add constraint player_match_stats_match_player unique (match_id, discord_id);
+    end if;
+    if not exists (select 1 from pg_constraint where conname = 'games_match_game_number') then
+        alter table games
+            add constraint games_match_game_number unique (match_id, game_number);
+    end if;
+end $$;
+
+-- 'settled:<match_id>:<lowest player id>' or 'voided:<match_id>'; null for events logged before this
+alter table match_events add column if not exists request_key text;
+create unique index if not exists match_events_request_key on match_events (request_key);
+
+-- Newest match_events id folded into the row; fill it in for existing rows with
+--     python -m tools.rebuild_stats --from-scratch
+alter table users add column if not exists last_event_id bigint not null default 0;
+alter table user_series_stats add column if not exists last_event_id bigint not null default 0;
+alter table stat_snapshot_rows add column if not exists last_event_id bigint not null default 0;
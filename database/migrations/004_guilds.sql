@@ -0,0 +1,25 @@
+-- Partition matches and aggregates by the guild a series was played in, so
+-- per-guild reads touch only that guild's rows.
+
+-- Null for matches recorded before this (or outside a guild). If the bot only
+-- ever ran in one guild, claim them with
+--     update matches set guild_id = <guild id> where guild_id is null;
+alter table matches add column if not exists guild_id bigint;
+create index if not exists matches_guild_created on matches (guild_id, created_at desc);
+
+-- guild_id 0 holds the aggregates across every guild (what the table held so far);
+-- other rows count only series played in that guild
+alter table user_series_stats add column if not exists guild_id bigint not null default 0;
+alter table user_series_stats drop constraint if exists user_series_stats_pkey;
+alter table user_series_stats add primary key (discord_id, series_type, guild_id);
+-- Per-guild leaderboards read one guild's career rows
+create index if not exists user_series_stats_guild on user_series_stats (guild_id, series_type, games);
+
+alter table stat_snapshot_rows add column if not exists guild_id bigint not null default 0;
+alter table stat_snapshot_rows drop constraint if exists stat_snapshot_rows_snapshot_id_discord_id_series_type_key;
+alter table stat_snapshot_rows drop constraint if exists stat_snapshot_rows_snapshot_player_series_guild;
+alter table stat_snapshot_rows add constraint stat_snapshot_rows_snapshot_player_series_guild
+    unique (snapshot_id, discord_id, series_type, guild_id);
+
+-- Fill in the per-guild rows from the log (matches' guild_id covers older events) with
+--     python -m tools.rebuild_stats --from-scratch
\ No newline at end of file
@@ -0,0 +1,59 @@
+-- Seasons: ending one freezes its standings into season_standings and moves the
+-- season's matches, games and player results out of the hot tables, into the
+-- *_archive tables below or gzipped JSONL files. End a season with
+--     python -m tools.end_season [--name "Season 1"] [--archive table|files]
+
+-- A season covers the match_events after the previous season's last_event_id up to its own
+create table if not exists seasons (
+    id bigserial primary key,
+    number integer not null unique,  -- what /leaderboard season: takes
+    name text not null,
+    first_event_id bigint not null,
+    last_event_id bigint not null,
+    players integer not null default 0,
+    archive text not null,           -- 'table' or 'files'
+    archived_matches integer,        -- null until the season's rows have been moved
+    started_at timestamptz,
+    ended_at timestamptz not null default now()
+);
+
+-- Series results within the season, per player, everywhere (guild_id 0) and per guild
+create table if not exists season_standings (
+    id bigserial primary key,
+    season_id bigint not null references seasons (id) on delete cascade,
+    discord_id bigint not null,
+    guild_id bigint not null default 0,
+    username text,
+    games integer not null,
+    wins integer not null,
+    best_streak integer not null default 0,
+    unique (season_id, discord_id, guild_id)
+);
+create index if not exists season_standings_board on season_standings (season_id, guild_id, games);
+
+-- Constraints are only added if missing, so the migration can be run again
+create table if not exists matches_archive (like matches including defaults);
+alter table matches_archive add column if not exists season_id bigint not null;
+do $$ begin
+    if not exists (select 1 from pg_constraint where conname = 'matches_archive_pkey') then
+        alter table matches_archive add constraint matches_archive_pkey primary key (match_id);
+    end if;
+end $$;
+create index if not exists matches_archive_season on matches_archive (season_id);
+
+create table if not exists games_archive (like games including defaults);
+alter table games_archive add column if not exists season_id bigint not null;
+do $$ begin
+    if not exists (select 1 from pg_constraint where conname = 'games_archive_match_game_number') then
+        alter table games_archive add constraint games_archive_match_game_number unique (match_id, game_number);
+    end if;
+end $$;
+
+create table if not exists player_match_stats_archive (like player_match_stats including defaults);
+alter table player_match_stats_archive add column if not exists season_id bigint not null;
+do $$ begin
+    if not exists (select 1 from pg_constraint where conname = 'player_match_stats_archive_match_player') then
+        alter table player_match_stats_archive add constraint player_match_stats_archive_match_player unique (match_id, discord_id);
+    end if;
+end $$;
+create index if not exists player_match_stats_archive_player on player_match_stats_archive (discord_id);
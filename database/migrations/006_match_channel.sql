@@ -0,0 +1,3 @@
+-- The channel a match was created in, so the bot can find a channel's ongoing
+-- match without being given its id. Null for matches created before this.
+alter table matches add column if not exists channel_id bigint;
@@ -0,0 +1,168 @@
+"""
+Recompute stats derived from the match_events log.
+
+users.total_games / total_wins and user_series_stats (everywhere and per guild)
+are projections of the match_settled events, minus any match with a
+match_voided event. A rebuild starts
+from the latest snapshot (or from nothing), replays the events after it in one
+streaming pass, and writes back only what changed.
+"""
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from database.supabase_client import db, settlement_key
+from utils.series_stats import ALL_GUILDS, ALL_SERIES, AggregateKey, aggregate_keys, apply_result, empty_aggregate
+
+# A rebuild that replays at least this many events leaves a snapshot behind
+SNAPSHOT_EVERY = 5000
+WRITE_CHUNK = 500
+
+AGGREGATE_FIELDS = ('games', 'wins', 'current_streak', 'best_streak', 'form_bits', 'form_len', 'last_event_id')
+
+async def _write(table: str, rows: List[Dict], on_conflict: Optional[str] = None, ignore_duplicates: bool = False):
+    for start in range(0, len(rows), WRITE_CHUNK):
+        await db._write(table, db.client.table(table).upsert(
+            rows[start:start + WRITE_CHUNK], on_conflict=on_conflict, ignore_duplicates=ignore_duplicates
+        ))
+
+async def seed_events() -> int:
+    """Log every series settled before match_events existed; refuses to run twice"""
+    existing = await db._execute(db.client.table('match_events').select('id').limit(1))
+    if existing.data:
+        raise RuntimeError("match_events already has events; seeding again would count history twice")
+    
+    rosters: Dict[str, List[Tuple[int, int]]] = {}
+    async for page in db.iter_table('player_match_stats', 'id', 'id, match_id, discord_id, team_number'):
+        for stat in page:
+            rosters.setdefault(stat['match_id'], []).append((stat['discord_id'], stat['team_number']))
+    
+    matches = []
+    async for page in db.iter_table('matches', 'match_id', 'match_id, guild_id, series_type, winner_team, completed_at', status='completed'):
+        matches.extend(page)
+    matches.sort(key=lambda match: match['completed_at'] or '')
+    
+    events = [
+        {
+            'event_type': 'match_settled',
+            'match_id': match['match_id'],
+            'request_key': settlement_key(match['match_id'], [discord_id for discord_id, _ in rosters[match['match_id']]]),
+            'payload': {
+                'series_type': match['series_type'],
+                'results': [[discord_id, team == match['winner_team']] for discord_id, team in rosters[match['match_id']]],
+                'seeded': True,
+                **({'guild_id': match['guild_id']} if match.get('guild_id') else {})
+            }
+        }
+        for match in matches if rosters.get(match['match_id'])
+    ]
+    await _write('match_events', events, on_conflict='request_key', ignore_duplicates=True)
+    return len(events)
+
+async def match_guilds() -> Dict[str, int]:
+    """Guild of every match that has one, hot or archived
+
+    Events logged before matches had a guild don't name one; the match row may
+    (or its copy in matches_archive, once its season has ended).
+    """
+    guilds: Dict[str, int] = {}
+    for table in ('matches', 'matches_archive'):
+        async for page in db.iter_table(table, 'match_id', 'match_id, guild_id'):
+            guilds.update((match['match_id'], match['guild_id']) for match in page if match.get('guild_id'))
+    return guilds
+
+async def void_match(match_id: str, reason: str) -> Dict:
+    """Strike a series from the stats (e.g. a bad import) and rebuild"""
+    await db._write('match_events', db.client.table('match_events').upsert({
+        'event_type': 'match_voided',
+        'match_id': match_id,
+        'request_key': f"voided:{match_id}",
+        'payload': {'reason': reason}
+    }, on_conflict='request_key', ignore_duplicates=True))
+    await db._write('matches', db.client.table('matches').update({'status': 'voided'}).eq('match_id', match_id))
+    return await rebuild()
+
+async def rebuild(from_scratch: bool = False, snapshot: Optional[bool] = None) -> Dict:
+    """Replay the event log into users and user_series_stats
+
+    snapshot: True always writes a snapshot, False never does, None writes one
+    when at least SNAPSHOT_EVERY events were replayed.
+    """
+    started = time.perf_counter()
+    async with db.settlement_lock:
+        voided: Dict[str, int] = {}
+        async for page in db.iter_table('match_events', 'id', 'id, match_id', event_type='match_voided'):
+            voided.update((event['match_id'], event['id']) for event in page)
+        
+        base = None
+        if not from_scratch:
+            result = await db._execute(db.client.table('stat_snapshots').select('*').order('id', desc=True).limit(1))
+            base = result.data[0] if result.data else None
+            if base and any(event_id > base['last_event_id'] for event_id in voided.values()):
+                # A void newer than the snapshot can take back results inside it
+                base = None
+        
+        aggregates: Dict[AggregateKey, Dict] = {}
+        if base:
+            async for page in db.iter_table('stat_snapshot_rows', 'id', snapshot_id=base['id']):
+                for row in page:
+                    key = (row['discord_id'], row['series_type'], row.get('guild_id') or ALL_GUILDS)
+                    aggregate = empty_aggregate(*key)
+                    aggregate.update({field: row[field] for field in AGGREGATE_FIELDS})
+                    aggregates[key] = aggregate
+        
+        guilds = await match_guilds()
+        
+        last_event_id = base['last_event_id'] if base else 0
+        replayed = 0
+        async for page in db.iter_table('match_events', 'id', after=last_event_id, event_type='match_settled'):
+            for event in page:
+                last_event_id = event['id']
+                series_type = event['payload']['series_type']
+                guild_id = event['payload'].get('guild_id') or guilds.get(event['match_id'])
+                is_voided = event['match_id'] in voided
+                for discord_id, won in event['payload']['results']:
+                    for key in aggregate_keys(discord_id, series_type, guild_id):
+                        # Voided results still mark the row as up to date with the event
+                        if key not in aggregates:
+                            aggregates[key] = empty_aggregate(*key)
+                        if not is_voided:
+                            apply_result(aggregates[key], won)
+                        aggregates[key]['last_event_id'] = event['id']
+                replayed += 1
+        
+        # Totals follow the career aggregate; write only rows that changed
+        users_changed = []
+        known_users = set()
+        async for page in db.iter_table('users', 'discord_id'):
+            for user in page:
+                known_users.add(user['discord_id'])
+                career = aggregates.get((user['discord_id'], ALL_SERIES, ALL_GUILDS)) or empty_aggregate(user['discord_id'], ALL_SERIES)
+                totals = {'total_games': career['games'], 'total_wins': career['wins'], 'last_event_id': career['last_event_id']}
+                if any(user.get(field, 0) != value for field, value in totals.items()):
+                    users_changed.append({**user, **totals})
+        await _write('users', users_changed, on_conflict='discord_id')
+        
+        rows = [aggregate for key, aggregate in aggregates.items() if key[0] in known_users]
+        await _write('user_series_stats', rows, on_conflict='discord_id,series_type,guild_id')
+        
+        snapshot_id = None
+        if snapshot or (snapshot is None and replayed >= SNAPSHOT_EVERY):
+            # The voids read above are accounted for too, so later rebuilds can start here
+            result = await db._write('stat_snapshots', db.client.table('stat_snapshots').insert({
+                'last_event_id': max([last_event_id, *voided.values()]),
+                'players': len({discord_id for discord_id, _, _ in aggregates}),
+                'created_at': datetime.now().isoformat()
+            }), idempotent=False)
+            snapshot_id = result.data[0]['id']
+            await _write('stat_snapshot_rows', [{'snapshot_id': snapshot_id, **aggregate} for aggregate in aggregates.values()],
+                         on_conflict='snapshot_id,discord_id,series_type,guild_id')
+    
+    return {
+        'base_snapshot': base['id'] if base else None,
+        'events_replayed': replayed,
+        'voided_matches': len(voided),
+        'users_updated': len(users_changed),
+        'aggregates_written': len(rows),
+        'snapshot': snapshot_id,
+        'elapsed': time.perf_counter() - started
+    }
\ No newline at end of file
@@ -0,0 +1,229 @@
+"""
+Local read replica of the player tables commands read.
+
+users and user_series_stats are loaded into a MemoryClient at startup and kept
+current two ways: rows this process writes are mirrored straight in
+(write-through), and writes made elsewhere (tools, other processes) are picked
+up from the match_events log by the feed, which re-reads the rows each new
+event touched. Only settlements and voids are logged, so match rows (created,
+recorded and archived without an event) are always read from the backend.
+"""
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
+from database.memory_client import MemoryClient
+from utils.metrics import metrics
+
+if TYPE_CHECKING:
+    from database.supabase_client import SupabaseDB
+
+log = logging.getLogger(__name__)
+
+# Table -> unique column to page it on at load (user_series_stats is loaded per user).
+# Every change to these is settled or voided through match_events.
+REPLICATED_TABLES = {
+    'users': 'discord_id',
+    'user_series_stats': None,
+}
+
+FEED_PAGE = 500
+# Event ids take their number before they commit, so one can become visible after
+# a higher one; the feed reads this many ids below its position again every poll
+REPLAY_WINDOW = 200
+# Players per refresh query, keeping result sets under the API's row limit
+PLAYER_CHUNK = 200
+
+class LocalReplica:
+    """In-memory copy of the replicated tables, served once loaded
+
+    Reads stop being served (and go to the backend again) when the feed hasn't
+    caught up for max_staleness seconds.
+    """
+    
+    def __init__(self, db: 'SupabaseDB', max_staleness: float = 60.0):
+        self.db = db
+        self.max_staleness = max_staleness
+        self.store: Optional[MemoryClient] = None
+        self.last_event_id = 0
+        self.synced_at: Optional[float] = None
+        self._own_events: Set[int] = set()
+        # Event ids within REPLAY_WINDOW of last_event_id already handled
+        self._seen: Set[int] = set()
+        # Rows written while a load is in flight, applied once it finishes
+        self._pending: Optional[List[tuple]] = None
+        self._task: Optional[asyncio.Task] = None
+        
+        metrics.describe('bot_replica_staleness_seconds', 'gauge', 'Seconds since the local replica last caught up with the event log')
+        metrics.describe('bot_replica_rows', 'gauge', 'Rows held by the local replica')
+        metrics.describe('bot_replica_reads_total', 'counter', 'Reads served by the local replica')
+        metrics.describe('bot_replica_events_total', 'counter', 'Events from other writers applied by the feed')
+        metrics.register_collector(self._collect)
+    
+    @property
+    def staleness(self) -> Optional[float]:
+        return None if self.synced_at is None else time.time() - self.synced_at
+    
+    @property
+    def ready(self) -> bool:
+        return self.store is not None and self.staleness <= self.max_staleness
+    
+    def serves(self, table: str) -> bool:
+        """Whether reads of a table should come from the replica right now"""
+        return table in REPLICATED_TABLES and self.ready
+    
+    def _collect(self):
+        if self.store is None:
+            return
+        metrics.set_gauge('bot_replica_staleness_seconds', self.staleness)
+        for table in REPLICATED_TABLES:
+            metrics.set_gauge('bot_replica_rows', len(self.store.tables.get(table, {})), {'table': table})
+    
+    # ============ LOADING ============
+    
+    async def _recent_event_ids(self) -> List[int]:
+        result = await self.db._execute(self.db.client.table('match_events').select('id')
+                                        .order('id', desc=True).limit(REPLAY_WINDOW))
+        return [event['id'] for event in result.data]
+    
+    async def load(self):
+        """Copy the replicated tables into a fresh store and start serving from it"""
+        started = time.perf_counter()
+        self._pending = []
+        try:
+            # Read the log position first: events during the load are replayed after it
+            recent = await self._recent_event_ids()
+            position = max(recent, default=0)
+            store = MemoryClient()
+            for table, order in REPLICATED_TABLES.items():
+                if order is None:
+                    continue
+                async for page in self.db.iter_table(table, order):
+                    store.table(table).upsert(page).execute()
+            
+            player_ids = [user['discord_id'] for user in store.tables.get('users', {}).values()]
+            for start in range(0, len(player_ids), PLAYER_CHUNK):
+                result = await self.db._execute(self.db.client.table('user_series_stats').select('*')
+                                                .in_('discord_id', player_ids[start:start + PLAYER_CHUNK]))
+                store.table('user_series_stats').upsert(result.data).execute()
+            
+            for table, rows in self._pending:
+                store.table(table).upsert(rows).execute()
+        finally:
+            self._pending = None
+        
+        self.store = store
+        self.last_event_id = position
+        self._seen = set(recent)
+        self.synced_at = time.time()
+        rows = sum(len(store.tables.get(table, {})) for table in REPLICATED_TABLES)
+        log.info("Local replica loaded %d rows in %.2fs", rows, time.perf_counter() - started)
+    
+    # ============ WRITE-THROUGH ============
+    
+    def owns(self, query) -> bool:
+        """Whether a query was built on the replica's store"""
+        return self.store is not None and getattr(query, 'client', None) is self.store
+    
+    def apply(self, table: str, rows: List[Dict]):
+        """Mirror rows this process just wrote to the backend"""
+        if table == 'match_events':
+            # Already reflected locally; the feed skips them
+            self._own_events.update(row['id'] for row in rows)
+            return
+        if table not in REPLICATED_TABLES or not rows:
+            return
+        if self._pending is not None:
+            self._pending.append((table, rows))
+        if self.store is not None:
+            self.store.table(table).upsert(rows).execute()
+    
+    def discard(self, table: str, column: str, values: List):
+        """Drop rows this process just deleted from the backend"""
+        if table not in REPLICATED_TABLES or not values:
+            return
+        if self.store is not None:
+            self.store.table(table).delete().in_(column, values).execute()
+    
+    # ============ CHANGE FEED ============
+    
+    async def _fetch(self, table: str, column: str, values: List, chunk: int) -> List[Dict]:
+        rows = []
+        for start in range(0, len(values), chunk):
+            result = await self.db._execute(self.db.client.table(table).select('*').in_(column, values[start:start + chunk]))
+            self.store.table(table).upsert(result.data).execute()
+            rows += result.data
+        return rows
+    
+    async def _refresh(self, events: List[Dict]):
+        """Re-read every row events from other writers may have changed"""
+        if any(event['event_type'] == 'match_voided' for event in events):
+            # A void is followed by a rebuild that can touch any player
+            async for page in self.db.iter_table('users', 'discord_id'):
+                self.store.table('users').upsert(page).execute()
+                self.db.ranks.update(page)
+            player_ids = [user['discord_id'] for user in self.store.tables.get('users', {}).values()]
+        else:
+            player_ids = list({
+                discord_id
+                for event in events if event['event_type'] == 'match_settled'
+                for discord_id, _ in event['payload']['results']
+            })
+            # Other writers' settlements move players in the rank index too
+            self.db.ranks.update(await self._fetch('users', 'discord_id', player_ids, PLAYER_CHUNK))
+        
+        await self._fetch('user_series_stats', 'discord_id', player_ids, PLAYER_CHUNK)
+    
+    async def poll(self) -> int:
+        """Apply events logged since the last poll; returns how many came from other writers"""
+        applied = 0
+        after = max(0, self.last_event_id - REPLAY_WINDOW)
+        while True:
+            # Settlements log their events under this lock, so ours are all known by the time we read
+            async with self.db.settlement_lock:
+                result = await self.db._execute(self.db.client.table('match_events').select('id, event_type, match_id, payload')
+                                                .gt('id', after).order('id').limit(FEED_PAGE))
+                handled = self._seen | self._own_events
+                events = [event for event in result.data if event['id'] not in handled]
+                if events:
+                    await self._refresh(events)
+                    applied += len(events)
+                    metrics.inc('bot_replica_events_total', amount=len(events))
+            
+            if result.data:
+                after = result.data[-1]['id']
+                self.last_event_id = max(self.last_event_id, after)
+                self._seen.update(event['id'] for event in result.data)
+            if len(result.data) < FEED_PAGE:
+                break
+        
+        floor = self.last_event_id - REPLAY_WINDOW
+        self._seen = {event_id for event_id in self._seen if event_id > floor}
+        self._own_events = {event_id for event_id in self._own_events if event_id > self.last_event_id}
+        self.synced_at = time.time()
+        return applied
+    
+    async def run(self, interval: float = 5.0):
+        """Load, then follow the event log every interval seconds until cancelled"""
+        while self.store is None:
+            try:
+                await self.load()
+            except Exception as e:
+                log.warning("Loading the local replica failed, retrying: %s", e)
+                await asyncio.sleep(interval)
+        
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.poll()
+            except Exception as e:
+                log.warning("Local replica poll failed: %s", e)
+    
+    def start(self, interval: float = 5.0):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run(interval))
+    
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
\ No newline at end of file
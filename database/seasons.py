@@ -0,0 +1,201 @@
+"""
+End seasons: freeze their standings and move their rows out of the hot tables.
+
+A season covers the match_events logged after the previous season ended. Ending
+one replays just those events into season_standings (per player, everywhere and
+per guild), then moves every match settled in it, with its games and player
+results, into the *_archive tables or gzipped JSONL files, so the tables
+commands read only hold the current season.
+
+The log itself is never archived, so rebuilds still count every season.
+"""
+import gzip
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from database.rebuild import match_guilds
+from database.supabase_client import db
+from utils.series_stats import ALL_GUILDS, ALL_SERIES, aggregate_keys, apply_result, empty_aggregate
+
+ARCHIVES = ('table', 'files')
+# Matches per archival read/delete, keeping in_() filters well inside URL limits
+ARCHIVE_CHUNK = 100
+STANDINGS_CHUNK = 500
+
+# Hot table -> its archive table and the key archived rows are upserted on
+ARCHIVED_TABLES: Dict[str, Tuple[str, str]] = {
+    'matches': ('matches_archive', 'match_id'),
+    'games': ('games_archive', 'match_id,game_number'),
+    'player_match_stats': ('player_match_stats_archive', 'match_id,discord_id'),
+}
+
+def archive_filename(number: int, table: str, chunk: int) -> str:
+    return f"season-{number}-{table}-{chunk:05d}.jsonl.gz"
+
+def _filed_guilds(number: int, archive_dir: str) -> Dict[str, int]:
+    """Guilds of a season's matches already archived to files (by an interrupted run)"""
+    guilds: Dict[str, int] = {}
+    prefix = f"season-{number}-matches-"
+    if not os.path.isdir(archive_dir):
+        return guilds
+    for filename in os.listdir(archive_dir):
+        if filename.startswith(prefix) and filename.endswith('.jsonl.gz'):
+            with gzip.open(os.path.join(archive_dir, filename), 'rt', encoding='utf-8') as f:
+                for line in f:
+                    match = json.loads(line)
+                    if match.get('guild_id'):
+                        guilds[match['match_id']] = match['guild_id']
+    return guilds
+
+async def _standings(first_event_id: int, last_event_id: int,
+                     guilds: Dict[str, int]) -> Tuple[Dict[Tuple[int, int], Dict], List[str]]:
+    """Career-style aggregates of one season's events, and the matches settled in it
+
+    guilds is each match's guild, for events logged without one (as in rebuild).
+    """
+    voided = set()
+    async for page in db.iter_table('match_events', 'id', 'id, match_id', event_type='match_voided'):
+        voided.update(event['match_id'] for event in page)
+    
+    standings: Dict[Tuple[int, int], Dict] = {}
+    match_ids = []
+    async for page in db.iter_table('match_events', 'id', after=first_event_id, event_type='match_settled'):
+        for event in page:
+            if event['id'] > last_event_id:
+                # Settled after the season ended
+                return standings, list(dict.fromkeys(match_ids))
+            match_ids.append(event['match_id'])
+            if event['match_id'] in voided:
+                continue
+            guild_id = event['payload'].get('guild_id') or guilds.get(event['match_id'])
+            for discord_id, won in event['payload']['results']:
+                for _, series_type, key_guild in aggregate_keys(discord_id, event['payload']['series_type'], guild_id):
+                    if series_type != ALL_SERIES:
+                        continue
+                    key = (discord_id, key_guild)
+                    if key not in standings:
+                        standings[key] = empty_aggregate(discord_id, ALL_SERIES, key_guild)
+                    apply_result(standings[key], won)
+    return standings, list(dict.fromkeys(match_ids))
+
+async def _write_standings(season_id: int, standings: Dict[Tuple[int, int], Dict]):
+    players = {discord_id for discord_id, _ in standings}
+    names = {}
+    async for page in db.iter_table('users', 'discord_id', 'discord_id, username'):
+        names.update((user['discord_id'], user['username']) for user in page if user['discord_id'] in players)
+    
+    rows = [
+        {
+            'season_id': season_id,
+            'discord_id': discord_id,
+            'guild_id': guild_id,
+            'username': names.get(discord_id),
+            'games': aggregate['games'],
+            'wins': aggregate['wins'],
+            'best_streak': aggregate['best_streak']
+        }
+        for (discord_id, guild_id), aggregate in standings.items()
+    ]
+    for start in range(0, len(rows), STANDINGS_CHUNK):
+        await db._write('season_standings', db.client.table('season_standings').upsert(
+            rows[start:start + STANDINGS_CHUNK], on_conflict='season_id,discord_id,guild_id'
+        ))
+
+async def _archive(season: Dict, match_ids: List[str], archive_dir: Optional[str]) -> int:
+    """Move the season's matches out of the hot tables; returns how many were still there
+
+    Rows are copied before they are deleted, a chunk of matches at a time, so an
+    interrupted run can simply be repeated. match_ids come from the season's
+    events, so a rerun splits them into the same chunks: each chunk's file is
+    replaced whole, and a table whose rows are already gone keeps its file.
+    """
+    archive = season['archive']
+    if archive == 'files':
+        os.makedirs(archive_dir, exist_ok=True)
+    
+    moved = 0
+    for start in range(0, len(match_ids), ARCHIVE_CHUNK):
+        chunk = match_ids[start:start + ARCHIVE_CHUNK]
+        rows = {
+            table: (await db._execute(db.client.table(table).select('*').in_('match_id', chunk))).data
+            for table in ARCHIVED_TABLES
+        }
+        moved += len(rows['matches'])
+        
+        for table, (archive_table, key) in ARCHIVED_TABLES.items():
+            if not rows[table]:
+                continue
+            if archive == 'files':
+                path = os.path.join(archive_dir, archive_filename(season['number'], table, start // ARCHIVE_CHUNK))
+                with gzip.open(path + '.tmp', 'wt', encoding='utf-8') as out:
+                    out.writelines(json.dumps({**row, 'season_id': season['id']}, default=str) + '\n' for row in rows[table])
+                os.replace(path + '.tmp', path)
+            else:
+                await db._write(archive_table, db.client.table(archive_table).upsert(
+                    [{**row, 'season_id': season['id']} for row in rows[table]], on_conflict=key
+                ))
+        
+        # Children first: a match is only gone once nothing refers to it
+        for table in ('games', 'player_match_stats', 'matches'):
+            await db._delete(table, 'match_id', chunk)
+    return moved
+
+async def end_season(name: Optional[str] = None, archive: str = 'table', archive_dir: str = 'archive') -> Dict:
+    """Close the current season and archive its matches
+
+    If the last season was ended but its archival didn't finish, that season is
+    finished instead of starting a new one.
+    """
+    if archive not in ARCHIVES:
+        raise ValueError(f"Unknown archive: {archive!r} (expected one of {', '.join(ARCHIVES)})")
+    
+    async with db.settlement_lock:
+        result = await db._execute(db.client.table('seasons').select('*').order('id', desc=True).limit(1))
+        previous = result.data[0] if result.data else None
+        
+        if previous and previous.get('archived_matches') is None:
+            season = previous
+        else:
+            first_event_id = previous['last_event_id'] if previous else 0
+            result = await db._execute(db.client.table('match_events').select('id').order('id', desc=True).limit(1))
+            last_event_id = result.data[0]['id'] if result.data else 0
+            if last_event_id <= first_event_id:
+                raise RuntimeError("No series have been settled since the last season ended")
+            
+            number = previous['number'] + 1 if previous else 1
+            result = await db._write('seasons', db.client.table('seasons').insert({
+                'number': number,
+                'name': name or f"Season {number}",
+                'first_event_id': first_event_id,
+                'last_event_id': last_event_id,
+                'archive': archive,
+                'started_at': previous['ended_at'] if previous else None,
+                'ended_at': datetime.now().isoformat()
+            }), idempotent=False)
+            season = result.data[0]
+        
+        guilds = await match_guilds()
+        if season['archive'] == 'files':
+            guilds.update(_filed_guilds(season['number'], archive_dir))
+        standings, match_ids = await _standings(season['first_event_id'], season['last_event_id'], guilds)
+        await _write_standings(season['id'], standings)
+    
+    # Settlements only touch the current season's matches, so archival can run alongside them
+    moved = await _archive(season, match_ids, archive_dir)
+    players = len({discord_id for discord_id, guild_id in standings if guild_id == ALL_GUILDS})
+    await db._write('seasons', db.client.table('seasons').update({
+        'players': players,
+        'archived_matches': len(match_ids)
+    }).eq('id', season['id']))
+    
+    return {
+        'season': season['number'],
+        'name': season['name'],
+        'resumed': season is previous,
+        'players': players,
+        'standings': len(standings),
+        'matches_archived': moved,
+        'archive': season['archive'],
+        'archive_dir': os.path.abspath(archive_dir) if season['archive'] == 'files' else None
+    }
\ No newline at end of file
@@ -1,23 +1,234 @@
-from supabase import create_client, Client
+import asyncio
+import concurrent.futures
+import heapq
 import os
-from typing import List, Dict, Optional
+import threading
+import time
+import uuid
+from typing import AsyncIterator, List, Dict, Optional, Set, Tuple, TYPE_CHECKING
 from datetime import datetime
+from utils.metrics import current_db_method, metrics
+from utils.profiler import run_db_call
+from utils.rank_index import RankIndex
+from utils.resilience import CircuitBreaker, LatencyWindow, RetryPolicy, is_transient
+from utils.series_stats import ALL_GUILDS, ALL_SERIES, aggregate_keys, apply_result, empty_aggregate
+
+if TYPE_CHECKING:
+    from supabase import Client
+    from database.replica import LocalReplica
+
+# Players per settlement read/write, keeping in_() filters well inside URL limits
+SETTLE_CHUNK = 200
+# Matches per multi-match read, keeping result sets under the API's row limit
+MATCH_CHUNK = 50
+# Threads for blocking backend requests; hedged reads leave stalled requests running here
+IO_THREADS = 16
+
+def settlement_key(match_id: str, player_ids: List[int]) -> str:
+    """Request key of a match_settled event; settle() logs a match once per chunk of players"""
+    return f"settled:{match_id}:{min(player_ids)}"
 
 class SupabaseDB:
-    def __init__(self):
-        url = os.getenv("SUPABASE_URL")
-        key = os.getenv("SUPABASE_KEY")
-        self.client: Client = create_client(url, key)
+    def __init__(self, client: Optional['Client'] = None):
+        self._client = client
+        self._client_lock = threading.Lock()
+        # Settlements and stat rebuilds must not interleave
+        self.settlement_lock = asyncio.Lock()
+        # Serves reads once attached and loaded (see database/replica.py)
+        self.replica: Optional['LocalReplica'] = None
+        # Leaderboard positions, kept current by every users write once loaded
+        self.ranks = RankIndex()
+        self.retry = RetryPolicy()
+        self.breaker = CircuitBreaker()
+        self.latency = LatencyWindow()
+        self._threads: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        
+        metrics.describe('bot_db_retries_total', 'counter', 'Database requests sent again after a transient failure')
+        metrics.describe('bot_db_hedges_total', 'counter', 'Duplicate reads sent because the first was slow, by which answered first')
+    
+    @property
+    def client(self) -> 'Client':
+        """Backend client, created from the environment on first use"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    # supabase pulls in a large dependency tree, so only import it when needed
+                    from supabase import create_client
+                    url = os.getenv("SUPABASE_URL")
+                    key = os.getenv("SUPABASE_KEY")
+                    self._client = create_client(url, key)
+        return self._client
+    
+    async def warm_up(self):
+        """Import and create the backend client on a worker thread"""
+        try:
+            await asyncio.to_thread(lambda: self.client)
+        except Exception as e:
+            print(f"Failed to create database client: {e}")
+    
+    def use_client(self, client):
+        """Swap the backend client (e.g. for a MemoryClient in tools)"""
+        self._client = client
+    
+    async def _call(self, query, method: str):
+        if not getattr(query, 'blocking', True):
+            return query.execute()
+        # The real client blocks on HTTP, so it runs on our own threads rather
+        # than the loop's default executor, which stalled requests could exhaust
+        if self._threads is None:
+            self._threads = concurrent.futures.ThreadPoolExecutor(IO_THREADS, thread_name_prefix='db')
+        return await asyncio.get_running_loop().run_in_executor(self._threads, run_db_call, method, query.execute)
+    
+    async def _hedged(self, query, method: str):
+        """Send a read, and a duplicate if the first is slower than recent reads usually are"""
+        if not getattr(query, 'blocking', True):
+            return query.execute()
+        
+        started = time.perf_counter()
+        first = asyncio.ensure_future(self._call(query, method))
+        # The window learns how long requests really take, hedged or not
+        first.add_done_callback(lambda _: self.latency.add(time.perf_counter() - started))
+        done, _ = await asyncio.wait({first}, timeout=self.latency.threshold())
+        if done:
+            return first.result()
+        
+        second = asyncio.ensure_future(self._call(query, method))
+        done, _ = await asyncio.wait({first, second}, return_when=asyncio.FIRST_COMPLETED)
+        winner = done.pop()
+        if winner.exception() is not None:
+            # Whichever answers, the other gets its chance
+            winner = second if winner is first else first
+        for task in (first, second):
+            if task is not winner:
+                # The thread can't be stopped; just drop its answer
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        metrics.inc('bot_db_hedges_total', {'winner': 'hedge' if winner is second else 'original'})
+        return await winner
+    
+    async def _execute(self, query, idempotent: bool = True, hedge: bool = True):
+        """Run a query builder against the backend, counting the round trip
+        
+        Transient failures are retried with jittered backoff unless the query
+        isn't idempotent; the circuit breaker refuses requests while the backend
+        is down. Reads get a hedged duplicate when they run past recent tail latency.
+        """
+        if self.replica is not None and self.replica.owns(query):
+            metrics.inc('bot_replica_reads_total', {'table': query.table_name})
+            return query.execute()
+        metrics.count_round_trip()
+        # Worker threads don't see the caller's context, so the method goes along with each request
+        method = current_db_method.get() or 'unknown'
+        
+        retry = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                result = await (self._hedged(query, method) if hedge else self._call(query, method))
+            except Exception as e:
+                if not is_transient(e):
+                    # The backend answered; the request itself was wrong
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                retry += 1
+                if not idempotent or retry >= self.retry.attempts:
+                    raise
+                metrics.inc('bot_db_retries_total', {'method': method})
+                await asyncio.sleep(self.retry.delay(retry))
+                continue
+            except BaseException:
+                # Cancelled: no verdict on the backend, but a half-open trial is over
+                self.breaker.abandon_call()
+                raise
+            self.breaker.record_success()
+            return result
+    
+    def _read(self, table: str):
+        """Query builder for a read: the local replica's if it serves the table, else the backend's"""
+        if self.replica is not None and self.replica.serves(table):
+            return self.replica.store.table(table)
+        return self.client.table(table)
+    
+    async def _write(self, table: str, query, idempotent: bool = True):
+        """Run a write against the backend and mirror the rows it returns into the replica
+        
+        Writes are retried, so they must be safe to apply twice (an upsert on a
+        natural or client-generated key, or an update to absolute values) unless
+        idempotent=False.
+        """
+        result = await self._execute(query, idempotent=idempotent, hedge=False)
+        if self.replica is not None:
+            self.replica.apply(table, result.data)
+        if table == 'users':
+            self.ranks.update(result.data)
+        return result
+    
+    async def _delete(self, table: str, column: str, values: List):
+        """Delete the rows whose column is one of values, here and in the replica (safe to retry)"""
+        await self._execute(self.client.table(table).delete().in_(column, list(values)), hedge=False)
+        if self.replica is not None:
+            self.replica.discard(table, column, values)
+    
+    async def _lookup(self, table: str, column: str, values: List) -> List[Dict]:
+        """Rows whose column is one of values
+        
+        A replica miss isn't trusted (another process may have just created the
+        row), so values it has no row for are read from the backend.
+        """
+        query = self._read(table).select('*').in_(column, list(values))
+        rows = (await self._execute(query)).data
+        if self.replica is not None and self.replica.owns(query):
+            missing = set(values) - {row[column] for row in rows}
+            if missing:
+                result = await self._execute(self.client.table(table).select('*').in_(column, list(missing)))
+                self.replica.apply(table, result.data)
+                rows += result.data
+        return rows
+    
+    async def iter_table(self, table: str, order: str, columns: str = '*', page_size: int = 1000,
+                         after=None, **eq) -> AsyncIterator[List[Dict]]:
+        """Yield a whole table page by page
+        
+        Pages are keyed on order, which must be unique (and selected): each page
+        starts after the last value of the previous one, so deep pages cost the
+        same as the first.
+        """
+        while True:
+            query = self.client.table(table).select(columns)
+            for column, value in eq.items():
+                query = query.eq(column, value)
+            if after is not None:
+                query = query.gt(order, after)
+            result = await self._execute(query.order(order).limit(page_size))
+            if result.data:
+                yield result.data
+                after = result.data[-1][order]
+            if len(result.data) < page_size:
+                return
+    
+    async def _insert_users(self, rows: List[Dict]) -> Dict[int, Dict]:
+        """Create users, reading back any that already exist (safe to retry)"""
+        result = await self._write('users', self.client.table('users').upsert(
+            rows, on_conflict='discord_id', ignore_duplicates=True
+        ))
+        created = {row['discord_id']: row for row in result.data}
+        existing = [row['discord_id'] for row in rows if row['discord_id'] not in created]
+        if existing:
+            # Created meanwhile by another writer, or by an attempt whose response was lost
+            result = await self._execute(self.client.table('users').select('*').in_('discord_id', existing))
+            created.update({row['discord_id']: row for row in result.data})
+        return created
     
     # ============ USER OPERATIONS ============
     
+    @metrics.track_db
     async def get_or_create_user(self, discord_id: int, username: str) -> Dict:
         """Get user or create if doesn't exist"""
         # Check if user exists
-        result = self.client.table('users').select('*').eq('discord_id', discord_id).execute()
+        found = await self._lookup('users', 'discord_id', [discord_id])
         
-        if result.data:
-            return result.data[0]
+        if found:
+            return found[0]
         
         # Create new user
         new_user = {
@@ -26,74 +237,151 @@ class SupabaseDB:
             'total_games': 0,
             'total_wins': 0
         }
-        result = self.client.table('users').insert(new_user).execute()
-        return result.data[0]
+        created = await self._insert_users([new_user])
+        return created[discord_id]
+    
+    @metrics.track_db
+    async def ensure_users(self, users: Dict[int, str]) -> Dict[int, Dict]:
+        """Get or create several users at once (discord_id -> username)"""
+        if not users:
+            return {}
+        
+        found = {row['discord_id']: row for row in await self._lookup('users', 'discord_id', list(users))}
+        
+        missing = [
+            {'discord_id': discord_id, 'username': username, 'total_games': 0, 'total_wins': 0}
+            for discord_id, username in users.items() if discord_id not in found
+        ]
+        if missing:
+            found.update(await self._insert_users(missing))
+        
+        return found
     
+    @metrics.track_db
+    async def get_users(self, discord_ids: List[int]) -> Dict[int, Dict]:
+        """Users rows for several players at once (missing players are left out)"""
+        if not discord_ids:
+            return {}
+        return {row['discord_id']: row for row in await self._lookup('users', 'discord_id', list(discord_ids))}
+    
+    @metrics.track_db
     async def get_user_stats(self, discord_id: int) -> Optional[Dict]:
         """Get user statistics"""
-        result = self.client.table('users').select('*').eq('discord_id', discord_id).execute()
-        return result.data[0] if result.data else None
+        found = await self._lookup('users', 'discord_id', [discord_id])
+        return found[0] if found else None
     
-    async def update_user_stats(self, discord_id: int, won: bool):
-        """Update user win/loss stats"""
-        user = await self.get_user_stats(discord_id)
-        if not user:
-            return
-        
-        new_games = user['total_games'] + 1
-        new_wins = user['total_wins'] + (1 if won else 0)
-        
-        self.client.table('users').update({
-            'total_games': new_games,
-            'total_wins': new_wins
-        }).eq('discord_id', discord_id).execute()
+    async def load_ranks(self):
+        """Fill the rank index from the users table; writes keep it current afterwards"""
+        self.ranks.begin_load()
+        users = []
+        try:
+            async for page in self.iter_table('users', 'discord_id', 'discord_id, total_games, total_wins'):
+                users.extend(page)
+        except BaseException:
+            self.ranks.abort_load()
+            raise
+        self.ranks.load(users)
     
-    async def get_leaderboard(self, limit: int = 10) -> List[Dict]:
-        """Get top players by win rate"""
-        result = self.client.table('users').select('*').gt('total_games', 0).execute()
+    @metrics.track_db
+    async def get_leaderboard(self, limit: int = 10, guild_id: Optional[int] = None) -> List[Dict]:
+        """Get top players by win rate, across every guild or within one"""
+        if guild_id:
+            return await self._guild_leaderboard(limit, guild_id)
+        
+        result = await self._execute(self._read('users').select('*').gt('total_games', 0))
         
         # Calculate win rates and sort
         users = result.data
         for user in users:
             user['win_rate'] = (user['total_wins'] / user['total_games']) * 100 if user['total_games'] > 0 else 0
         
-        users.sort(key=lambda x: (x['win_rate'], x['total_wins']), reverse=True)
-        return users[:limit]
+        return heapq.nlargest(limit, users, key=lambda x: (x['win_rate'], x['total_wins']))
+    
+    async def _guild_leaderboard(self, limit: int, guild_id: int) -> List[Dict]:
+        # Only this guild's career rows are read (guild_id leads their index), then the top players' names
+        result = await self._execute(self._read('user_series_stats').select('discord_id, games, wins')
+                                     .eq('guild_id', guild_id).eq('series_type', ALL_SERIES).gt('games', 0))
+        top = heapq.nlargest(limit, result.data, key=lambda row: (row['wins'] / row['games'], row['wins']))
+        if not top:
+            return []
+        users = {user['discord_id']: user for user in await self._lookup('users', 'discord_id', [row['discord_id'] for row in top])}
+        return [
+            {
+                **users.get(row['discord_id'], {'discord_id': row['discord_id'], 'username': str(row['discord_id'])}),
+                'total_games': row['games'],
+                'total_wins': row['wins'],
+                'win_rate': row['wins'] / row['games'] * 100
+            }
+            for row in top
+        ]
+    
+    # ============ SEASONS ============
+    
+    @metrics.track_db
+    async def get_season(self, number: int) -> Optional[Dict]:
+        """An ended season by its number (see database/seasons.py)"""
+        found = await self._lookup('seasons', 'number', [number])
+        return found[0] if found else None
+    
+    @metrics.track_db
+    async def get_latest_season(self) -> Optional[Dict]:
+        """The most recently ended season, if any has"""
+        result = await self._execute(self._read('seasons').select('*').order('number', desc=True).limit(1))
+        return result.data[0] if result.data else None
+    
+    @metrics.track_db
+    async def get_season_leaderboard(self, season_id: int, limit: int = 10, guild_id: Optional[int] = None) -> List[Dict]:
+        """Top players of an ended season by win rate, from its frozen standings"""
+        result = await self._execute(self._read('season_standings').select('discord_id, username, games, wins')
+                                     .eq('season_id', season_id).eq('guild_id', guild_id or ALL_GUILDS).gt('games', 0))
+        top = heapq.nlargest(limit, result.data, key=lambda row: (row['wins'] / row['games'], row['wins']))
+        return [
+            {
+                'discord_id': row['discord_id'],
+                'username': row['username'] or str(row['discord_id']),
+                'total_games': row['games'],
+                'total_wins': row['wins'],
+                'win_rate': row['wins'] / row['games'] * 100
+            }
+            for row in top
+        ]
     
     # ============ MATCH OPERATIONS ============
     
-    async def create_match(self, series_type: str, team1_players: List[int], team2_players: List[int]) -> Dict:
+    @metrics.track_db
+    async def create_match(self, series_type: str, team1_players: List[int], team2_players: List[int],
+                           guild_id: Optional[int] = None, channel_id: Optional[int] = None) -> Dict:
         """Create a new match series"""
+        # The id is ours so a retried write lands on the same row
         match_data = {
+            'match_id': str(uuid.uuid4()),
+            'guild_id': guild_id,
+            'channel_id': channel_id,
             'series_type': series_type,
             'status': 'ongoing',
             'team1_name': f'Team 1',
             'team2_name': f'Team 2'
         }
         
-        result = self.client.table('matches').insert(match_data).execute()
+        result = await self._write('matches', self.client.table('matches').upsert(match_data))
         match = result.data[0]
         
-        # Create player_match_stats entries
-        for player_id in team1_players:
-            self.client.table('player_match_stats').insert({
-                'discord_id': player_id,
-                'match_id': match['match_id'],
-                'team_number': 1
-            }).execute()
-        
-        for player_id in team2_players:
-            self.client.table('player_match_stats').insert({
-                'discord_id': player_id,
-                'match_id': match['match_id'],
-                'team_number': 2
-            }).execute()
+        # Create player_match_stats entries in a single write
+        entries = [
+            {'discord_id': player_id, 'match_id': match['match_id'], 'team_number': team_number}
+            for team_number, players in ((1, team1_players), (2, team2_players))
+            for player_id in players
+        ]
+        await self._write('player_match_stats', self.client.table('player_match_stats').upsert(
+            entries, on_conflict='match_id,discord_id'
+        ))
         
         return match
     
+    @metrics.track_db
     async def record_game(self, match_id: str, game_number: int, team1_players: List[int], 
                          team2_players: List[int], winner: int) -> Dict:
-        """Record a single game in a series"""
+        """Record a single game in a series (recording a game number again replaces it)"""
         game_data = {
             'match_id': match_id,
             'game_number': game_number,
@@ -102,22 +390,52 @@ class SupabaseDB:
             'winner': winner
         }
         
-        result = self.client.table('games').insert(game_data).execute()
+        result = await self._write('games', self.client.table('games').upsert(game_data, on_conflict='match_id,game_number'))
         return result.data[0]
     
+    @metrics.track_db
+    async def record_games(self, match_id: str, team1_players: List[int], team2_players: List[int],
+                           winners: List[int]) -> List[Dict]:
+        """Record a whole series of games (winners in game order) in one write"""
+        if not winners:
+            return []
+        
+        games_data = [
+            {
+                'match_id': match_id,
+                'game_number': game_number,
+                'team1_players': team1_players,
+                'team2_players': team2_players,
+                'winner': winner
+            }
+            for game_number, winner in enumerate(winners, 1)
+        ]
+        
+        result = await self._write('games', self.client.table('games').upsert(games_data, on_conflict='match_id,game_number'))
+        return result.data
+    
+    @metrics.track_db
     async def get_match(self, match_id: str) -> Optional[Dict]:
         """Get match details"""
-        result = self.client.table('matches').select('*').eq('match_id', match_id).execute()
-        return result.data[0] if result.data else None
+        found = await self._lookup('matches', 'match_id', [match_id])
+        return found[0] if found else None
     
+    @metrics.track_db
+    async def get_archived_match(self, match_id: str) -> Optional[Dict]:
+        """A match moved to matches_archive when its season ended"""
+        found = await self._lookup('matches_archive', 'match_id', [match_id])
+        return found[0] if found else None
+    
+    @metrics.track_db
     async def get_match_games(self, match_id: str) -> List[Dict]:
         """Get all games in a match"""
-        result = self.client.table('games').select('*').eq('match_id', match_id).order('game_number').execute()
+        result = await self._execute(self._read('games').select('*').eq('match_id', match_id).order('game_number'))
         return result.data
     
+    @metrics.track_db
     async def get_match_players(self, match_id: str) -> Dict[int, List[int]]:
         """Get players grouped by team for a match"""
-        result = self.client.table('player_match_stats').select('*').eq('match_id', match_id).execute()
+        result = await self._execute(self._read('player_match_stats').select('*').eq('match_id', match_id))
         
         teams = {1: [], 2: []}
         for stat in result.data:
@@ -125,39 +443,273 @@ class SupabaseDB:
         
         return teams
     
-    async def complete_match(self, match_id: str, winner_team: int):
-        """Mark match as completed and update player stats"""
-        # Update match status
-        self.client.table('matches').update({
+    @metrics.track_db
+    async def complete_match(self, match_id: str, winner_team: int, series_type: str, guild_id: Optional[int] = None,
+                             teams: Optional[Dict[int, List[int]]] = None):
+        """Settle a decided series and mark it completed
+        
+        Every step is safe to repeat and the status changes last, so if this
+        fails part way the match stays ongoing and recording the deciding game
+        again finishes the job without counting anything twice. Callers that
+        hold the roster pass it as teams to save reading it back.
+        """
+        if teams is None:
+            # Get all players in the match (from the backend: settlement works from its rows)
+            result = await self._execute(self.client.table('player_match_stats').select('*').eq('match_id', match_id))
+            teams = {1: [], 2: []}
+            for stat in result.data:
+                teams[stat['team_number']].append(stat['discord_id'])
+        if not teams[1] and not teams[2]:
+            return
+        
+        # Set player_match_stats results per team rather than per row
+        loser_team = 2 if winner_team == 1 else 1
+        await self._write('player_match_stats', self.client.table('player_match_stats').update({'result': 'win'})
+                            .eq('match_id', match_id).eq('team_number', winner_team))
+        await self._write('player_match_stats', self.client.table('player_match_stats').update({'result': 'loss'})
+                            .eq('match_id', match_id).eq('team_number', loser_team))
+        
+        await self._settle([
+            (match_id, discord_id, series_type, team_number == winner_team)
+            for team_number in (1, 2)
+            for discord_id in teams[team_number]
+        ], guild_id)
+        
+        await self._write('matches', self.client.table('matches').update({
             'status': 'completed',
             'winner_team': winner_team,
             'completed_at': datetime.now().isoformat()
-        }).eq('match_id', match_id).execute()
+        }).eq('match_id', match_id))
+    
+    async def _settle(self, results: List[Tuple[str, int, str, bool]], guild_id: Optional[int] = None):
+        """Apply settled series results (match_id, discord_id, series_type, won), oldest first
         
-        # Get all players in the match
-        result = self.client.table('player_match_stats').select('*').eq('match_id', match_id).execute()
+        Appends one match_settled event per match to the log, then updates user
+        totals and the per-series aggregates with one read and one write each,
+        however many players or results are involved. Series played in a guild
+        also count towards the players' aggregates for that guild.
         
-        # Update each player's stats
-        for stat in result.data:
-            won = stat['team_number'] == winner_team
+        Safe to repeat: events are keyed by settlement_key, and users and
+        aggregate rows record the last event applied to them (last_event_id),
+        so a retried or resumed settlement applies each result exactly once.
+        """
+        if not results:
+            return
+        
+        async with self.settlement_lock:
+            events: Dict[str, Dict] = {}
+            for match_id, discord_id, series_type, won in results:
+                event = events.setdefault(match_id, {
+                    'event_type': 'match_settled',
+                    'match_id': match_id,
+                    'payload': {'series_type': series_type, 'results': []}
+                })
+                if guild_id:
+                    event['payload']['guild_id'] = guild_id
+                event['payload']['results'].append([discord_id, won])
+            for match_id, event in events.items():
+                event['request_key'] = settlement_key(match_id, [discord_id for discord_id, _ in event['payload']['results']])
+            
+            logged = await self._write('match_events', self.client.table('match_events').upsert(
+                list(events.values()), on_conflict='request_key', ignore_duplicates=True
+            ))
+            event_ids = {event['match_id']: event['id'] for event in logged.data}
+            if len(event_ids) < len(events):
+                # Logged by an earlier attempt; whatever it didn't get to is applied below
+                keys = [event['request_key'] for match_id, event in events.items() if match_id not in event_ids]
+                earlier = await self._execute(self.client.table('match_events').select('id, match_id').in_('request_key', keys))
+                event_ids.update({event['match_id']: event['id'] for event in earlier.data})
             
-            # Update player_match_stats result
-            self.client.table('player_match_stats').update({
-                'result': 'win' if won else 'loss'
-            }).eq('id', stat['id']).execute()
+            # Read-modify-write, so these come from the backend rather than the replica
+            player_ids = list({discord_id for _, discord_id, _, _ in results})
+            users = await self._execute(self.client.table('users').select('*').in_('discord_id', player_ids))
+            aggregates = await self._execute(self.client.table('user_series_stats').select('*').in_('discord_id', player_ids))
             
-            # Update user stats
-            await self.update_user_stats(stat['discord_id'], won)
+            users_by_id = {user['discord_id']: user for user in users.data}
+            aggregates_by_key = {(row['discord_id'], row['series_type'], row['guild_id']): row for row in aggregates.data}
+            
+            changed = set()
+            for match_id, discord_id, series_type, won in results:
+                user = users_by_id.get(discord_id)
+                if user is None:
+                    continue
+                event_id = event_ids[match_id]
+                if user.get('last_event_id', 0) < event_id:
+                    user['total_games'] += 1
+                    user['total_wins'] += 1 if won else 0
+                    user['last_event_id'] = event_id
+                    changed.add(discord_id)
+                
+                for key in aggregate_keys(discord_id, series_type, guild_id):
+                    if key not in aggregates_by_key:
+                        aggregates_by_key[key] = empty_aggregate(*key)
+                    aggregate = aggregates_by_key[key]
+                    if aggregate['last_event_id'] < event_id:
+                        apply_result(aggregate, won)
+                        aggregate['last_event_id'] = event_id
+                        changed.add(discord_id)
+            
+            if changed:
+                await self._write('users', self.client.table('users').upsert([users_by_id[i] for i in changed]))
+                await self._write('user_series_stats', self.client.table('user_series_stats').upsert(
+                    [row for key, row in aggregates_by_key.items() if key[0] in changed],
+                    on_conflict='discord_id,series_type,guild_id'
+                ))
+    
+    @metrics.track_db
+    async def settle(self, results: List[Tuple[str, int, str, bool]], guild_id: Optional[int] = None):
+        """Apply many settled results (e.g. after a bulk import), a chunk of players at a time"""
+        player_ids = list(dict.fromkeys(discord_id for _, discord_id, _, _ in results))
+        for start in range(0, len(player_ids), SETTLE_CHUNK):
+            # Keep the caller's order within a chunk so each player's results replay chronologically
+            chunk = set(player_ids[start:start + SETTLE_CHUNK])
+            await self._settle([result for result in results if result[1] in chunk], guild_id)
     
-    async def get_recent_matches(self, limit: int = 10) -> List[Dict]:
-        """Get recent matches"""
-        result = self.client.table('matches').select('*').order('created_at', desc=True).limit(limit).execute()
+    @metrics.track_db
+    async def import_matches(self, matches: List[Dict], guild_id: Optional[int] = None) -> List[Dict]:
+        """Insert a batch of parsed past series (see database.importer) as completed matches
+        
+        One write per table however large the batch, each safe to retry; user
+        totals are left to settle(). Matches that carry a match_id and were
+        imported before (and maybe voided since) are left as they are.
+        """
+        if not matches:
+            return []
+        
+        players: Dict[int, str] = {}
+        for match in matches:
+            players.update(match['team1'])
+            players.update(match['team2'])
+        await self._write('users', self.client.table('users').upsert([
+            {'discord_id': discord_id, 'username': username, 'total_games': 0, 'total_wins': 0}
+            for discord_id, username in players.items()
+        ], on_conflict='discord_id', ignore_duplicates=True))
+        
+        match_rows, stat_rows, game_rows = [], [], []
+        now = datetime.now().isoformat()
+        for match in matches:
+            match_id = match.get('match_id') or str(uuid.uuid4())
+            played_at = match['played_at'] or now
+            match_rows.append({
+                'match_id': match_id,
+                'guild_id': guild_id,
+                'series_type': match['series_type'],
+                'status': 'completed',
+                'team1_name': 'Team 1',
+                'team2_name': 'Team 2',
+                'winner_team': match['winner_team'],
+                'created_at': played_at,
+                'completed_at': played_at
+            })
+            stat_rows.extend(
+                {
+                    'discord_id': discord_id,
+                    'match_id': match_id,
+                    'team_number': team_number,
+                    'result': 'win' if team_number == match['winner_team'] else 'loss'
+                }
+                for team_number in (1, 2)
+                for discord_id in match[f'team{team_number}']
+            )
+            game_rows.extend(
+                {
+                    'match_id': match_id,
+                    'game_number': game_number,
+                    'team1_players': list(match['team1']),
+                    'team2_players': list(match['team2']),
+                    'winner': winner
+                }
+                for game_number, winner in enumerate(match['winners'], 1)
+            )
+        
+        await self._write('matches', self.client.table('matches').upsert(match_rows, on_conflict='match_id', ignore_duplicates=True))
+        await self._write('player_match_stats', self.client.table('player_match_stats').upsert(stat_rows, on_conflict='match_id,discord_id'))
+        await self._write('games', self.client.table('games').upsert(game_rows, on_conflict='match_id,game_number'))
+        return match_rows
+    
+    @metrics.track_db
+    async def get_existing_match_ids(self, match_ids: List[str]) -> Set[str]:
+        """Which of these matches are already in the matches table"""
+        found = set()
+        for start in range(0, len(match_ids), MATCH_CHUNK):
+            found.update(row['match_id'] for row in await self._lookup('matches', 'match_id', match_ids[start:start + MATCH_CHUNK]))
+        return found
+    
+    @metrics.track_db
+    async def get_latest_results(self, player_ids: List[int]) -> Dict[int, str]:
+        """When each player's latest settled series was played (its completed_at)
+        
+        Follows users.last_event_id to its event and match, so it costs the same
+        however long a player's history is. Players with nothing settled are
+        left out.
+        """
+        latest = {}
+        for start in range(0, len(player_ids), MATCH_CHUNK):
+            chunk = player_ids[start:start + MATCH_CHUNK]
+            # Settlement moves last_event_id, so this comes from the backend rather than the replica
+            users = await self._execute(self.client.table('users').select('discord_id, last_event_id')
+                                        .in_('discord_id', chunk).gt('last_event_id', 0))
+            if not users.data:
+                continue
+            events = await self._execute(self.client.table('match_events').select('id, match_id')
+                                         .in_('id', list({user['last_event_id'] for user in users.data})))
+            match_ids = list({event['match_id'] for event in events.data})
+            matches = await self._lookup('matches', 'match_id', match_ids)
+            missing = set(match_ids) - {match['match_id'] for match in matches}
+            if missing:
+                matches += await self._lookup('matches_archive', 'match_id', list(missing))
+            
+            match_of = {event['id']: event['match_id'] for event in events.data}
+            completed = {match['match_id']: match.get('completed_at') or match.get('created_at') for match in matches}
+            for user in users.data:
+                played_at = completed.get(match_of.get(user['last_event_id']))
+                if played_at:
+                    latest[user['discord_id']] = played_at
+        return latest
+    
+    @metrics.track_db
+    async def get_user_series_stats(self, discord_id: int, guild_id: int = ALL_GUILDS) -> Dict[str, Dict]:
+        """Career aggregates for a user keyed by series type (including 'ALL'), everywhere or in one guild"""
+        result = await self._execute(self._read('user_series_stats').select('*').eq('discord_id', discord_id).eq('guild_id', guild_id))
+        return {row['series_type']: row for row in result.data}
+    
+    @metrics.track_db
+    async def get_recent_matches(self, limit: int = 10, guild_id: Optional[int] = None) -> List[Dict]:
+        """Get recent matches, across every guild or within one"""
+        query = self._read('matches').select('*')
+        if guild_id:
+            query = query.eq('guild_id', guild_id)
+        result = await self._execute(query.order('created_at', desc=True).limit(limit))
         return result.data
     
+    @metrics.track_db
+    async def get_ongoing_matches(self) -> List[Dict]:
+        """Every match still being played, in every guild"""
+        matches = []
+        async for page in self.iter_table('matches', 'match_id', status='ongoing'):
+            matches.extend(page)
+        return matches
+    
+    @metrics.track_db
+    async def get_series_progress(self, match_ids: List[str]) -> Tuple[Dict[str, Dict[int, List[int]]], Dict[str, List[Dict]]]:
+        """Rosters (match_id -> team -> players) and games of several matches, a chunk of matches at a time"""
+        rosters: Dict[str, Dict[int, List[int]]] = {match_id: {1: [], 2: []} for match_id in match_ids}
+        games: Dict[str, List[Dict]] = {match_id: [] for match_id in match_ids}
+        for start in range(0, len(match_ids), MATCH_CHUNK):
+            chunk = match_ids[start:start + MATCH_CHUNK]
+            stats = await self._execute(self._read('player_match_stats').select('match_id, discord_id, team_number').in_('match_id', chunk))
+            for stat in stats.data:
+                rosters[stat['match_id']][stat['team_number']].append(stat['discord_id'])
+            result = await self._execute(self._read('games').select('*').in_('match_id', chunk).order('game_number'))
+            for game in result.data:
+                games[game['match_id']].append(game)
+        return rosters, games
+    
+    @metrics.track_db
     async def get_user_match_history(self, discord_id: int, limit: int = 10) -> List[Dict]:
         """Get match history for a specific user"""
         # Get matches user participated in
-        stats_result = self.client.table('player_match_stats').select('match_id, team_number, result').eq('discord_id', discord_id).execute()
+        stats_result = await self._execute(self._read('player_match_stats').select('match_id, team_number, result').eq('discord_id', discord_id))
         
         if not stats_result.data:
             return []
@@ -165,15 +717,17 @@ class SupabaseDB:
         match_ids = [stat['match_id'] for stat in stats_result.data]
         
         # Get match details
-        matches_result = self.client.table('matches').select('*').in_('match_id', match_ids).order('created_at', desc=True).limit(limit).execute()
+        matches_result = await self._execute(self._read('matches').select('*').in_('match_id', match_ids).order('created_at', desc=True).limit(limit))
         
         # Add user's team and result to each match
+        stats_by_match = {stat['match_id']: stat for stat in stats_result.data}
         matches = matches_result.data
         for match in matches:
-            user_stat = next((s for s in stats_result.data if s['match_id'] == match['match_id']), None)
+            user_stat = stats_by_match.get(match['match_id'])
             if user_stat:
                 match['user_team'] = user_stat['team_number']
-                match['user_result'] = user_stat['result']
+                # Voiding leaves player results alone; the match status overrides them
+                match['user_result'] = 'voided' if match['status'] == 'voided' else user_stat['result']
         
         return matches
 
@@ -0,0 +1,69 @@
+"""
+Run the bot as several processes ("clusters"), each owning a slice of the shards.
+
+    CLUSTERS=4 SHARD_COUNT=16 python launcher.py
+
+SHARD_COUNT defaults to Discord's recommended count for the token. Each cluster
+runs bot.py with SHARD_IDS/SHARD_COUNT set, and gets its own METRICS_PORT
+(METRICS_PORT + cluster index) when metrics are enabled. Crashed clusters are
+restarted with exponential backoff.
+"""
+import asyncio
+import os
+import sys
+from typing import Dict, List
+import discord
+from dotenv import load_dotenv
+
+load_dotenv()
+
+async def recommended_shard_count(token: str) -> int:
+    client = discord.Client(intents=discord.Intents.none())
+    try:
+        await client.login(token)
+        shards, _, _ = await client.http.get_bot_gateway()
+        return shards
+    finally:
+        await client.close()
+
+def split_shards(shard_count: int, clusters: int) -> List[List[int]]:
+    """Round-robin shards over clusters so guild load spreads evenly"""
+    clusters = max(1, min(clusters, shard_count))
+    return [list(range(i, shard_count, clusters)) for i in range(clusters)]
+
+async def run_cluster(index: int, shard_ids: List[int], shard_count: int):
+    env = dict(os.environ)
+    env.pop('SHARDING', None)
+    env['SHARD_COUNT'] = str(shard_count)
+    env['SHARD_IDS'] = ','.join(str(i) for i in shard_ids)
+    env['CLUSTER_ID'] = str(index)
+    if os.getenv('METRICS_PORT'):
+        env['METRICS_PORT'] = str(int(os.environ['METRICS_PORT']) + index)
+    
+    backoff = 1
+    while True:
+        print(f"[launcher] Starting cluster {index} with shards {shard_ids}")
+        process = await asyncio.create_subprocess_exec(sys.executable, 'bot.py', env=env)
+        code = await process.wait()
+        if code == 0:
+            print(f"[launcher] Cluster {index} exited cleanly")
+            return
+        
+        print(f"[launcher] Cluster {index} exited with code {code}, restarting in {backoff}s")
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, 60)
+
+async def main():
+    token = os.getenv('DISCORD_TOKEN')
+    if not token:
+        print("Error: DISCORD_TOKEN not found in .env file")
+        return
+    
+    shard_count = int(os.getenv('SHARD_COUNT') or await recommended_shard_count(token))
+    clusters: Dict[int, List[int]] = dict(enumerate(split_shards(shard_count, int(os.getenv('CLUSTERS', '2')))))
+    print(f"[launcher] {shard_count} shard(s) across {len(clusters)} cluster(s)")
+    
+    await asyncio.gather(*(run_cluster(index, shard_ids, shard_count) for index, shard_ids in clusters.items()))
+
+if __name__ == '__main__':
+    asyncio.run(main())
\ No newline at end of file
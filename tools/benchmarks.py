@@ -0,0 +1,218 @@
+"""
+Microbenchmarks for team generation and the database layer's hot paths.
+
+Each benchmark reports the median per-call time over --repeats timed runs, and
+how widely those runs spread (interquartile range over the median). A fixed
+pure-Python calibration loop is timed alongside, and the baseline
+(tools/benchmarks_baseline.json) is scaled by how fast the machine runs it now
+compared to when the baseline was saved. A benchmark fails when it got slower
+than --threshold, or than NOISE_FACTOR times the spread of both runs if that is
+larger. Refresh the baseline with --save after a deliberate change.
+
+The database benchmarks run against an in-memory backend seeded with
+--matches series, so they time the layer's own work rather than the network.
+
+Usage: python -m tools.benchmarks [--save] [--threshold 0.25] [--repeats 7] [--only leaderboard] [--matches 1000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import timeit
+from typing import Callable, Dict, List, Optional, Tuple
+
+from database.memory_client import MemoryClient
+from database.supabase_client import db
+from cogs.profile_commands import ProfileCommands
+from utils.match_index import MatchIndex
+from utils.rps import RPSGame
+from utils.team_generator import TeamGenerator
+from tools.fakes import FakeBot, FakeInteraction, FakeUser
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'benchmarks_baseline.json')
+REPEATS = 7
+# Slowdowns within this many times the runs' combined spread are treated as noise
+NOISE_FACTOR = 3
+# The player in every seeded series, so their history is the longest
+REGULAR = 1
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def seed(matches: int):
+    """Fill a fresh in-memory backend with settled series"""
+    db.use_client(MemoryClient())
+    rng = random.Random(0)
+    pool = list(range(2, 2002))
+    rows = []
+    for _ in range(matches):
+        roster = [REGULAR] + rng.sample(pool, 9)
+        rows.append({
+            'series_type': 'BO3',
+            'winner_team': rng.randint(1, 2),
+            'team1': {player: f"player{player}" for player in roster[:5]},
+            'team2': {player: f"player{player}" for player in roster[5:]},
+            'winners': [1, 1],
+            'played_at': None
+        })
+    
+    imported = await db.import_matches(rows)
+    await db.settle([
+        (match['match_id'], player, row['series_type'], team == row['winner_team'])
+        for match, row in zip(imported, rows)
+        for team in (1, 2)
+        for player in row[f'team{team}']
+    ])
+    await db.load_ranks()
+
+def benchmarks(loop: asyncio.AbstractEventLoop) -> Dict[str, Callable[[], object]]:
+    players = list(range(10))
+    roles = {role: [n * 2, n * 2 + 1] for n, role in enumerate(['top', 'jungle', 'mid', 'adc', 'support'])}
+    captain1, captain2 = FakeUser(1), FakeUser(2)
+    
+    def rps_round():
+        game = RPSGame(captain1, captain2)
+        game.make_choice(captain1, 'rock')
+        game.make_choice(captain2, 'scissors')
+        game.determine_winner()
+        return game.get_result_text()
+    
+    bot = FakeBot()
+    profile_cog = ProfileCommands(bot)
+    viewer = FakeUser(REGULAR)
+    
+    # Every seeded match in one guild's index: the most an empty autocomplete prefix can walk
+    index = MatchIndex(recent_per_guild=len(db.client.tables['matches']))
+    index.load(db.client.tables['matches'].values())
+    
+    def render(command, **kwargs):
+        interaction = FakeInteraction(viewer, client=bot)
+        loop.run_until_complete(command.callback(profile_cog, interaction, **kwargs))
+        return interaction.sent[-1].embeds[0].to_dict()
+    
+    return {
+        'team_random': lambda: TeamGenerator.random_teams(players),
+        'team_roles': lambda: TeamGenerator.role_based_teams(roles),
+        'draft_order': lambda: TeamGenerator.captain_draft_order(8, 1),
+        'rps_round': rps_round,
+        'leaderboard': lambda: loop.run_until_complete(db.get_leaderboard(25)),
+        'rank_lookup': lambda: db.ranks.standing(REGULAR),
+        'match_autocomplete': lambda: index.suggest(None, ''),
+        'match_history': lambda: loop.run_until_complete(db.get_user_match_history(REGULAR, 20)),
+        'embed_leaderboard': lambda: render(profile_cog.leaderboard, limit=25),
+        'embed_my_matches': lambda: render(profile_cog.my_matches, limit=20),
+        'embed_stats': lambda: render(profile_cog.stats, user=None),
+    }
+
+def calibration():
+    """Fixed interpreter-bound work, timed to tell a slower machine from slower code"""
+    total = 0
+    for i in range(10_000):
+        total += i * i % 7
+    return total
+
+def measure(func: Callable[[], object], repeats: int = REPEATS) -> Tuple[float, float]:
+    """Median seconds per call over repeats runs, and their spread relative to it"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    times = [total / number for total in timer.repeat(repeats, number)]
+    median = statistics.median(times)
+    quartiles = statistics.quantiles(times, n=4)
+    return median, (quartiles[2] - quartiles[0]) / median
+
+def format_seconds(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.2f}µs"
+    return f"{seconds * 1e3:.2f}ms"
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--save', action='store_true', help="store these results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.25, help="allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument('--repeats', type=int, default=REPEATS, help="timed runs per benchmark (at least 2)")
+    parser.add_argument('--only', action='append', help="run just this benchmark (repeatable)")
+    parser.add_argument('--matches', type=int, default=1000, help="series to seed the backend with")
+    args = parser.parse_args()
+    repeats = max(args.repeats, 2)
+    
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(seed(args.matches))
+    
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+    previous = baseline.get('results', {})
+    previous_spread = baseline.get('spread', {})
+    
+    calibrated, _ = measure(calibration, repeats)
+    # Baselines from before calibration are compared as they are
+    speed = calibrated / baseline['calibration'] if baseline.get('calibration') else 1.0
+    
+    results: Dict[str, float] = {}
+    spread: Dict[str, float] = {}
+    regressions: List[str] = []
+    print(f"{'benchmark':<20} {'baseline':>10} {'now':>10} {'change':>8} {'allowed':>8}")
+    for name, func in benchmarks(loop).items():
+        if args.only and name not in args.only:
+            continue
+        results[name], spread[name] = measure(func, repeats)
+        before = previous.get(name)
+        if not before:
+            print(f"{name:<20} {'-':>10} {format_seconds(results[name]):>10}")
+            continue
+        
+        expected = before * speed
+        allowed = max(args.threshold, NOISE_FACTOR * (spread[name] + previous_spread.get(name, 0.0)))
+        if results[name] / expected - 1 > allowed:
+            # Measure again before blaming the code for a noisy neighbour
+            again, again_spread = measure(func, repeats)
+            if again < results[name]:
+                results[name], spread[name] = again, again_spread
+        change = results[name] / expected - 1
+        flag = "  SLOWER" if change > allowed else ""
+        if flag:
+            regressions.append(f"{name}: {format_seconds(expected)} -> {format_seconds(results[name])} "
+                               f"({change:+.0%}, allowed {allowed:+.0%})")
+        print(f"{name:<20} {format_seconds(expected):>10} {format_seconds(results[name]):>10} {change:>+8.0%} "
+              f"{allowed:>+8.0%}{flag}")
+    loop.close()
+    
+    if baseline:
+        print(f"\nBaseline from {baseline.get('commit') or 'an unknown commit'} "
+              f"(Python {baseline.get('python')}, {baseline.get('matches')} seeded series), "
+              f"scaled by this machine's calibration time ({speed:.2f}x the baseline's)")
+    
+    if args.save:
+        baseline = {
+            'commit': _commit(),
+            'python': platform.python_version(),
+            'matches': args.matches,
+            'calibration': calibrated,
+            'results': {**previous, **results},
+            'spread': {**previous_spread, **spread}
+        }
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Saved baseline to {BASELINE_PATH}")
+        return 0
+    
+    if regressions:
+        print("\nSlower than the baseline:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
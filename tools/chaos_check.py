@@ -0,0 +1,183 @@
+"""
+Drive the database layer against a fault-injecting backend and check it holds up.
+
+- settlement: series are recorded and settled while requests fail and responses
+  get lost; every player's totals must still count each series exactly once
+- hedging: a few reads stall; hedged duplicates must keep the tail short
+- breaker: during an outage requests must fail fast, and recover afterwards
+
+Usage: python -m tools.chaos_check [--seed 7] [--series 40]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+from database.memory_client import FaultyClient
+from database.rebuild import rebuild
+from database.supabase_client import SupabaseDB, db
+from utils.resilience import CircuitBreaker, CircuitOpen, LatencyWindow, RetryPolicy
+
+# Times a "user" re-runs a command that failed before giving up
+COMMAND_ATTEMPTS = 10
+
+async def persist(step, *args):
+    """Re-run a step until it succeeds, as a user re-running a failed command would"""
+    for attempt in range(COMMAND_ATTEMPTS):
+        try:
+            return await step(*args)
+        except (ConnectionError, TimeoutError, CircuitOpen):
+            if attempt == COMMAND_ATTEMPTS - 1:
+                raise
+
+async def check_settlement(seed: int, series: int) -> List[str]:
+    client = FaultyClient(failure_rate=0.15, lost_response_rate=0.1, seed=seed)
+    db.use_client(client)
+    # Few retries, so whole commands get re-run part way through too
+    db.retry = RetryPolicy(attempts=2, base=0.001, cap=0.01)
+    db.breaker = CircuitBreaker(threshold=50)
+    rng = random.Random(seed)
+    
+    players = list(range(1, 13))
+    expected: Dict[int, List[int]] = {player: [0, 0] for player in players}
+    recorded: Dict[str, int] = {}
+    for _ in range(series):
+        roster = rng.sample(players, 6)
+        team1, team2 = roster[:3], roster[3:]
+        winners = rng.choice([[1, 1], [2, 2], [1, 2, 1], [2, 1, 2]])
+        winner_team = winners[-1]
+        
+        await persist(db.ensure_users, {player: f"player{player}" for player in roster})
+        match = await persist(db.create_match, 'BO3', team1, team2)
+        for game_number, winner in enumerate(winners, 1):
+            await persist(db.record_game, match['match_id'], game_number, team1, team2, winner)
+        await persist(db.complete_match, match['match_id'], winner_team, 'BO3')
+        recorded[match['match_id']] = len(winners)
+        
+        for team_number, team in ((1, team1), (2, team2)):
+            for player in team:
+                expected[player][0] += 1
+                expected[player][1] += team_number == winner_team
+    
+    faults = dict(client.faults)
+    client.failure_rate = client.lost_response_rate = 0.0
+    problems = []
+    
+    users = {row['discord_id']: row for row in client.tables['users'].values()}
+    for player, (games, wins) in expected.items():
+        actual = (users[player]['total_games'], users[player]['total_wins'])
+        if actual != (games, wins):
+            problems.append(f"player {player}: {actual[0]} games / {actual[1]} wins, expected {games} / {wins}")
+    
+    games_per_match: Dict[str, int] = {}
+    for game in client.tables.get('games', {}).values():
+        games_per_match[game['match_id']] = games_per_match.get(game['match_id'], 0) + 1
+    duplicated = [match_id for match_id, count in recorded.items() if games_per_match.get(match_id) != count]
+    if duplicated:
+        problems.append(f"{len(duplicated)} matches with missing or duplicate games")
+    
+    settled: Dict[str, int] = {}
+    for event in client.tables.get('match_events', {}).values():
+        settled[event['match_id']] = settled.get(event['match_id'], 0) + 1
+    if any(settled.get(match_id) != 1 for match_id in recorded):
+        problems.append("a series was logged more or less than once")
+    
+    # The projections must match a replay of the log
+    report = await rebuild(from_scratch=True, snapshot=False)
+    if report['users_updated']:
+        problems.append(f"rebuild changed {report['users_updated']} users")
+    
+    print(f"settlement: {series} series, {faults['failed']} failed requests, {faults['lost']} lost responses "
+          f"-> {'ok' if not problems else 'INCONSISTENT'}")
+    return problems
+
+async def timed_reads(target: SupabaseDB, reads: int) -> List[float]:
+    timings = []
+    for _ in range(reads):
+        started = time.perf_counter()
+        await target.get_user_stats(1)
+        timings.append(time.perf_counter() - started)
+    return sorted(timings)
+
+async def check_hedging(seed: int) -> List[str]:
+    client = FaultyClient(latency=0.002, slow_rate=0.03, slow_seconds=0.3, seed=seed)
+    target = SupabaseDB(client)
+    await target.ensure_users({1: "player1"})
+    
+    # A threshold nothing reaches turns hedging off
+    target.latency = LatencyWindow(floor=10.0, default=10.0)
+    plain = await timed_reads(target, 1000)
+    target.latency = LatencyWindow()
+    hedged = await timed_reads(target, 1000)
+    
+    def summary(timings: List[float]) -> str:
+        stalled = sum(1 for seconds in timings if seconds >= client.slow_seconds)
+        return (f"p50 {statistics.median(timings) * 1000:.0f}ms, p99 {timings[int(len(timings) * 0.99) - 1] * 1000:.0f}ms, "
+                f"{stalled} waited out a stall")
+    
+    print(f"hedging: without {summary(plain)}; with {summary(hedged)}")
+    # Only reads whose hedge stalled as well should still wait
+    stalled_plain = sum(1 for seconds in plain if seconds >= client.slow_seconds)
+    stalled_hedged = sum(1 for seconds in hedged if seconds >= client.slow_seconds)
+    if stalled_hedged * 4 > stalled_plain:
+        return [f"{stalled_hedged} hedged reads still waited out a stall ({stalled_plain} without hedging)"]
+    return []
+
+async def check_breaker() -> List[str]:
+    client = FaultyClient()
+    target = SupabaseDB(client)
+    target.retry = RetryPolicy(attempts=2, base=0.001, cap=0.01)
+    target.breaker = CircuitBreaker(threshold=3, reset_after=0.2)
+    await target.ensure_users({1: "player1"})
+    problems = []
+    
+    client.down = True
+    rejected_in = None
+    for _ in range(5):
+        started = time.perf_counter()
+        try:
+            await target.get_user_stats(1)
+        except CircuitOpen:
+            rejected_in = time.perf_counter() - started
+            break
+        except ConnectionError:
+            continue
+    if rejected_in is None:
+        problems.append("circuit never opened during the outage")
+    
+    client.down = False
+    await asyncio.sleep(target.breaker.reset_after)
+    if await target.get_user_stats(1) is None or target.breaker.state != 'closed':
+        problems.append("circuit didn't close once the backend was back")
+    
+    if rejected_in is not None:
+        print(f"breaker: opened after {target.breaker.threshold} failures, rejected in {rejected_in * 1000:.2f}ms, "
+              f"{'recovered' if not problems else 'DID NOT RECOVER'}")
+    return problems
+
+async def run(args) -> List[str]:
+    problems = await check_settlement(args.seed, args.series)
+    problems += await check_hedging(args.seed)
+    problems += await check_breaker()
+    return problems
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--series', type=int, default=40, help="series to settle under faults")
+    args = parser.parse_args()
+    
+    problems = asyncio.run(run(args))
+    if problems:
+        print("\nProblems:")
+        for problem in problems:
+            print(f"  - {problem}")
+        return 1
+    print("\nDatabase layer survived the injected faults")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,149 @@
+"""
+Check that the local read replica stays identical to the backend.
+
+Runs against an in-memory backend standing in for Supabase. The bot's own writes
+have to reach the replica by write-through; writes from a second SupabaseDB
+(another process, a tool) have to arrive through the match_events feed, even
+when events commit out of id order. After each step every replicated table is
+compared row for row.
+
+Usage: python -m tools.check_replica
+"""
+import asyncio
+import sys
+from typing import List
+
+from database.memory_client import MemoryClient
+from database.rebuild import void_match
+from database.replica import REPLICATED_TABLES, LocalReplica
+from database.supabase_client import SupabaseDB, db
+from utils.metrics import metrics
+
+def differences(backend: MemoryClient, replica: LocalReplica) -> List[str]:
+    """Tables where the replica's rows don't match the backend's"""
+    problems = []
+    for table in REPLICATED_TABLES:
+        expected = backend.tables.get(table, {})
+        actual = replica.store.tables.get(table, {})
+        if expected != actual:
+            missing = len(expected.keys() - actual.keys())
+            changed = sum(1 for key in expected.keys() & actual.keys() if expected[key] != actual[key])
+            problems.append(f"{table}: {missing} missing, {changed} different, {len(actual.keys() - expected.keys())} extra")
+    return problems
+
+def imported(first_player: int, count: int) -> List[dict]:
+    return [
+        {
+            'series_type': 'BO3',
+            'winner_team': 1 + n % 2,
+            'team1': {first_player + n + i: f"player{first_player + n + i}" for i in range(3)},
+            'team2': {first_player + n + i + 3: f"player{first_player + n + i + 3}" for i in range(3)},
+            'winners': [1, 2, 1] if n % 2 == 0 else [2, 2],
+            'played_at': None
+        }
+        for n in range(count)
+    ]
+
+async def settle_imported(target: SupabaseDB, rows: List[dict], matches: List[dict]):
+    await target.settle([
+        (row['match_id'], discord_id, row['series_type'], team == row['winner_team'])
+        for row, match in zip(rows, matches)
+        for team in (1, 2)
+        for discord_id in match[f'team{team}']
+    ])
+
+async def run() -> List[str]:
+    backend = MemoryClient()
+    db.use_client(backend)
+    other = SupabaseDB(backend)
+    failures = []
+    
+    def check(step: str):
+        problems = differences(backend, db.replica)
+        print(f"{step:<44} {'ok' if not problems else 'MISMATCH'}")
+        failures.extend(f"{step}: {problem}" for problem in problems)
+    
+    # History from before the bot started
+    matches = imported(1000, 20)
+    await settle_imported(db, await db.import_matches(matches), matches)
+    
+    db.replica = LocalReplica(db)
+    await db.replica.load()
+    check("load")
+    
+    # The bot's own writes: ongoing series, recorded and settled
+    await db.ensure_users({1: "captain", 2: "second", 1000: "player1000"})
+    match = await db.create_match('BO3', [1, 1000], [2, 1001])
+    await db.record_games(match['match_id'], [1, 1000], [2, 1001], [1, 1])
+    await db.complete_match(match['match_id'], 1, 'BO3')
+    check("write-through")
+    
+    # Reads are served locally: no round trips
+    before = metrics.counter_value('bot_db_round_trips_total', {'command': 'background', 'method': 'get_user_stats'})
+    await db.get_user_stats(1)
+    await db.get_user_series_stats(1)
+    await db.get_leaderboard()
+    after = metrics.counter_value('bot_db_round_trips_total', {'command': 'background', 'method': 'get_user_stats'})
+    if after != before or sum(metrics.counters('bot_replica_reads_total').values()) < 3:
+        failures.append("reads: replica reads went to the backend")
+    print(f"{'local reads':<44} {'ok' if after == before else 'WENT TO BACKEND'}")
+    
+    # Another process imports and settles; the replica only learns from the feed
+    matches = imported(1002, 10)
+    await settle_imported(other, await other.import_matches(matches), matches)
+    if not differences(backend, db.replica):
+        failures.append("feed: replica saw another writer without polling")
+    applied = await db.replica.poll()
+    check(f"feed ({applied} events from another writer)")
+    
+    # A settlement whose event commits after a later one's: the replay window catches it
+    early, late = imported(1020, 1), imported(1030, 1)
+    early_rows = await other.import_matches(early)
+    await settle_imported(other, early_rows, early)
+    hidden = {key: row for key, row in backend.tables['match_events'].items() if row['match_id'] == early_rows[0]['match_id']}
+    for key in hidden:
+        del backend.tables['match_events'][key]
+    await settle_imported(other, await other.import_matches(late), late)
+    await db.replica.poll()
+    backend.tables['match_events'].update(hidden)
+    applied = await db.replica.poll()
+    check(f"event committed out of order ({applied} events)")
+    
+    # Match rows aren't replicated, so another process's new series shows up at once
+    created = await other.create_match('BO3', [3], [4])
+    recent = await db.get_recent_matches(limit=1)
+    print(f"{'match reads go to the backend':<44} {'ok' if recent and recent[0]['match_id'] == created['match_id'] else 'STALE'}")
+    if not recent or recent[0]['match_id'] != created['match_id']:
+        failures.append("matches: a match created elsewhere wasn't read")
+    
+    # Another process creates a user the replica hasn't heard of: point reads fall through
+    await other.get_or_create_user(5000, "newcomer")
+    print(f"{'read miss falls through':<44} {'ok' if await db.get_user_stats(5000) else 'MISSING'}")
+    check("after fall-through")
+    
+    # A void and the rebuild after it, made with the replica detached as if by another process
+    replica, db.replica = db.replica, None
+    await void_match(match['match_id'], "check")
+    db.replica = replica
+    applied = await db.replica.poll()
+    check(f"void elsewhere ({applied} events)")
+    
+    applied = await db.replica.poll()
+    if applied:
+        failures.append(f"feed: {applied} events applied twice")
+    metrics.collect()
+    print(f"Staleness {db.replica.staleness:.3f}s, {len(db.replica._own_events)} own events pending")
+    return failures
+
+def main() -> int:
+    failures = asyncio.run(run())
+    if failures:
+        print("\nReplica out of sync:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print("\nReplica matches the backend")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""
+Drive every database-backed cog command against an in-memory backend and fail
+when a command makes more round trips than its budget.
+
+Budgets are declared on the commands themselves via
+extras={'round_trip_budget': N}; scenarios may tighten them for a specific path.
+
+Usage: python -m tools.check_round_trips
+"""
+import asyncio
+import sys
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from database.memory_client import MemoryClient
+from database.seasons import end_season
+from database.supabase_client import db
+from cogs.analytics_commands import AnalyticsCommands
+from cogs.match_commands import MatchCommands
+from cogs.profile_commands import ProfileCommands
+from utils.match_registry import match_registry
+from utils.metrics import metrics
+from utils.predictor import predictor
+from tools.fakes import FakeAttachment, FakeBot, FakeGuild, FakeInteraction, FakeMessage, FakeUser
+
+class Scenario:
+    def __init__(self, label: str, command, make_interaction: Callable[[], FakeInteraction],
+                 kwargs: Callable[[], Dict], budget: Optional[int] = None,
+                 setup: Optional[Callable[[], Awaitable]] = None):
+        self.label = label
+        self.command = command
+        self.make_interaction = make_interaction
+        self.kwargs = kwargs
+        self.budget = budget if budget is not None else command.extras.get('round_trip_budget')
+        # Runs before the command, outside its round trip count
+        self.setup = setup
+
+async def run_scenarios() -> List[str]:
+    """Run every scenario and return a list of budget violations"""
+    db.use_client(MemoryClient())
+    
+    bot = FakeBot()
+    match_cog = MatchCommands(bot)
+    profile_cog = ProfileCommands(bot)
+    analytics_cog = AnalyticsCommands(bot)
+    
+    players = [FakeUser() for _ in range(10)]
+    guild = FakeGuild(members=players)
+    captain = players[0]
+    state: Dict = {}
+    
+    def plain():
+        return FakeInteraction(captain, guild, client=bot)
+    
+    def with_mentions():
+        return FakeInteraction(captain, guild, message=FakeMessage(mentions=players), client=bot)
+    
+    def cold_predictor():
+        # As after a restart: team strengths have to be read again
+        predictor._strengths.clear()
+        predictor._predictions.clear()
+        return plain()
+    
+    def cold_registry():
+        # As after a restart, before the startup load has registered the match
+        match_registry.remove(state['match_id'])
+        return plain()
+    
+    def latest_match_id():
+        return {'match_id': state['match_id']}
+    
+    importers = [FakeUser() for _ in range(10)]
+    import_kwargs = {f"team{t}_p{i}": importers[(t - 1) * 5 + i - 1] for t in (1, 2) for i in range(1, 6)}
+    
+    bulk_csv = "series_type,winner_team,team1_score,team2_score,team1,team2\n" + "".join(
+        f"BO3,1,2,{game % 2},{' '.join(str(p.id) for p in importers[:5])},{' '.join(str(p.id) for p in importers[5:])}\n"
+        for game in range(3)
+    )
+    
+    scenarios = [
+        Scenario("match_create (new players)", match_cog.match_create, with_mentions,
+                 lambda: {'series_type': 'BO3', 'team1': '', 'team2': ''}),
+        Scenario("match_status", match_cog.match_status, plain, latest_match_id, budget=0),
+        Scenario("match_status (your match)", match_cog.match_status, plain, lambda: {'match_id': None}, budget=0),
+        Scenario("match_status (predictor cold)", match_cog.match_status, cold_predictor, latest_match_id, budget=1),
+        Scenario("match_status (registry cold)", match_cog.match_status, cold_registry, latest_match_id, budget=3),
+        Scenario("match_record (registry cold)", match_cog.match_record, cold_registry,
+                 lambda: {**latest_match_id(), 'game_number': 1, 'winner': 1}, budget=4),
+        Scenario("match_record (series continues)", match_cog.match_record, plain,
+                 lambda: {**latest_match_id(), 'game_number': 2, 'winner': 2}, budget=1),
+        Scenario("match_record (series decided)", match_cog.match_record, plain,
+                 lambda: {**latest_match_id(), 'game_number': 3, 'winner': 1}, budget=9),
+        Scenario("match_history", match_cog.match_history, plain, lambda: {'limit': 5}),
+        Scenario("match_import (new players)", match_cog.match_import, plain,
+                 lambda: {'series_type': 'BO5', 'winner_team': 2, 'team1_score': 2, 'team2_score': 3,
+                          **import_kwargs}),
+        Scenario("match_import_bulk (3 matches)", match_cog.match_import_bulk, plain,
+                 lambda: {'file': FakeAttachment('matches.csv', bulk_csv.encode())}, budget=9),
+        Scenario("profile", profile_cog.profile, plain, lambda: {'user': None}),
+        Scenario("stats", profile_cog.stats, plain, lambda: {'user': None}),
+        Scenario("leaderboard", profile_cog.leaderboard, plain, lambda: {'limit': 10}),
+        Scenario("leaderboard (everywhere)", profile_cog.leaderboard, plain, lambda: {'limit': 10, 'everywhere': True}, budget=1),
+        Scenario("my_matches", profile_cog.my_matches, plain, lambda: {'limit': 10}),
+        Scenario("synergy", analytics_cog.synergy, plain, lambda: {'player': None, 'partner': None}),
+        Scenario("h2h", analytics_cog.h2h, plain, lambda: {'player1': captain, 'player2': importers[0]}),
+        # Last: ending the season archives the matches the scenarios above use
+        Scenario("leaderboard (ended season)", profile_cog.leaderboard, plain, lambda: {'limit': 10, 'season': 1},
+                 setup=lambda: end_season()),
+    ]
+    
+    # Loaded at cog_load in the bot; settlements below keep it current
+    await db.load_ranks()
+    
+    violations = []
+    for scenario in scenarios:
+        if scenario.command.binding is analytics_cog and not analytics_cog._loaded.is_set():
+            # Loaded at cog_load in the bot; built outside any command scope here
+            await analytics_cog.rebuild()
+        
+        if scenario.setup is not None:
+            await scenario.setup()
+        
+        interaction = scenario.make_interaction()
+        cog = scenario.command.binding
+        with metrics.command_scope(scenario.command.qualified_name) as scope:
+            await scenario.command.callback(cog, interaction, **scenario.kwargs())
+        
+        if scenario.command is match_cog.match_create:
+            # Later scenarios operate on the match this one created
+            description = interaction.sent[-1].embeds[0].description
+            state['match_id'] = description.split('`')[1]
+        
+        status = "ok"
+        if scenario.budget is not None and scope.round_trips > scenario.budget:
+            status = "OVER BUDGET"
+            violations.append(f"{scenario.label}: {scope.round_trips} round trips (budget {scenario.budget})")
+        
+        print(f"{scenario.label:<36} {scope.round_trips:>3} / {scenario.budget if scenario.budget is not None else '-':<3} {status}")
+    
+    return violations
+
+def main() -> int:
+    violations = asyncio.run(run_scenarios())
+    if violations:
+        print("\nRound trip budget exceeded:")
+        for violation in violations:
+            print(f"  - {violation}")
+        return 1
+    print("\nAll commands within their round trip budgets")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
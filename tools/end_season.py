@@ -0,0 +1,47 @@
+"""
+End the current season: freeze its standings and archive its matches.
+
+Standings go to season_standings, where /leaderboard season:<n> reads them. The
+season's matches, games and player results are moved to the *_archive tables
+(--archive table) or to gzipped JSONL files under --archive-dir (--archive files),
+one file per table for every 100 matches. Series still being played are left
+alone and count towards the next season.
+
+Usage: python -m tools.end_season [--name "Season 1"] [--archive table|files] [--archive-dir archive]
+
+If a run is interrupted, run it again (with the same --archive-dir): it finishes
+the same season rather than starting another. /synergy and /h2h read games_archive
+too, so only seasons archived to files drop out of them (once the bot restarts).
+"""
+import argparse
+import asyncio
+import sys
+from dotenv import load_dotenv
+from database.seasons import ARCHIVES, end_season
+
+async def run(args) -> int:
+    try:
+        report = await end_season(args.name, args.archive, args.archive_dir)
+    except RuntimeError as e:
+        print(e)
+        return 1
+    
+    verb = "Finished ending" if report['resumed'] else "Ended"
+    print(f"{verb} season {report['season']} ({report['name']}): {report['players']} players, "
+          f"{report['standings']} standings rows")
+    where = report['archive_dir'] if report['archive'] == 'files' else "the archive tables"
+    print(f"Archived {report['matches_archived']} matches to {where}")
+    return 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--name', help="season name (default: Season <number>)")
+    parser.add_argument('--archive', choices=ARCHIVES, default='table', help="where archived rows go")
+    parser.add_argument('--archive-dir', default='archive', help="directory for --archive files")
+    args = parser.parse_args()
+    
+    load_dotenv()
+    return asyncio.run(run(args))
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""
+Export match and player data to gzipped JSONL/CSV files, e.g. for nightly backups.
+
+Usage: python -m tools.export_data [--out backups/] [--format jsonl|csv] [--datasets matches,games]
+
+Each dataset is written to <out>/<dataset>-<YYYYmmdd>.<format>.gz via a temporary
+file, so an interrupted run never leaves a truncated backup behind.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime
+from dotenv import load_dotenv
+from database.exporter import DATASETS, FORMATS, export_dataset, export_filename
+
+async def run(out_dir: str, fmt: str, datasets) -> int:
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d')
+    
+    for dataset in datasets:
+        path = os.path.join(out_dir, export_filename(dataset, fmt, stamp))
+        started = time.perf_counter()
+        with open(path + '.tmp', 'wb') as f:
+            rows = await export_dataset(dataset, f, fmt)
+        os.replace(path + '.tmp', path)
+        print(f"{dataset:<16} {rows:>8} rows  {os.path.getsize(path) / 1e3:>9.1f} kB  "
+              f"{time.perf_counter() - started:.2f}s  -> {path}")
+    return 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--out', default='exports', help="output directory")
+    parser.add_argument('--format', choices=FORMATS, default='jsonl')
+    parser.add_argument('--datasets', default=','.join(DATASETS), help=f"comma separated, from: {', '.join(DATASETS)}")
+    args = parser.parse_args()
+    
+    datasets = [name.strip() for name in args.datasets.split(',') if name.strip()]
+    unknown = [name for name in datasets if name not in DATASETS]
+    if unknown:
+        parser.error(f"unknown datasets: {', '.join(unknown)}")
+    
+    load_dotenv()
+    return asyncio.run(run(args.out, args.format, datasets))
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""Minimal stand-ins for the discord.py objects the cogs touch, for offline tools"""
+import discord
+import itertools
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+_ids = itertools.count(10_000)
+
+class FakeAsset:
+    def __init__(self, url: str):
+        self.url = url
+
+class FakeUser:
+    def __init__(self, user_id: Optional[int] = None, name: Optional[str] = None):
+        self.id = user_id if user_id is not None else next(_ids)
+        self.name = name or f"player{self.id}"
+        self.display_name = self.name
+        self.mention = f"<@{self.id}>"
+        self.display_avatar = FakeAsset(f"https://cdn.example/avatars/{self.id}.png")
+        self.bot = False
+    
+    def __eq__(self, other):
+        return getattr(other, 'id', None) == self.id
+    
+    def __hash__(self):
+        return hash(self.id)
+
+class FakeAttachment:
+    def __init__(self, filename: str, data: bytes):
+        self.id = next(_ids)
+        self.filename = filename
+        self.size = len(data)
+        self._data = data
+    
+    async def read(self) -> bytes:
+        return self._data
+
+class FakeMessage:
+    def __init__(self, content: Optional[str] = None, embed=None, view=None, mentions: Optional[List[FakeUser]] = None):
+        self.id = next(_ids)
+        self.content = content
+        self.embeds = [embed] if embed is not None else []
+        self.view = view
+        self.mentions = mentions or []
+        self.edits = 0
+    
+    async def edit(self, content=None, embed=None, view=None, **kwargs):
+        self.edits += 1
+        if content is not None:
+            self.content = content
+        if embed is not None:
+            self.embeds = [embed]
+        if view is not None:
+            self.view = view
+        return self
+
+class FakeResponse:
+    def __init__(self, interaction: 'FakeInteraction'):
+        self._interaction = interaction
+        self._done = False
+        self.deferred = False
+    
+    def is_done(self) -> bool:
+        return self._done
+    
+    def _respond(self):
+        if self._done:
+            raise RuntimeError("This interaction has already been responded to before")
+        self._done = True
+    
+    async def send_message(self, content=None, embed=None, view=None, ephemeral=False, **kwargs):
+        self._respond()
+        message = FakeMessage(content, embed, view)
+        self._interaction.sent.append(message)
+        self._interaction._original = message
+    
+    async def defer(self, ephemeral=False, thinking=False):
+        self._respond()
+        self.deferred = True
+    
+    async def edit_message(self, content=None, embed=None, view=None, **kwargs):
+        self._respond()
+        target = self._interaction.message or self._interaction._original
+        if target is not None:
+            await target.edit(content=content, embed=embed, view=view)
+
+class FakeFollowup:
+    def __init__(self, interaction: 'FakeInteraction'):
+        self._interaction = interaction
+    
+    async def send(self, content=None, embed=None, view=None, file=None, ephemeral=False, **kwargs):
+        message = FakeMessage(content, embed, view)
+        self._interaction.sent.append(message)
+        return message
+
+class FakeChannel:
+    def __init__(self, channel_id: Optional[int] = None):
+        self.id = channel_id if channel_id is not None else next(_ids)
+
+class FakeGuild:
+    def __init__(self, members: Optional[List[FakeUser]] = None, guild_id: Optional[int] = None):
+        self.id = guild_id if guild_id is not None else next(_ids)
+        self.members = members or []
+        self.filesize_limit = 10 * 1024 * 1024
+    
+    def get_member(self, user_id: int) -> Optional[FakeUser]:
+        return next((m for m in self.members if m.id == user_id), None)
+    
+    async def fetch_member(self, user_id: int) -> FakeUser:
+        member = self.get_member(user_id)
+        if member is None:
+            raise discord.NotFound(SimpleNamespace(status=404, reason='Not Found'), 'Unknown Member')
+        return member
+
+class FakeBot:
+    def __init__(self):
+        self.users: Dict[int, FakeUser] = {}
+        self.dispatched: List[tuple] = []
+    
+    def get_user(self, user_id: int) -> Optional[FakeUser]:
+        return self.users.get(user_id)
+    
+    def dispatch(self, event: str, *args):
+        self.dispatched.append((event, args))
+    
+    async def is_owner(self, user) -> bool:
+        return True
+
+class FakeInteraction:
+    def __init__(self, user: FakeUser, guild: Optional[FakeGuild] = None, channel: Optional[FakeChannel] = None,
+                 message: Optional[FakeMessage] = None, client: Optional[FakeBot] = None):
+        self.id = next(_ids)
+        self.user = user
+        self.guild = guild
+        self.guild_id = guild.id if guild else None
+        self.channel = channel or FakeChannel()
+        self.channel_id = self.channel.id
+        self.message = message
+        self.client = client or FakeBot()
+        self.extras: Dict = {}
+        self.command_failed = False
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+        self.sent: List[FakeMessage] = []
+        self._original: Optional[FakeMessage] = None
+    
+    async def original_response(self) -> Optional[FakeMessage]:
+        return self._original
\ No newline at end of file
@@ -0,0 +1,61 @@
+"""
+Bulk import past series from a CSV or JSONL file (see database/importer.py for the format).
+
+Usage: python -m tools.import_matches matches.csv [--guild <id>] [--format csv|jsonl] [--batch-size 100] [--dry-run]
+       python -m tools.import_matches - --format jsonl < matches.jsonl
+       python -m tools.import_matches matches.csv --memory     # time it against the in-memory backend
+
+Pass --guild with the id of the server the series were played in, so they show on
+its /leaderboard and /match_history; it's what /match_import_bulk uses there, so a
+file imported both ways is only imported once.
+
+Importing a file again is safe: if a run fails part way, rerun it to finish.
+"""
+import argparse
+import asyncio
+import sys
+from dotenv import load_dotenv
+from database.importer import BATCH_SIZE, FORMATS, detect_format, import_stream
+from database.memory_client import MemoryClient
+from database.supabase_client import db
+
+async def run(args) -> int:
+    fmt = args.format or detect_format(args.path)
+    if fmt is None:
+        print("Can't tell the format from the file name; pass --format", file=sys.stderr)
+        return 2
+    
+    if args.memory:
+        db.use_client(MemoryClient())
+    
+    if args.path == '-':
+        report = await import_stream(sys.stdin, fmt, args.batch_size, args.dry_run, args.guild)
+    else:
+        with open(args.path, encoding='utf-8-sig', newline='') as stream:
+            report = await import_stream(stream, fmt, args.batch_size, args.dry_run, args.guild)
+    
+    print(("Dry run: " if args.dry_run else "") + report.summary())
+    for line, message in report.errors:
+        print(f"  line {line}: {message}")
+    if report.skipped > len(report.errors):
+        print(f"  ...and {report.skipped - len(report.errors)} more")
+    
+    if args.memory:
+        print(f"{db.client.request_count} backend requests")
+    return 1 if report.skipped else 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', help="file to import, or - for stdin")
+    parser.add_argument('--guild', type=int, help="id of the server the series were played in (default: none)")
+    parser.add_argument('--format', choices=FORMATS, help="defaults to the file extension")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="matches per insert")
+    parser.add_argument('--dry-run', action='store_true', help="validate only")
+    parser.add_argument('--memory', action='store_true', help="import into an in-memory backend instead of Supabase")
+    args = parser.parse_args()
+    
+    load_dotenv()
+    return asyncio.run(run(args))
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
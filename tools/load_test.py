@@ -0,0 +1,214 @@
+"""
+Load-test the lobby cogs with simulated guilds.
+
+Runs many lobbies at once against fake discord.py objects and an in-memory
+backend. Each lobby is one of:
+
+- random: /team_random_select, then 10 players click Join
+- roles: /team_roles, then 10 players click their role buttons
+- draft: /team_draft, both captains play RPS, 10 players join, captains pick 8
+
+Each lobby then plays its series through /match_create and /match_record.
+Clicks inside a lobby are sent concurrently after a random think time. The
+report gives throughput, p50/p99 handler latency per action (and how many
+missed Discord's 3 second deadline), and memory.
+
+Usage: python -m tools.load_test [--lobbies 200] [--think 0.05] [--db-latency 0] [--no-series] [--tracemalloc]
+"""
+import argparse
+import asyncio
+import random
+import re
+import resource
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Tuple
+
+from database.memory_client import FaultyClient, MemoryClient
+from database.supabase_client import db
+from cogs.match_commands import MatchCommands
+from cogs.team_commands import TeamCommands
+from utils.metrics import metrics
+from utils.rps import RPSView
+from tools.fakes import FakeBot, FakeChannel, FakeGuild, FakeInteraction, FakeMessage, FakeUser
+
+LOBBY_KINDS = ('random', 'roles', 'draft')
+ROLE_BUTTONS = ('top_button', 'jungle_button', 'mid_button', 'adc_button', 'support_button')
+MENTION = re.compile(r'<@(\d+)>')
+
+class LoadTest:
+    def __init__(self, think: float, series: bool):
+        self.think = think
+        self.series = series
+        self.bot = FakeBot()
+        self.team_cog = TeamCommands(self.bot)
+        self.match_cog = MatchCommands(self.bot)
+        self.latencies: Dict[str, List[float]] = {}
+        self.failures: List[str] = []
+    
+    async def timed(self, action: str, call, *args, **kwargs):
+        """Run one interaction handler and record its latency"""
+        started = time.perf_counter()
+        try:
+            return await call(*args, **kwargs)
+        finally:
+            self.latencies.setdefault(action, []).append(time.perf_counter() - started)
+    
+    async def click(self, action: str, user: FakeUser, guild: FakeGuild, channel: FakeChannel, message: FakeMessage, item):
+        await asyncio.sleep(random.uniform(0, self.think))
+        interaction = FakeInteraction(user, guild, channel, message=message, client=self.bot)
+        await self.timed(action, item.callback, interaction)
+        return interaction
+    
+    async def command(self, action: str, command, interaction: FakeInteraction, **kwargs):
+        with metrics.command_scope(command.qualified_name):
+            await self.timed(action, command.callback, command.binding, interaction, **kwargs)
+    
+    # ============ LOBBIES ============
+    
+    async def random_lobby(self, players: List[FakeUser], guild: FakeGuild, channel: FakeChannel) -> FakeMessage:
+        interaction = FakeInteraction(players[0], guild, channel, client=self.bot)
+        await self.command('team_random_select', self.team_cog.team_random_select, interaction)
+        lobby = interaction.sent[-1]
+        joins = await asyncio.gather(*(self.click('join', player, guild, channel, lobby, lobby.view.join_button) for player in players))
+        return self.followup(joins)
+    
+    async def roles_lobby(self, players: List[FakeUser], guild: FakeGuild, channel: FakeChannel) -> FakeMessage:
+        interaction = FakeInteraction(players[0], guild, channel, client=self.bot)
+        await self.command('team_roles', self.team_cog.team_roles, interaction)
+        lobby = interaction.sent[-1]
+        # /team_roles doesn't keep its message on the view itself
+        lobby.view.message = lobby
+        clicks = await asyncio.gather(*(
+            self.click('role', player, guild, channel, lobby, getattr(lobby.view, ROLE_BUTTONS[n // 2]))
+            for n, player in enumerate(players)
+        ))
+        return self.followup(clicks)
+    
+    async def draft_lobby(self, players: List[FakeUser], guild: FakeGuild, channel: FakeChannel) -> FakeMessage:
+        captain1, captain2 = players[0], players[1]
+        interaction = FakeInteraction(captain1, guild, channel, client=self.bot)
+        draft = asyncio.create_task(self.team_cog.team_draft.callback(self.team_cog, interaction, captain1, captain2))
+        
+        rps = await self.wait_for_view(interaction, RPSView)
+        choices = random.sample(['rock_button', 'paper_button', 'scissors_button'], 2)
+        await asyncio.gather(*(
+            self.click('rps', captain, guild, channel, rps, getattr(rps.view, choice))
+            for captain, choice in zip((captain1, captain2), choices)
+        ))
+        await draft
+        
+        lobby = interaction.sent[-1]
+        joins = await asyncio.gather(*(self.click('join', player, guild, channel, lobby, lobby.view.join_button) for player in players))
+        # The tenth join posts the pick board as a followup
+        board = self.followup(joins)
+        session = self.team_cog.pending_drafts.pop(channel.id)
+        
+        while not session.is_complete():
+            captain = session.captain1 if session.current_pick_captain == 1 else session.captain2
+            pick = random.choice(session.available_players)
+            button = next(item for item in board.view.children if item.custom_id == f"pick_{pick.id}")
+            await self.click('pick', captain, guild, channel, board, button)
+        return board
+    
+    def followup(self, clicks: List[FakeInteraction]) -> FakeMessage:
+        """The message the click that completed a lobby posted"""
+        return next(message for click in clicks for message in click.sent if message.embeds)
+    
+    async def wait_for_view(self, interaction: FakeInteraction, view_type) -> FakeMessage:
+        while True:
+            for message in interaction.sent:
+                if isinstance(message.view, view_type):
+                    return message
+            await asyncio.sleep(0)
+    
+    # ============ SERIES ============
+    
+    def teams_from(self, message: FakeMessage) -> Tuple[List[int], List[int]]:
+        fields = message.embeds[-1].fields
+        return tuple([int(user_id) for user_id in MENTION.findall(field.value)] for field in fields[:2])
+    
+    async def play_series(self, teams: Tuple[List[int], List[int]], players: List[FakeUser], guild: FakeGuild,
+                          channel: FakeChannel):
+        by_id = {player.id: player for player in players}
+        mentions = [by_id[user_id] for user_id in teams[0] + teams[1]]
+        interaction = FakeInteraction(players[0], guild, channel, message=FakeMessage(mentions=mentions), client=self.bot)
+        await self.command('match_create', self.match_cog.match_create, interaction, series_type='BO3', team1='', team2='')
+        match_id = interaction.sent[-1].embeds[0].description.split('`')[1]
+        
+        wins = {1: 0, 2: 0}
+        game_number = 0
+        while max(wins.values()) < 2:
+            game_number += 1
+            winner = random.randint(1, 2)
+            wins[winner] += 1
+            interaction = FakeInteraction(players[0], guild, channel, client=self.bot)
+            await self.command('match_record', self.match_cog.match_record, interaction,
+                               match_id=match_id, game_number=game_number, winner=winner)
+    
+    async def lobby(self, kind: str):
+        players = [FakeUser() for _ in range(10)]
+        guild = FakeGuild(members=players)
+        channel = FakeChannel()
+        try:
+            result = await getattr(self, f"{kind}_lobby")(players, guild, channel)
+            teams = self.teams_from(result)
+            if sorted(teams[0] + teams[1]) != sorted(player.id for player in players):
+                raise AssertionError(f"teams {teams} don't cover the lobby")
+            if self.series:
+                await self.play_series(teams, players, guild, channel)
+        except Exception as e:
+            self.failures.append(f"{kind}: {type(e).__name__}: {e}")
+
+def percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+async def run(args) -> int:
+    db.use_client(FaultyClient(latency=args.db_latency) if args.db_latency else MemoryClient())
+    random.seed(args.seed)
+    test = LoadTest(args.think, not args.no_series)
+    if args.tracemalloc:
+        tracemalloc.start()
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(test.lobby(LOBBY_KINDS[n % len(LOBBY_KINDS)]) for n in range(args.lobbies)))
+    elapsed = time.perf_counter() - started
+    
+    interactions = sum(len(samples) for samples in test.latencies.values())
+    print(f"{args.lobbies} lobbies, {args.lobbies * 10} simulated users, {interactions} interactions in {elapsed:.2f}s "
+          f"({interactions / elapsed:.0f}/s, {(args.lobbies - len(test.failures)) / elapsed:.1f} lobbies/s)\n")
+    print(f"{'action':<20} {'count':>6} {'p50':>9} {'p99':>9} {'max':>9} {'over 3s':>8}")
+    for action, samples in sorted(test.latencies.items()):
+        ordered = sorted(samples)
+        print(f"{action:<20} {len(ordered):>6} {percentile(ordered, 0.5) * 1000:>7.2f}ms "
+              f"{percentile(ordered, 0.99) * 1000:>7.2f}ms {ordered[-1] * 1000:>7.2f}ms "
+              f"{sum(1 for seconds in ordered if seconds > 3.0):>8}")
+    
+    # ru_maxrss is in KiB on Linux
+    print(f"\nPeak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB")
+    if args.tracemalloc:
+        current, peak = tracemalloc.get_traced_memory()
+        print(f"Python heap {current / 2**20:.1f} MiB now, {peak / 2**20:.1f} MiB peak "
+              f"({peak / args.lobbies / 1024:.1f} KiB per lobby)")
+    
+    if test.failures:
+        print(f"\n{len(test.failures)} lobbies failed:")
+        for failure in test.failures[:10]:
+            print(f"  - {failure}")
+        return 1
+    return 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lobbies', type=int, default=200, help="lobbies to run at once")
+    parser.add_argument('--think', type=float, default=0.05, help="max seconds a user waits before clicking")
+    parser.add_argument('--db-latency', type=float, default=0.0, help="seconds each backend request takes")
+    parser.add_argument('--no-series', action='store_true', help="stop once teams are made")
+    parser.add_argument('--tracemalloc', action='store_true', help="also trace Python allocations (slower)")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
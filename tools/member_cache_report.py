@@ -0,0 +1,107 @@
+"""
+Compare member cache memory for the 'full' and 'lean' policies on a synthetic guild.
+
+'full' is what discord.py holds after chunking a guild with the members intent:
+one Member per guild member. 'lean' is what our MemberDirectory holds: only the
+lobby participants and registered players.
+
+Usage: python -m tools.member_cache_report [--members 50000] [--players 500]
+"""
+import argparse
+import gc
+import os
+import tracemalloc
+from typing import Dict, Optional
+import discord
+from utils.member_cache import MemberDirectory
+
+def _rss_bytes() -> Optional[int]:
+    """Current resident set size, where /proc is available"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+def _member_payload(user_id: int) -> Dict:
+    return {
+        'user': {
+            'id': user_id,
+            'username': f"player{user_id}",
+            'discriminator': '0',
+            'avatar': 'a' * 32,
+            'global_name': f"Player {user_id}"
+        },
+        'nick': None,
+        'roles': [],
+        'joined_at': '2024-01-01T00:00:00+00:00',
+        'deaf': False,
+        'mute': False,
+        'flags': 0
+    }
+
+def _synthetic_guild(state) -> discord.Guild:
+    return discord.Guild(
+        data={'id': 1, 'name': 'synthetic', 'member_count': 0, 'roles': [], 'emojis': [], 'stickers': [], 'features': []},
+        state=state
+    )
+
+def _measure(build) -> Dict:
+    gc.collect()
+    rss_before = _rss_bytes()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    
+    kept = build()
+    
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    rss_after = _rss_bytes()
+    return {
+        'kept': kept,
+        'traced': after - before,
+        'rss': rss_after - rss_before if rss_before is not None and rss_after is not None else None
+    }
+
+def run(members: int, players: int):
+    state = discord.Client(intents=discord.Intents.default())._connection
+    base_id = 10 ** 17
+    
+    def lean():
+        # Participants arrive as Member objects on interactions; only a PlayerRef is kept
+        directory = MemberDirectory(capacity=max(players, 1), guild_capacity=max(players, 1))
+        guild = _synthetic_guild(state)
+        for i in range(players):
+            directory.remember(discord.Member(data=_member_payload(base_id + i), guild=guild, state=state))
+        return directory
+    
+    def full():
+        guild = _synthetic_guild(state)
+        for i in range(members):
+            guild._add_member(discord.Member(data=_member_payload(base_id + i), guild=guild, state=state))
+        return guild
+    
+    # Lean first so the full cache's arenas don't flatter its RSS delta
+    results = {'lean': _measure(lean), 'full': _measure(full)}
+    
+    print(f"Synthetic guild: {members:,} members, {players:,} lobby/registered players\n")
+    print(f"{'policy':<8} {'entries':>10} {'traced':>12} {'per entry':>10} {'RSS delta':>12}")
+    for policy, result in results.items():
+        entries = len(result['kept']) if policy == 'lean' else len(result['kept'].members)
+        rss = f"{result['rss'] / 1e6:.1f} MB" if result['rss'] is not None else 'n/a'
+        per_entry = result['traced'] / entries if entries else 0
+        print(f"{policy:<8} {entries:>10,} {result['traced'] / 1e6:>9.1f} MB {per_entry:>8.0f} B {rss:>12}")
+    
+    saved = results['full']['traced'] - results['lean']['traced']
+    print(f"\nlean saves {saved / 1e6:.1f} MB ({saved / max(results['full']['traced'], 1) * 100:.0f}%) of traced memory")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--members', type=int, default=50_000, help="guild size")
+    parser.add_argument('--players', type=int, default=500, help="lobby participants and registered players")
+    args = parser.parse_args()
+    run(args.members, args.players)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,42 @@
+"""
+Recompute user totals and series aggregates from the match_events log.
+
+Usage: python -m tools.rebuild_stats [--from-scratch] [--snapshot | --no-snapshot]
+       python -m tools.rebuild_stats --seed     # once: log history from before match_events
+
+Settlements in a running bot wait for in-process rebuilds; when running this
+against a live database prefer /stats_rebuild, or stop the bot first.
+"""
+import argparse
+import asyncio
+import sys
+from dotenv import load_dotenv
+from database.rebuild import rebuild, seed_events
+
+async def run(args) -> int:
+    if args.seed:
+        seeded = await seed_events()
+        print(f"Logged {seeded} settled series")
+    
+    report = await rebuild(from_scratch=args.from_scratch, snapshot=args.snapshot)
+    start = f"snapshot {report['base_snapshot']}" if report['base_snapshot'] else "scratch"
+    print(f"Replayed {report['events_replayed']} events from {start} in {report['elapsed']:.2f}s "
+          f"({report['voided_matches']} voided matches)")
+    print(f"Updated {report['users_updated']} users, wrote {report['aggregates_written']} aggregates")
+    if report['snapshot']:
+        print(f"Saved snapshot {report['snapshot']}")
+    return 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seed', action='store_true', help="log existing completed matches first (empty log only)")
+    parser.add_argument('--from-scratch', action='store_true', help="ignore snapshots and replay the whole log")
+    parser.add_argument('--snapshot', action=argparse.BooleanOptionalAction, default=None,
+                        help="force (or skip) writing a snapshot; by default one is written after large replays")
+    args = parser.parse_args()
+    
+    load_dotenv()
+    return asyncio.run(run(args))
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
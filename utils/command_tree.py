@@ -0,0 +1,102 @@
+import discord
+from discord import app_commands
+from utils.deferral import run_deferred
+from utils.metrics import metrics
+from utils.resilience import CircuitOpen
+from typing import List, Optional
+import hashlib
+import json
+import logging
+import os
+import time
+
+log = logging.getLogger(__name__)
+
+class InstrumentedCommandTree(app_commands.CommandTree):
+    """Command tree that records latency, errors and DB round trips per command
+
+    Slow commands are deferred automatically (see utils.deferral); a command
+    opts out with extras={'auto_defer': False}, as those that defer
+    themselves ephemerally must.
+    """
+    
+    async def _call(self, interaction: discord.Interaction):
+        command = interaction.command
+        name = command.qualified_name if command else 'unknown'
+        autocomplete = interaction.type is discord.InteractionType.autocomplete
+        if autocomplete:
+            name = f"{name}:autocomplete"
+        
+        with metrics.command_scope(name) as scope:
+            if autocomplete or (command and not command.extras.get('auto_defer', True)):
+                await super()._call(interaction)
+            else:
+                await run_deferred(interaction, name, super()._call)
+            scope.failed = interaction.command_failed
+        
+        # Commands declare their worst case via extras={'round_trip_budget': N}
+        budget = command.extras.get('round_trip_budget') if command else None
+        if budget is not None and scope.round_trips > budget:
+            metrics.inc('bot_command_budget_exceeded_total', {'command': name})
+            log.warning("/%s made %d database round trips (budget %d)", name, scope.round_trips, budget)
+    
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        if isinstance(getattr(error, 'original', error), CircuitOpen):
+            message = "⚠️ The database is unreachable right now. Please try again in a minute."
+            if interaction.response.is_done():
+                await interaction.followup.send(message, ephemeral=True)
+            else:
+                await interaction.response.send_message(message, ephemeral=True)
+            return
+        await super().on_error(interaction, error)
+    
+    # ============ SYNC ============
+    
+    def _command_payload(self, command) -> dict:
+        try:
+            return command.to_dict(self)
+        except TypeError:
+            # discord.py < 2.4 takes no tree argument
+            return command.to_dict()
+    
+    def tree_hash(self, guild: Optional[discord.abc.Snowflake] = None) -> str:
+        """Stable hash of the payload Discord would receive for this scope"""
+        payload = sorted(
+            (self._command_payload(command) for command in self.get_commands(guild=guild)),
+            key=lambda data: (data.get('type', 1), data['name'])
+        )
+        encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(encoded.encode()).hexdigest()
+    
+    async def sync_if_changed(self, guild: Optional[discord.abc.Snowflake] = None, state_path: str = '.command_sync.json',
+                              force: bool = False) -> Optional[List[app_commands.AppCommand]]:
+        """Sync only when the command tree differs from the last successful sync
+
+        Returns the synced commands, or None when the sync was skipped.
+        """
+        scope = f"{self.client.application_id}:{guild.id if guild else 'global'}"
+        current = self.tree_hash(guild)
+        
+        state = {}
+        if os.path.exists(state_path):
+            try:
+                with open(state_path) as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                log.warning("Ignoring unreadable command sync state at %s", state_path)
+        
+        if not force and state.get(scope) == current:
+            log.info("Command tree unchanged for %s, skipping sync", scope)
+            return None
+        
+        started = time.perf_counter()
+        synced = await self.sync(guild=guild)
+        metrics.observe('bot_command_sync_seconds', time.perf_counter() - started)
+        
+        state[scope] = current
+        tmp_path = f"{state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, state_path)
+        
+        return synced
\ No newline at end of file
@@ -0,0 +1,128 @@
+import asyncio
+import discord
+from utils.metrics import metrics
+from typing import Optional
+import logging
+import time
+
+log = logging.getLogger(__name__)
+
+# Defer once a handler has run this long without responding; Discord drops
+# interactions that aren't acknowledged within 3 seconds
+DEFER_AFTER = 2.0
+# Defer up front when this quantile of a command's recent runs is over DEFER_AFTER
+PREDICT_QUANTILE = 0.9
+PREDICT_MIN_SAMPLES = 10
+
+metrics.describe('bot_command_ack_seconds', 'histogram', 'Time until an app command interaction was acknowledged')
+metrics.describe('bot_command_deferred_total', 'counter', 'App command interactions deferred automatically, by reason')
+
+def predicted_slow(command: str) -> bool:
+    """Whether recent runs of a command say it will miss the defer threshold"""
+    hist = metrics.histogram('bot_command_duration_seconds', {'command': command})
+    return hist is not None and hist.count >= PREDICT_MIN_SAMPLES and hist.quantile(PREDICT_QUANTILE) > DEFER_AFTER
+
+class DeferringResponse(discord.InteractionResponse):
+    """Interaction response that defers itself when the handler runs long
+
+    Handlers keep calling interaction.response.send_message; once the
+    interaction has been deferred for them, the message goes out as the
+    followup instead (still deleted after delete_after, if given). Explicit
+    defer() calls after an automatic one are no-ops.
+    """
+    
+    def __init__(self, parent: discord.Interaction, command: str):
+        super().__init__(parent)
+        self.command = command
+        self.auto_deferred = False
+        self._thinking = False
+        self._lock = asyncio.Lock()
+        self._started = time.perf_counter()
+    
+    def _acknowledged(self):
+        metrics.observe('bot_command_ack_seconds', time.perf_counter() - self._started, {'command': self.command})
+    
+    async def auto_defer(self, reason: str):
+        """Defer on the handler's behalf unless it has already responded"""
+        async with self._lock:
+            if self.is_done():
+                return
+            try:
+                await super().defer(thinking=True)
+            except discord.HTTPException as e:
+                log.warning("Couldn't defer /%s: %s", self.command, e)
+                return
+            self.auto_deferred = self._thinking = True
+            self._acknowledged()
+        metrics.inc('bot_command_deferred_total', {'command': self.command, 'reason': reason})
+        log.info("Deferred /%s (%s)", self.command, reason)
+    
+    async def defer(self, **kwargs):
+        async with self._lock:
+            if self.auto_deferred:
+                return None
+            response = await super().defer(**kwargs)
+            self._acknowledged()
+            return response
+    
+    async def send_message(self, content: Optional[str] = None, *, ephemeral: bool = False, delete_after: Optional[float] = None,
+                           **kwargs):
+        async with self._lock:
+            if not self.auto_deferred:
+                response = await super().send_message(content, ephemeral=ephemeral, delete_after=delete_after, **kwargs)
+                self._acknowledged()
+                return response
+        
+        followup = {key: value for key, value in kwargs.items() if value is not ...}
+        if content is not None:
+            followup['content'] = content
+        if ephemeral and self._thinking:
+            # The first followup replaces the public "thinking" message and keeps
+            # its visibility, so remove that to keep the reply private
+            await self._parent.delete_original_response()
+        self._thinking = False
+        if delete_after is None:
+            return await self._parent.followup.send(ephemeral=ephemeral, **followup)
+        # Followups have no delete_after, so expire the message the way send_message would have
+        message = await self._parent.followup.send(ephemeral=ephemeral, wait=True, **followup)
+        await message.delete(delay=delete_after)
+        return message
+
+async def _watch(response: DeferringResponse):
+    await asyncio.sleep(DEFER_AFTER)
+    await response.auto_defer('elapsed')
+
+class DeferringInteraction:
+    """The interaction a command handler sees: its response defers automatically
+
+    Everything else reads and writes through to the underlying interaction.
+    """
+    
+    __slots__ = ('_interaction', 'response')
+    
+    def __init__(self, interaction: discord.Interaction, response: DeferringResponse):
+        object.__setattr__(self, '_interaction', interaction)
+        object.__setattr__(self, 'response', response)
+    
+    def __getattr__(self, name):
+        return getattr(self._interaction, name)
+    
+    def __setattr__(self, name, value):
+        setattr(self._interaction, name, value)
+
+async def run_deferred(interaction: discord.Interaction, command: str, handler):
+    """Run a command handler, deferring the interaction if it's predicted to or does run long
+
+    handler is called with the interaction to dispatch. Automatic defers are
+    public, so commands that reply ephemerally after deferring themselves
+    should opt out of this entirely.
+    """
+    response = DeferringResponse(interaction, command)
+    
+    if predicted_slow(command):
+        await response.auto_defer('predicted')
+    watchdog = asyncio.create_task(_watch(response))
+    try:
+        await handler(DeferringInteraction(interaction, response))
+    finally:
+        watchdog.cancel()
\ No newline at end of file
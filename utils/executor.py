@@ -0,0 +1,98 @@
+import asyncio
+import concurrent.futures
+import logging
+import multiprocessing
+import os
+import time
+from typing import Callable, Optional
+from utils.metrics import metrics
+
+log = logging.getLogger(__name__)
+
+class ExecutorBusy(Exception):
+    """Raised when the compute queue is full; callers should ask the user to retry"""
+
+def _timed_call(func: Callable, args: tuple, kwargs: dict):
+    """Runs in the worker: returns (wall clock start, result, cpu seconds)"""
+    started = time.time()
+    cpu = time.process_time()
+    result = func(*args, **kwargs)
+    return started, result, time.process_time() - cpu
+
+class ComputeExecutor:
+    """Shared process pool for CPU-bound work (matrix builds, searches, simulations)
+
+    Keeps heavy computation off the event loop. At most max_pending tasks may be
+    queued or running at once; past that run() raises ExecutorBusy instead of
+    letting the backlog grow. Cancelling the awaiting task (or hitting its timeout)
+    drops the work if it hasn't started yet; work already running in a worker
+    finishes and its result is discarded.
+
+    Functions and arguments must be picklable: module-level functions only.
+    """
+    
+    def __init__(self, workers: Optional[int] = None, max_pending: int = 32):
+        self.workers = workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self.max_pending = max_pending
+        self.pending = 0
+        self._pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        
+        metrics.describe('bot_executor_queue_depth', 'gauge', 'Compute tasks queued or running')
+        metrics.describe('bot_executor_wait_seconds', 'histogram', 'Time compute tasks waited for a worker')
+        metrics.describe('bot_executor_run_seconds', 'histogram', 'Wall time of compute tasks in a worker')
+        metrics.describe('bot_executor_tasks_total', 'counter', 'Compute tasks by outcome')
+        metrics.register_collector(lambda: metrics.set_gauge('bot_executor_queue_depth', self.pending))
+    
+    @property
+    def started(self) -> bool:
+        return self._pool is not None
+    
+    def start(self):
+        """Create the pool (also done lazily on first use)"""
+        if self._pool is None:
+            # spawn: forking a process with the loop monitor's threads running isn't safe
+            self._pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            log.info("Compute pool started with %d workers", self.workers)
+    
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs):
+        """Run func(*args, **kwargs) in a worker process and await the result"""
+        task = func.__name__
+        if self.pending >= self.max_pending:
+            metrics.inc('bot_executor_tasks_total', {'task': task, 'status': 'rejected'})
+            raise ExecutorBusy(f"Compute queue is full ({self.pending} tasks)")
+        
+        self.start()
+        loop = asyncio.get_running_loop()
+        submitted = time.time()
+        self.pending += 1
+        status = 'error'
+        try:
+            future = loop.run_in_executor(self._pool, _timed_call, func, args, kwargs)
+            started, result, _ = await asyncio.wait_for(future, timeout)
+            finished = time.time()
+            metrics.observe('bot_executor_wait_seconds', max(started - submitted, 0.0), {'task': task})
+            metrics.observe('bot_executor_run_seconds', finished - started, {'task': task})
+            status = 'ok'
+            return result
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            status = 'cancelled'
+            raise
+        except concurrent.futures.BrokenExecutor:
+            # A worker died (e.g. OOM killed); start a fresh pool on the next call
+            log.warning("Compute pool broke while running %s; restarting it", task)
+            self.shutdown()
+            raise
+        finally:
+            self.pending -= 1
+            metrics.inc('bot_executor_tasks_total', {'task': task, 'status': status})
+
+# Global instance
+compute = ComputeExecutor()
\ No newline at end of file
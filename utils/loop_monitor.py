@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from types import FrameType
+from typing import List, Optional, Tuple
+from utils.metrics import metrics
+
+log = logging.getLogger(__name__)
+
+# Frames from these packages are what we want to blame for a stall
+PROJECT_PACKAGES = ('cogs.', 'database.', 'utils.')
+
+def _frames(frame: Optional[FrameType]) -> List[FrameType]:
+    """Frames from outermost to innermost"""
+    stack = []
+    while frame is not None:
+        stack.append(frame)
+        frame = frame.f_back
+    return list(reversed(stack))
+
+def _module(frame: FrameType) -> str:
+    return frame.f_globals.get('__name__', '?')
+
+def describe_stall(frame: Optional[FrameType]) -> Tuple[str, str]:
+    """Return (command, site) for the loop thread's current frame
+    
+    command is the outermost cog function on the stack (which for app commands
+    is the command callback) and site is the innermost project frame.
+    """
+    stack = _frames(frame)
+    project = [f for f in stack if _module(f).startswith(PROJECT_PACKAGES) and _module(f) != __name__]
+    
+    cog_frames = [f for f in project if _module(f).startswith('cogs.')]
+    command = f"{_module(cog_frames[0])}:{cog_frames[0].f_code.co_name}" if cog_frames else 'unknown'
+    site = f"{_module(project[-1])}:{project[-1].f_code.co_name}" if project else 'unknown'
+    return command, site
+
+class LoopMonitor:
+    """Measures event loop lag and logs what was running when the loop stalled
+    
+    A heartbeat task on the loop records scheduling lag every `interval`
+    seconds; a daemon thread notices when the heartbeat goes quiet for longer
+    than `threshold` and captures the loop thread's stack while it is still
+    blocked.
+    """
+    
+    def __init__(self, interval: float = 0.1, threshold: float = 0.25):
+        self.interval = interval
+        self.threshold = threshold
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._last_beat = time.monotonic()
+        self._stall: Optional[Tuple[str, str]] = None  # (command, site) of the stall being reported
+        
+        metrics.describe('bot_event_loop_lag_seconds', 'histogram', 'Delay between scheduled and actual heartbeat wakeups')
+        metrics.describe('bot_event_loop_blocked_total', 'counter', 'Event loop stalls over the threshold by command and site')
+        metrics.describe('bot_event_loop_blocked_seconds_total', 'counter', 'Time the event loop spent stalled by command and site')
+    
+    def start(self, debug_slow_callbacks: bool = False):
+        """Start monitoring the running loop"""
+        if self._task is not None:
+            return
+        
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        if debug_slow_callbacks:
+            # asyncio then logs every callback slower than the threshold on the 'asyncio' logger
+            self._loop.set_debug(True)
+            self._loop.slow_callback_duration = self.threshold
+        
+        self._stop.clear()
+        self._last_beat = time.monotonic()
+        self._task = self._loop.create_task(self._heartbeat(), name='loop-monitor-heartbeat')
+        self._thread = threading.Thread(target=self._watch, name='loop-monitor-watchdog', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+    
+    async def _heartbeat(self):
+        while True:
+            expected = self._loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, self._loop.time() - expected)
+            self._last_beat = time.monotonic()
+            metrics.observe('bot_event_loop_lag_seconds', lag)
+            
+            stall, self._stall = self._stall, None
+            if stall is not None:
+                command, site = stall
+                metrics.inc('bot_event_loop_blocked_seconds_total', {'command': command, 'site': site}, lag)
+                log.warning("Event loop unblocked after %.0fms (command %s, site %s)", lag * 1000, command, site)
+    
+    def _watch(self):
+        while not self._stop.wait(self.threshold / 2):
+            stalled_for = time.monotonic() - self._last_beat - self.interval
+            if stalled_for < self.threshold or self._stall is not None:
+                continue
+            
+            frame = sys._current_frames().get(self._loop_thread_id)
+            command, site = describe_stall(frame)
+            self._stall = (command, site)
+            metrics.inc('bot_event_loop_blocked_total', {'command': command, 'site': site})
+            
+            stack = ''.join(traceback.format_stack(frame)) if frame is not None else '<no frame>\n'
+            log.warning(
+                "Event loop blocked for >%.0fms in %s (command %s). Loop thread stack:\n%s",
+                stalled_for * 1000, site, command, stack
+            )
+
+# Global instance
+loop_monitor = LoopMonitor()
\ No newline at end of file
@@ -0,0 +1,137 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from utils.metrics import metrics
+
+# Trie depth: ids are indexed by this many leading characters (what /my_matches
+# shows), and longer prefixes are checked against the ids stored at that depth
+KEY_LENGTH = 8
+
+class MatchEntry(NamedTuple):
+    match_id: str
+    guild_id: Optional[int]
+    series_type: str
+    status: str
+    created_at: str
+
+class _Node:
+    __slots__ = ('children', 'ids')
+    
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        self.ids: List[str] = []
+
+class MatchIndex:
+    """Prefix index of each guild's ongoing and recent matches, for match_id autocomplete
+
+    Every guild (None outside guilds) gets its own trie over the first
+    KEY_LENGTH characters of its match ids. Ongoing matches stay until they
+    end; each guild keeps its last recent_per_guild ended matches besides.
+    """
+    
+    def __init__(self, recent_per_guild: int = 50):
+        self.recent_per_guild = recent_per_guild
+        self._roots: Dict[Optional[int], _Node] = {}
+        self._entries: Dict[str, MatchEntry] = {}
+        # Ended matches per guild, oldest first
+        self._recent: Dict[Optional[int], 'OrderedDict[str, None]'] = {}
+        
+        metrics.describe('bot_match_index_entries', 'gauge', 'Matches held in the match_id autocomplete index')
+        metrics.register_collector(self._collect)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, match_id: str) -> bool:
+        return match_id in self._entries
+    
+    def _collect(self):
+        metrics.set_gauge('bot_match_index_entries', len(self._entries))
+    
+    # ============ UPDATES ============
+    
+    def add(self, match: Dict, replace: bool = True):
+        """Index a matches row; replace=False leaves matches already indexed alone"""
+        match_id = match['match_id']
+        if match_id in self._entries:
+            if not replace:
+                return
+            self.set_status(match_id, match['status'])
+            return
+        
+        entry = MatchEntry(match_id, match.get('guild_id'), match['series_type'], match['status'],
+                           match.get('created_at') or '')
+        self._entries[match_id] = entry
+        node = self._roots.setdefault(entry.guild_id, _Node())
+        for char in match_id[:KEY_LENGTH]:
+            node = node.children.setdefault(char, _Node())
+        node.ids.append(match_id)
+        if entry.status != 'ongoing':
+            self._ended(entry)
+    
+    def set_status(self, match_id: str, status: str):
+        """Record that an indexed match was completed or voided"""
+        entry = self._entries.get(match_id)
+        if entry is None or entry.status == status:
+            return
+        entry = self._entries[match_id] = entry._replace(status=status)
+        if status != 'ongoing':
+            self._ended(entry)
+    
+    def load(self, matches: Iterable[Dict]):
+        """Index matches read at startup, oldest first, without undoing updates made meanwhile"""
+        for match in matches:
+            self.add(match, replace=False)
+    
+    def _ended(self, entry: MatchEntry):
+        recent = self._recent.setdefault(entry.guild_id, OrderedDict())
+        recent[entry.match_id] = None
+        recent.move_to_end(entry.match_id)
+        while len(recent) > self.recent_per_guild:
+            oldest, _ = recent.popitem(last=False)
+            self._remove(oldest)
+    
+    def _remove(self, match_id: str):
+        entry = self._entries.pop(match_id)
+        path = [self._roots[entry.guild_id]]
+        for char in match_id[:KEY_LENGTH]:
+            path.append(path[-1].children[char])
+        path[-1].ids.remove(match_id)
+        # Prune the branch back to the first node something else still needs
+        for depth in range(len(path) - 1, 0, -1):
+            if path[depth].ids or path[depth].children:
+                break
+            del path[depth - 1].children[match_id[depth - 1]]
+        if not path[0].children:
+            del self._roots[entry.guild_id]
+            self._recent.pop(entry.guild_id, None)
+    
+    # ============ LOOKUPS ============
+    
+    def suggest(self, guild_id: Optional[int], prefix: str, limit: int = 25, ongoing_only: bool = False) -> List[MatchEntry]:
+        """A guild's matches whose id starts with prefix: ongoing first, then newest"""
+        prefix = prefix.strip().lower()
+        node = self._roots.get(guild_id)
+        for char in prefix[:KEY_LENGTH]:
+            if node is None:
+                return []
+            node = node.children.get(char)
+        if node is None:
+            return []
+        
+        found = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            found.extend(self._entries[match_id] for match_id in node.ids)
+            stack.extend(node.children.values())
+        
+        if len(prefix) > KEY_LENGTH:
+            found = [entry for entry in found if entry.match_id.startswith(prefix)]
+        if ongoing_only:
+            found = [entry for entry in found if entry.status == 'ongoing']
+        found.sort(key=lambda entry: entry.created_at, reverse=True)
+        found.sort(key=lambda entry: entry.status != 'ongoing')
+        return found[:limit]
+
+# Global instance
+match_index = MatchIndex()
\ No newline at end of file
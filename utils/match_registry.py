@@ -0,0 +1,147 @@
+from typing import Dict, List, Optional, Set, Tuple
+from utils.metrics import metrics
+
+class OngoingMatch:
+    """Roster and games so far of a series still being played"""
+    
+    __slots__ = ('match_id', 'guild_id', 'channel_id', 'series_type', 'created_at', 'teams', 'winners')
+    
+    def __init__(self, match: Dict, teams: Dict[int, List[int]], games: List[Dict]):
+        self.match_id: str = match['match_id']
+        self.guild_id: Optional[int] = match.get('guild_id')
+        self.channel_id: Optional[int] = match.get('channel_id')
+        self.series_type: str = match['series_type']
+        self.created_at: Optional[str] = match.get('created_at')
+        self.teams = {1: list(teams.get(1, [])), 2: list(teams.get(2, []))}
+        # game_number -> winning team; recording a game number again replaces it
+        self.winners: Dict[int, int] = {game['game_number']: game['winner'] for game in games}
+    
+    @property
+    def players(self) -> List[int]:
+        return self.teams[1] + self.teams[2]
+    
+    @property
+    def games_to_win(self) -> int:
+        return 2 if self.series_type == 'BO3' else 3
+    
+    def score(self) -> Tuple[int, int]:
+        wins = list(self.winners.values())
+        return wins.count(1), wins.count(2)
+    
+    def games(self) -> List[Dict]:
+        """Games in the shape of games rows, in order"""
+        return [{'game_number': number, 'winner': winner} for number, winner in sorted(self.winners.items())]
+    
+    def as_match(self, status: str = 'ongoing') -> Dict:
+        """The fields of its matches row commands use"""
+        return {
+            'match_id': self.match_id,
+            'guild_id': self.guild_id,
+            'channel_id': self.channel_id,
+            'series_type': self.series_type,
+            'status': status,
+            'created_at': self.created_at,
+            'winner_team': None
+        }
+
+class MatchRegistry:
+    """Every ongoing series, indexed by match id, channel and player
+
+    Rosters never change once a match is created and games are recorded
+    through this process, so while a match is registered commands need no
+    reads to know who plays in it or what the score is. Matches leave when
+    they're completed or voided.
+    """
+    
+    def __init__(self):
+        self._matches: Dict[str, OngoingMatch] = {}
+        self._by_channel: Dict[int, Set[str]] = {}
+        self._by_player: Dict[int, Set[str]] = {}
+        # Matches that ended while a load was in flight, which its rows would bring back
+        self._ended: Optional[Set[str]] = None
+        
+        metrics.describe('bot_ongoing_matches', 'gauge', 'Ongoing matches held in the match registry')
+        metrics.register_collector(self._collect)
+    
+    def __len__(self) -> int:
+        return len(self._matches)
+    
+    def _collect(self):
+        metrics.set_gauge('bot_ongoing_matches', len(self._matches))
+    
+    def register(self, match: Dict, teams: Dict[int, List[int]], games: List[Dict], replace: bool = True) -> OngoingMatch:
+        """Hold an ongoing match; replace=False keeps one already registered (e.g. during a load)"""
+        existing = self._matches.get(match['match_id'])
+        if existing is not None:
+            if not replace:
+                return existing
+            self.remove(existing.match_id)
+        
+        ongoing = OngoingMatch(match, teams, games)
+        self._matches[ongoing.match_id] = ongoing
+        if ongoing.channel_id is not None:
+            self._by_channel.setdefault(ongoing.channel_id, set()).add(ongoing.match_id)
+        for discord_id in ongoing.players:
+            self._by_player.setdefault(discord_id, set()).add(ongoing.match_id)
+        return ongoing
+    
+    def begin_load(self):
+        self._ended = set()
+    
+    def load(self, matches: List[Dict], rosters: Dict[str, Dict[int, List[int]]], games: Dict[str, List[Dict]]):
+        """Register the ongoing matches read at startup, keeping what changed since begin_load"""
+        ended, self._ended = self._ended or set(), None
+        for match in matches:
+            if match['match_id'] not in ended:
+                self.register(match, rosters[match['match_id']], games[match['match_id']], replace=False)
+    
+    def remove(self, match_id: str) -> Optional[OngoingMatch]:
+        """Drop a match once it's completed or voided"""
+        if self._ended is not None:
+            self._ended.add(match_id)
+        ongoing = self._matches.pop(match_id, None)
+        if ongoing is None:
+            return None
+        if ongoing.channel_id is not None:
+            self._discard(self._by_channel, ongoing.channel_id, match_id)
+        for discord_id in ongoing.players:
+            self._discard(self._by_player, discord_id, match_id)
+        return ongoing
+    
+    @staticmethod
+    def _discard(index: Dict[int, Set[str]], key: int, match_id: str):
+        match_ids = index.get(key)
+        if match_ids is not None:
+            match_ids.discard(match_id)
+            if not match_ids:
+                del index[key]
+    
+    # ============ LOOKUPS ============
+    
+    def get(self, match_id: str) -> Optional[OngoingMatch]:
+        return self._matches.get(match_id)
+    
+    def _newest(self, match_ids: Set[str]) -> List[OngoingMatch]:
+        return sorted((self._matches[match_id] for match_id in match_ids), key=lambda m: m.created_at or '', reverse=True)
+    
+    def for_player(self, discord_id: int) -> List[OngoingMatch]:
+        """Ongoing matches a player is on a team in, newest first"""
+        return self._newest(self._by_player.get(discord_id, set()))
+    
+    def for_channel(self, channel_id: int) -> List[OngoingMatch]:
+        """Ongoing matches created in a channel, newest first"""
+        return self._newest(self._by_channel.get(channel_id, set()))
+    
+    def find(self, discord_id: int, channel_id: Optional[int] = None, guild_id: Optional[int] = None) -> Optional[OngoingMatch]:
+        """The match someone most likely means: theirs in this channel, else their newest in this guild, else the channel's"""
+        mine = [ongoing for ongoing in self.for_player(discord_id) if ongoing.guild_id == guild_id]
+        for ongoing in mine:
+            if ongoing.channel_id == channel_id:
+                return ongoing
+        if mine:
+            return mine[0]
+        here = self.for_channel(channel_id) if channel_id is not None else []
+        return here[0] if here else None
+
+# Global instance
+match_registry = MatchRegistry()
\ No newline at end of file
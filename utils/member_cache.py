@@ -0,0 +1,161 @@
+import asyncio
+import discord
+from collections import OrderedDict
+from typing import Dict, Iterable, NamedTuple, Optional
+from utils.metrics import metrics
+
+class PlayerRef(NamedTuple):
+    id: int
+    name: str
+    display_name: str
+    avatar_url: Optional[str]
+
+def member_cache_options(intents: discord.Intents, policy: str) -> Dict:
+    """Bot kwargs (and intent changes) for a member cache policy
+
+    full: discord.py default - members intent, every member cached, guilds chunked on startup
+    lean: no members intent, no member cache, no chunking; players we care about
+          are kept in the MemberDirectory and anything else is fetched on demand
+          (MemberDirectory.resolve, which display lookups go through)
+    """
+    if policy == 'full':
+        intents.members = True
+        return {
+            'member_cache_flags': discord.MemberCacheFlags.from_intents(intents),
+            'chunk_guilds_at_startup': True
+        }
+    
+    if policy == 'lean':
+        intents.members = False
+        return {
+            'member_cache_flags': discord.MemberCacheFlags.none(),
+            'chunk_guilds_at_startup': False
+        }
+    
+    raise ValueError(f"Unknown member cache policy: {policy!r} (expected 'full' or 'lean')")
+
+class MemberDirectory:
+    """Bounded LRU of the players the bot actually deals with
+
+    Holds lobby participants and registered players only, as small tuples
+    instead of full Member objects. Entries are partitioned by guild, each
+    partition capped at guild_capacity, so one busy guild can't evict every
+    other guild's players; past the overall capacity the least recently used
+    guild gives up entries first.
+    """
+    
+    def __init__(self, capacity: int = 2000, guild_capacity: int = 500):
+        self.capacity = capacity
+        self.guild_capacity = guild_capacity
+        # guild_id (None outside guilds) -> LRU of that guild's players
+        self._partitions: 'OrderedDict[Optional[int], OrderedDict[int, PlayerRef]]' = OrderedDict()
+        # Partition each player was last stored in, for lookups that don't name a guild
+        self._home: Dict[int, Optional[int]] = {}
+        self._size = 0
+        self.fetches = 0
+        
+        metrics.describe('bot_member_directory_size', 'gauge', 'Players held in the member directory')
+        metrics.describe('bot_member_directory_guilds', 'gauge', 'Guild partitions in the member directory')
+        metrics.describe('bot_member_fetches_total', 'counter', 'Members fetched from the API on demand')
+        metrics.register_collector(self._collect)
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def _collect(self):
+        metrics.set_gauge('bot_member_directory_size', self._size)
+        metrics.set_gauge('bot_member_directory_guilds', len(self._partitions))
+    
+    def _evict(self, guild_id: Optional[int]):
+        partition = self._partitions[guild_id]
+        user_id, _ = partition.popitem(last=False)
+        self._size -= 1
+        if self._home.get(user_id) == guild_id:
+            del self._home[user_id]
+        if not partition:
+            del self._partitions[guild_id]
+    
+    def _store(self, ref: PlayerRef, guild_id: Optional[int]) -> PlayerRef:
+        partition = self._partitions.get(guild_id)
+        if partition is None:
+            partition = self._partitions[guild_id] = OrderedDict()
+        self._partitions.move_to_end(guild_id)
+        
+        if ref.id not in partition:
+            self._size += 1
+        partition[ref.id] = ref
+        partition.move_to_end(ref.id)
+        self._home[ref.id] = guild_id
+        
+        while len(partition) > self.guild_capacity:
+            self._evict(guild_id)
+        while self._size > self.capacity:
+            self._evict(next(iter(self._partitions)))
+        return ref
+    
+    def remember(self, user, guild_id: Optional[int] = None) -> PlayerRef:
+        """Keep a lobby participant (any discord.User / Member); Members go to their guild's partition"""
+        if guild_id is None:
+            guild_id = getattr(getattr(user, 'guild', None), 'id', None)
+        avatar = getattr(user, 'display_avatar', None)
+        return self._store(PlayerRef(
+            user.id,
+            user.name,
+            getattr(user, 'display_name', user.name),
+            avatar.url if avatar else None
+        ), guild_id)
+    
+    def remember_row(self, discord_id: int, username: str, guild_id: Optional[int] = None):
+        """Keep a registered player from a users row without clobbering richer entries"""
+        if self.get(discord_id, guild_id) is None:
+            self._store(PlayerRef(discord_id, username, username, None), guild_id)
+    
+    def get(self, user_id: int, guild_id: Optional[int] = None) -> Optional[PlayerRef]:
+        """A player from the given guild's partition, else wherever they were last seen"""
+        for partition_id in (guild_id, self._home.get(user_id, guild_id)):
+            partition = self._partitions.get(partition_id)
+            ref = partition.get(user_id) if partition is not None else None
+            if ref is not None:
+                partition.move_to_end(user_id)
+                return ref
+        return None
+    
+    def name(self, user_id: int, fallback: str, guild_id: Optional[int] = None) -> str:
+        ref = self.get(user_id, guild_id)
+        return ref.name if ref else fallback
+    
+    async def resolve(self, guild: discord.Guild, user_id: int) -> Optional[PlayerRef]:
+        """Directory first, then the member cache (if any), then the API"""
+        ref = self.get(user_id, guild.id)
+        if ref is not None:
+            return ref
+        
+        member = guild.get_member(user_id)
+        if member is None:
+            try:
+                member = await guild.fetch_member(user_id)
+            except discord.HTTPException:
+                # Left the guild, or we may not look; callers fall back to stored names
+                return None
+            self.fetches += 1
+            metrics.inc('bot_member_fetches_total')
+        
+        return self.remember(member, guild.id)
+    
+    async def resolve_many(self, guild: discord.Guild, user_ids: Iterable[int]) -> Dict[int, PlayerRef]:
+        """resolve() for several players, fetching the ones the directory lacks concurrently"""
+        found: Dict[int, PlayerRef] = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            ref = self.get(user_id, guild.id)
+            if ref is not None:
+                found[user_id] = ref
+            else:
+                missing.append(user_id)
+        
+        refs = await asyncio.gather(*(self.resolve(guild, user_id) for user_id in missing))
+        found.update((user_id, ref) for user_id, ref in zip(missing, refs) if ref is not None)
+        return found
+
+# Global instance
+member_directory = MemberDirectory()
\ No newline at end of file
@@ -0,0 +1,268 @@
+import asyncio
+import bisect
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Seconds; tuned for Discord's 3 second interaction deadline
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0)
+ROUND_TRIP_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+# Name of the app command currently being handled in this task, if any
+current_command: ContextVar[Optional[str]] = ContextVar('current_command', default=None)
+# Name of the SupabaseDB method currently running in this task, if any
+current_db_method: ContextVar[Optional[str]] = ContextVar('current_db_method', default=None)
+_current_scope: ContextVar[Optional['CommandScope']] = ContextVar('current_scope', default=None)
+
+def _labels(labels: Optional[Dict[str, str]]) -> LabelSet:
+    return tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(labels: LabelSet, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value: float):
+        """Record a single observation"""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+    
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside the matching bucket"""
+        if self.count == 0:
+            return 0.0
+        
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * ((rank - seen) / bucket_count)
+            seen += bucket_count
+        return self.buckets[-1]
+    
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+class CommandScope:
+    """Per-invocation counters for a single app command"""
+    
+    def __init__(self, command: str):
+        self.command = command
+        self.round_trips = 0
+        self.failed = False
+        self.started_at = time.perf_counter()
+    
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+class Metrics:
+    def __init__(self):
+        self._meta: Dict[str, Tuple[str, str]] = {}  # name -> (type, help)
+        self._counters: Dict[str, Dict[LabelSet, float]] = {}
+        self._gauges: Dict[str, Dict[LabelSet, float]] = {}
+        self._histograms: Dict[str, Dict[LabelSet, Histogram]] = {}
+        self._bucket_overrides: Dict[str, Tuple[float, ...]] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+        
+        self.describe('bot_command_duration_seconds', 'histogram', 'App command handler latency')
+        self.describe('bot_command_total', 'counter', 'App command invocations')
+        self.describe('bot_command_errors_total', 'counter', 'App command invocations that failed')
+        self.describe('bot_command_round_trips', 'histogram', 'Database round trips per app command invocation')
+        self._bucket_overrides['bot_command_round_trips'] = ROUND_TRIP_BUCKETS
+        self.describe('bot_command_budget_exceeded_total', 'counter', 'App command invocations over their round trip budget')
+        self.describe('bot_command_sync_seconds', 'histogram', 'Time spent syncing the app command tree with Discord')
+        self.describe('bot_db_call_duration_seconds', 'histogram', 'SupabaseDB method latency')
+        self.describe('bot_db_errors_total', 'counter', 'SupabaseDB method calls that raised')
+        self.describe('bot_db_round_trips_total', 'counter', 'Database round trips by command and method')
+    
+    # ============ PRIMITIVES ============
+    
+    def describe(self, name: str, kind: str, help_text: str):
+        """Register the type and help text of a metric"""
+        self._meta[name] = (kind, help_text)
+    
+    def inc(self, name: str, labels: Optional[Dict[str, str]] = None, amount: float = 1):
+        series = self._counters.setdefault(name, {})
+        key = _labels(labels)
+        series[key] = series.get(key, 0) + amount
+    
+    def set_gauge(self, name: str, value: float, labels: Optional[Dict[str, str]] = None):
+        self._gauges.setdefault(name, {})[_labels(labels)] = value
+    
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None):
+        series = self._histograms.setdefault(name, {})
+        key = _labels(labels)
+        if key not in series:
+            series[key] = Histogram(self._bucket_overrides.get(name, LATENCY_BUCKETS))
+        series[key].observe(value)
+    
+    def register_collector(self, collector: Callable[[], None]):
+        """Register a callback that refreshes gauges right before they are read"""
+        self._collectors.append(collector)
+    
+    def collect(self):
+        for collector in self._collectors:
+            collector()
+    
+    def counter_value(self, name: str, labels: Optional[Dict[str, str]] = None) -> float:
+        return self._counters.get(name, {}).get(_labels(labels), 0)
+    
+    def counters(self, name: str) -> Dict[LabelSet, float]:
+        return dict(self._counters.get(name, {}))
+    
+    def histogram(self, name: str, labels: Optional[Dict[str, str]] = None) -> Optional[Histogram]:
+        return self._histograms.get(name, {}).get(_labels(labels))
+    
+    def histograms(self, name: str) -> Dict[LabelSet, Histogram]:
+        return dict(self._histograms.get(name, {}))
+    
+    def reset(self):
+        """Drop every recorded sample (metric descriptions are kept)"""
+        self._counters.clear()
+        self._gauges.clear()
+        self._histograms.clear()
+    
+    # ============ COMMANDS ============
+    
+    @contextmanager
+    def command_scope(self, command: str) -> Iterator[CommandScope]:
+        """Time an app command and attribute DB round trips made inside it"""
+        scope = CommandScope(command)
+        command_token = current_command.set(command)
+        scope_token = _current_scope.set(scope)
+        try:
+            yield scope
+        except BaseException:
+            scope.failed = True
+            raise
+        finally:
+            _current_scope.reset(scope_token)
+            current_command.reset(command_token)
+            
+            labels = {'command': command}
+            self.observe('bot_command_duration_seconds', scope.elapsed, labels)
+            self.observe('bot_command_round_trips', scope.round_trips, labels)
+            self.inc('bot_command_total', labels)
+            if scope.failed:
+                self.inc('bot_command_errors_total', labels)
+    
+    # ============ DATABASE ============
+    
+    def track_db(self, func: Callable) -> Callable:
+        """Decorator recording latency and errors of an async SupabaseDB method"""
+        method = func.__name__
+        
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            token = current_db_method.set(method)
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                self.inc('bot_db_errors_total', {'method': method})
+                raise
+            finally:
+                self.observe('bot_db_call_duration_seconds', time.perf_counter() - started, {'method': method})
+                current_db_method.reset(token)
+        
+        return wrapper
+    
+    def count_round_trip(self):
+        """Record one backend request against the current command and DB method"""
+        scope = _current_scope.get()
+        if scope is not None:
+            scope.round_trips += 1
+        
+        self.inc('bot_db_round_trips_total', {
+            'command': current_command.get() or 'background',
+            'method': current_db_method.get() or 'unknown'
+        })
+    
+    # ============ EXPOSITION ============
+    
+    def render_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        self.collect()
+        lines: List[str] = []
+        names = sorted(set(self._counters) | set(self._gauges) | set(self._histograms))
+        
+        for name in names:
+            kind, help_text = self._meta.get(name, ('untyped', ''))
+            if help_text:
+                lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            
+            for labels, value in sorted(self._counters.get(name, {}).items()):
+                lines.append(f'{name}{_format_labels(labels)} {value:g}')
+            
+            for labels, value in sorted(self._gauges.get(name, {}).items()):
+                lines.append(f'{name}{_format_labels(labels)} {value:g}')
+            
+            for labels, hist in sorted(self._histograms.get(name, {}).items()):
+                cumulative = 0
+                for bound, bucket_count in zip(hist.buckets, hist.counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{_format_labels(labels, ("le", f"{bound:g}"))} {cumulative}')
+                lines.append(f'{name}_bucket{_format_labels(labels, ("le", "+Inf"))} {hist.count}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {hist.sum:g}')
+                lines.append(f'{name}_count{_format_labels(labels)} {hist.count}')
+        
+        return '\n'.join(lines) + '\n'
+    
+    async def _handle_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            # Drain the request headers
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            
+            parts = request_line.decode('latin-1').split()
+            if len(parts) >= 2 and parts[0] == 'GET' and parts[1].split('?')[0] in ('/', '/metrics'):
+                status, body = '200 OK', self.render_prometheus().encode()
+            else:
+                status, body = '404 Not Found', b'not found\n'
+            
+            writer.write(
+                f'HTTP/1.1 {status}\r\n'
+                f'Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n'
+                f'Content-Length: {len(body)}\r\n'
+                f'Connection: close\r\n\r\n'.encode() + body
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+    
+    async def start_http_server(self, host: str = '127.0.0.1', port: int = 9108):
+        """Serve /metrics over plain HTTP on the running event loop"""
+        if self._server is None:
+            self._server = await asyncio.start_server(self._handle_http, host, port)
+    
+    async def stop_http_server(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+# Global instance
+metrics = Metrics()
\ No newline at end of file
@@ -0,0 +1,145 @@
+import math
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Win rates are smoothed as if every player had an extra PRIOR_GAMES games at 50%
+PRIOR_GAMES = 10
+MONTE_CARLO_TRIALS = 20_000
+
+def wins_needed(series_type: str) -> int:
+    """Games needed to take a best-of-N series ('BO3' -> 2, 'BO5' -> 3, 'BO7' -> 4)"""
+    return int(series_type.upper().removeprefix('BO')) // 2 + 1
+
+def player_strength(user: Optional[Dict]) -> float:
+    """A player's win rate shrunk towards 50% while they have few games"""
+    games = user['total_games'] if user else 0
+    wins = user['total_wins'] if user else 0
+    return (wins + PRIOR_GAMES / 2) / (games + PRIOR_GAMES)
+
+def game_win_probability(team1_strengths: Sequence[float], team2_strengths: Sequence[float]) -> float:
+    """Chance team 1 wins a single game (log5 of the teams' average strengths)"""
+    a = sum(team1_strengths) / len(team1_strengths) if team1_strengths else 0.5
+    b = sum(team2_strengths) / len(team2_strengths) if team2_strengths else 0.5
+    denominator = a * (1 - b) + b * (1 - a)
+    return a * (1 - b) / denominator if denominator else 0.5
+
+def series_win_probability(p: float, needed: int, score1: int = 0, score2: int = 0) -> float:
+    """Exact chance team 1 takes the series from the current score, each game won with probability p"""
+    need1, need2 = needed - score1, needed - score2
+    if need1 <= 0:
+        return 1.0
+    if need2 <= 0:
+        return 0.0
+    
+    # row[b] = chance team 1 wins needing a more games while team 2 needs b more
+    row = [0.0] + [1.0] * need2  # a = 0
+    for _ in range(need1):
+        next_row = [0.0] * (need2 + 1)
+        for b in range(1, need2 + 1):
+            next_row[b] = p * row[b] + (1 - p) * next_row[b - 1]
+        row = next_row
+    return row[need2]
+
+def simulate_series(game_probabilities: Sequence[float], needed: int, score1: int = 0, score2: int = 0,
+                    trials: int = MONTE_CARLO_TRIALS, seed: Optional[int] = None) -> Tuple[float, float]:
+    """Monte Carlo estimate (and its standard error) for formats without a closed form
+
+    game_probabilities are team 1's chances in each remaining game and are cycled
+    if shorter than the series, e.g. [0.6, 0.45] for alternating side advantage.
+    """
+    need1, need2 = needed - score1, needed - score2
+    if need1 <= 0:
+        return 1.0, 0.0
+    if need2 <= 0:
+        return 0.0, 0.0
+    
+    # Only this path needs numpy, so loading the match commands doesn't
+    import numpy as np
+    
+    remaining = need1 + need2 - 1
+    probabilities = np.resize(np.asarray(game_probabilities, dtype=float), remaining)
+    rng = np.random.default_rng(seed)
+    team1_won = rng.random((trials, remaining)) < probabilities
+    
+    # Game index at which each team clinches (remaining if it never does)
+    reached1 = np.cumsum(team1_won, axis=1) >= need1
+    reached2 = np.cumsum(~team1_won, axis=1) >= need2
+    clinch1 = np.where(reached1.any(axis=1), reached1.argmax(axis=1), remaining)
+    clinch2 = np.where(reached2.any(axis=1), reached2.argmax(axis=1), remaining)
+    
+    estimate = float(np.mean(clinch1 < clinch2))
+    return estimate, math.sqrt(estimate * (1 - estimate) / trials)
+
+class SeriesPredictor:
+    """Per-match win probabilities, cached by match and score
+
+    Team strengths are kept per match so later scores don't need the players'
+    stats again; both caches are bounded LRUs.
+    """
+    
+    def __init__(self, capacity: int = 512):
+        self.capacity = capacity
+        self._strengths: 'OrderedDict[str, Tuple[List[float], List[float]]]' = OrderedDict()
+        self._predictions: 'OrderedDict[Tuple[str, int, int], Dict]' = OrderedDict()
+    
+    @staticmethod
+    def _remember(cache: OrderedDict, key, value):
+        cache[key] = value
+        cache.move_to_end(key)
+        return value
+    
+    def _trim(self):
+        for cache in (self._strengths, self._predictions):
+            while len(cache) > self.capacity:
+                cache.popitem(last=False)
+    
+    def has_teams(self, match_id: str) -> bool:
+        return match_id in self._strengths
+    
+    def set_teams(self, match_id: str, team1_users: Sequence[Optional[Dict]], team2_users: Sequence[Optional[Dict]]):
+        """Record team strengths from users rows (None for unknown players)"""
+        self._remember(self._strengths, match_id, (
+            [player_strength(user) for user in team1_users],
+            [player_strength(user) for user in team2_users]
+        ))
+        self._trim()
+    
+    def predict(self, match_id: str, series_type: str, score1: int = 0, score2: int = 0,
+                game_probabilities: Optional[Sequence[float]] = None) -> Optional[Dict]:
+        """Team 1's chances for the current score, or None if the teams aren't known
+
+        Uses the exact recursion for a fixed per-game probability, and Monte Carlo
+        when game_probabilities vary from game to game.
+        """
+        # A re-recorded game can change the score without changing how many games were played
+        key = (match_id, score1, score2)
+        cached = self._predictions.get(key)
+        if cached is not None:
+            self._predictions.move_to_end(key)
+            return cached
+        
+        strengths = self._strengths.get(match_id)
+        if strengths is None:
+            return None
+        self._strengths.move_to_end(match_id)
+        
+        game = game_win_probability(*strengths)
+        needed = wins_needed(series_type)
+        if game_probabilities is None:
+            series, error = series_win_probability(game, needed, score1, score2), 0.0
+        else:
+            series, error = simulate_series(game_probabilities, needed, score1, score2)
+        
+        prediction = self._remember(self._predictions, key, {
+            'game': game,
+            'series': series,
+            'error': error
+        })
+        self._trim()
+        return prediction
+
+def format_prediction(prediction: Dict) -> str:
+    return f"🔵 {prediction['series'] * 100:.0f}% - {(1 - prediction['series']) * 100:.0f}% 🔴"
+
+# Global instance
+predictor = SeriesPredictor()
\ No newline at end of file
@@ -0,0 +1,94 @@
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Callable, Dict, List, Optional
+
+# Threads blocked on a database request, and the SupabaseDB method it was made for
+_db_calls: Dict[int, str] = {}
+
+def run_db_call(method: str, func: Callable):
+    """Run a blocking database request on this thread, attributed to method in profiles"""
+    thread_id = threading.get_ident()
+    _db_calls[thread_id] = method
+    try:
+        return func()
+    finally:
+        del _db_calls[thread_id]
+
+class ProfileResult:
+    def __init__(self, stacks: Counter, cogs: Counter, db_methods: Counter, samples: int, duration: float):
+        self.stacks = stacks
+        self.cogs = cogs
+        self.db_methods = db_methods
+        self.samples = samples
+        self.duration = duration
+        # Every thread's stack is one sample per round, so shares are out of all of them
+        self.thread_samples = sum(stacks.values())
+    
+    def share(self, count: int) -> float:
+        """Fraction of all thread samples that count is"""
+        return count / self.thread_samples if self.thread_samples else 0.0
+    
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed stack format, ready for flamegraph.pl or speedscope"""
+        return '\n'.join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + '\n'
+
+class SamplingProfiler:
+    """Samples the stacks of every thread in the process at a fixed interval
+
+    Only sys._current_frames() is read, so the sampled threads are never
+    paused or traced and the overhead is bounded by the sampling rate.
+    """
+    
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+    
+    @staticmethod
+    def _label(frame: FrameType) -> str:
+        return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+    
+    def _sample(self, frame: FrameType, thread_id: int, thread_name: str, result: Dict[str, Counter]):
+        labels: List[str] = []
+        cog: Optional[str] = None
+        # Requests run on the db threads, far from the method that made them, so they're tagged instead
+        db_method = _db_calls.get(thread_id)
+        
+        while frame is not None:
+            label = self._label(frame)
+            labels.append(label)
+            module = frame.f_globals.get('__name__', '')
+            # Walking inner to outer, so the last match is the outermost frame
+            if module.startswith('cogs.'):
+                cog = label
+            frame = frame.f_back
+        
+        labels.append(f"thread:{thread_name}")
+        result['stacks'][';'.join(reversed(labels))] += 1
+        if cog:
+            result['cogs'][cog] += 1
+        if db_method:
+            result['db_methods'][db_method] += 1
+    
+    def run(self, seconds: float) -> ProfileResult:
+        """Sample for `seconds` (blocking; call from a worker thread)"""
+        own_thread = threading.get_ident()
+        result = {'stacks': Counter(), 'cogs': Counter(), 'db_methods': Counter()}
+        samples = 0
+        
+        started = time.perf_counter()
+        deadline = started + seconds
+        while time.perf_counter() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                self._sample(frame, thread_id, names.get(thread_id, str(thread_id)), result)
+            samples += 1
+            time.sleep(self.interval)
+        
+        return ProfileResult(
+            result['stacks'], result['cogs'], result['db_methods'],
+            samples, time.perf_counter() - started
+        )
\ No newline at end of file
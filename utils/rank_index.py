@@ -0,0 +1,84 @@
+import bisect
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from utils.metrics import metrics
+
+# Leaderboard order: win rate, then wins
+RankKey = Tuple[float, int]
+
+class Standing(NamedTuple):
+    rank: int
+    players: int
+    
+    @property
+    def top_percent(self) -> int:
+        """Smallest whole percentage of players this rank is within"""
+        return -(-self.rank * 100 // self.players)
+
+class RankIndex:
+    """Every player with a settled series, sorted in leaderboard order
+
+    Keys are kept ascending, so a player's rank is one more than the number of
+    keys above theirs, found by bisection. Updates take the absolute totals of
+    users rows as they're written; players tied on both win rate and wins share
+    a rank.
+    """
+    
+    def __init__(self):
+        self._keys: List[RankKey] = []
+        self._players: Dict[int, RankKey] = {}
+        self.loaded = False
+        # Rows written while a load is in flight, applied once it finishes
+        self._pending: Optional[List[Dict]] = None
+        
+        metrics.describe('bot_rank_index_players', 'gauge', 'Players held in the rank index')
+        metrics.register_collector(self._collect)
+    
+    def __len__(self) -> int:
+        return len(self._keys)
+    
+    def _collect(self):
+        if self.loaded:
+            metrics.set_gauge('bot_rank_index_players', len(self._keys))
+    
+    def begin_load(self):
+        self._pending = []
+    
+    def abort_load(self):
+        self._pending = None
+    
+    def load(self, users: Iterable[Dict]):
+        """Replace the index with these users rows (and any written since begin_load)"""
+        pending, self._pending = self._pending or [], None
+        keys = {}
+        for user in users:
+            if user['total_games'] > 0:
+                keys[user['discord_id']] = (user['total_wins'] / user['total_games'], user['total_wins'])
+        self._players = keys
+        self._keys = sorted(keys.values())
+        self.loaded = True
+        self.update(pending)
+    
+    def update(self, users: Iterable[Dict]):
+        """Move written users rows to their new place"""
+        if self._pending is not None:
+            self._pending.extend(users)
+            return
+        if not self.loaded:
+            return
+        for user in users:
+            if 'total_games' not in user:
+                continue
+            old = self._players.pop(user['discord_id'], None)
+            if old is not None:
+                del self._keys[bisect.bisect_left(self._keys, old)]
+            if user['total_games'] > 0:
+                key = (user['total_wins'] / user['total_games'], user['total_wins'])
+                self._players[user['discord_id']] = key
+                bisect.insort(self._keys, key)
+    
+    def standing(self, discord_id: int) -> Optional[Standing]:
+        """Where a player ranks, or None if they haven't played or the index isn't loaded"""
+        key = self._players.get(discord_id)
+        if key is None:
+            return None
+        return Standing(len(self._keys) - bisect.bisect_right(self._keys, key) + 1, len(self._keys))
\ No newline at end of file
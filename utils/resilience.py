@@ -0,0 +1,115 @@
+import logging
+import random
+import sys
+import time
+from collections import deque
+from utils.metrics import metrics
+
+log = logging.getLogger(__name__)
+
+# SQLSTATE / PostgREST codes worth retrying: serialization failures, deadlocks,
+# dropped or refused connections, and PostgREST failing to reach the database
+TRANSIENT_CODES = {'40001', '40P01', '57P01', '53300', 'PGRST000', 'PGRST001', 'PGRST002', 'PGRST003'}
+
+class CircuitOpen(Exception):
+    """Raised without calling the backend while the circuit breaker is open"""
+
+def is_transient(error: BaseException) -> bool:
+    """Whether a failed request may succeed if sent again"""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    # httpx is only loaded along with the real client, and then raises transport errors
+    httpx = sys.modules.get('httpx')
+    if httpx is not None and isinstance(error, httpx.TransportError):
+        return True
+    # postgrest's APIError carries the HTTP status when the gateway answered without JSON
+    code = str(getattr(error, 'code', None) or '')
+    if len(code) == 3 and code.isdigit():
+        return code == '429' or code.startswith('5')
+    return code in TRANSIENT_CODES or code.startswith('08')
+
+class RetryPolicy:
+    """Exponential backoff with full jitter
+
+    Retry n sleeps uniform(0, min(cap, base * 2**n)), so clients that failed
+    together don't come back together.
+    """
+    
+    def __init__(self, attempts: int = 3, base: float = 0.1, cap: float = 1.0):
+        self.attempts = attempts
+        self.base = base
+        self.cap = cap
+    
+    def delay(self, retry: int) -> float:
+        return random.uniform(0, min(self.cap, self.base * 2 ** retry))
+
+class CircuitBreaker:
+    """Fails fast while the backend is down instead of queueing up timeouts
+
+    Opens after `threshold` consecutive transient failures. After reset_after
+    seconds it lets a single trial request through (half-open): success closes
+    the circuit, failure opens it again.
+    """
+    
+    STATES = {'closed': 0, 'half_open': 1, 'open': 2}
+    
+    def __init__(self, threshold: int = 5, reset_after: float = 30.0):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        
+        metrics.describe('bot_db_circuit_state', 'gauge', 'Database circuit breaker state (0 closed, 1 half-open, 2 open)')
+        metrics.describe('bot_db_circuit_rejected_total', 'counter', 'Database requests refused while the circuit was open')
+        metrics.register_collector(lambda: metrics.set_gauge('bot_db_circuit_state', self.STATES[self.state]))
+    
+    def before_call(self):
+        """Raise CircuitOpen unless a request may be sent now"""
+        if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_after:
+            self.state = 'half_open'
+        if self.state == 'open' or (self.state == 'half_open' and self._trial_running):
+            metrics.inc('bot_db_circuit_rejected_total')
+            raise CircuitOpen("Database circuit is open; not sending the request")
+        if self.state == 'half_open':
+            self._trial_running = True
+    
+    def record_success(self):
+        if self.state != 'closed':
+            log.info("Database circuit closed")
+        self.state = 'closed'
+        self.failures = 0
+        self._trial_running = False
+    
+    def abandon_call(self):
+        """A request let through ended without an answer (e.g. it was cancelled)"""
+        self._trial_running = False
+    
+    def record_failure(self):
+        self.failures += 1
+        self._trial_running = False
+        if self.state == 'half_open' or (self.state == 'closed' and self.failures >= self.threshold):
+            if self.state == 'closed':
+                log.warning("Database circuit opened after %d consecutive failures", self.failures)
+            self.state = 'open'
+            self.opened_at = time.monotonic()
+
+class LatencyWindow:
+    """Recent request latencies; a read still running past their tail gets hedged"""
+    
+    def __init__(self, size: int = 200, quantile: float = 0.9, floor: float = 0.05, default: float = 0.25):
+        self.samples = deque(maxlen=size)
+        self.quantile = quantile
+        self.floor = floor
+        self.default = default
+    
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+    
+    def threshold(self) -> float:
+        """Seconds to wait before sending a duplicate read"""
+        if len(self.samples) < 20:
+            return self.default
+        ordered = sorted(self.samples)
+        return max(self.floor, ordered[min(len(ordered) - 1, int(len(ordered) * self.quantile))])
\ No newline at end of file
@@ -0,0 +1,52 @@
+from typing import Dict, List, Optional, Tuple
+
+# Aggregates are kept per series type plus a career-wide row, both across every
+# guild and within the guild a series was played in
+ALL_SERIES = 'ALL'
+ALL_GUILDS = 0
+FORM_WINDOW = 10
+FORM_MASK = (1 << FORM_WINDOW) - 1
+
+AggregateKey = Tuple[int, str, int]
+
+def aggregate_keys(discord_id: int, series_type: str, guild_id: Optional[int] = None) -> List[AggregateKey]:
+    """Keys of the aggregate rows one settled series counts towards"""
+    keys = [(discord_id, series_type, ALL_GUILDS), (discord_id, ALL_SERIES, ALL_GUILDS)]
+    if guild_id:
+        keys += [(discord_id, series_type, guild_id), (discord_id, ALL_SERIES, guild_id)]
+    return keys
+
+def empty_aggregate(discord_id: int, series_type: str, guild_id: int = ALL_GUILDS) -> Dict:
+    return {
+        'discord_id': discord_id,
+        'series_type': series_type,
+        'guild_id': guild_id,
+        'games': 0,
+        'wins': 0,
+        'current_streak': 0,  # > 0 win streak, < 0 loss streak
+        'best_streak': 0,     # longest win streak
+        'form_bits': 0,       # last FORM_WINDOW results, bit 0 = most recent, 1 = win
+        'form_len': 0,
+        'last_event_id': 0    # newest match_events row folded in
+    }
+
+def apply_result(aggregate: Dict, won: bool) -> Dict:
+    """Fold one settled series into an aggregate row (in place)"""
+    aggregate['games'] += 1
+    aggregate['wins'] += 1 if won else 0
+    
+    streak = aggregate['current_streak']
+    if won:
+        streak = streak + 1 if streak > 0 else 1
+    else:
+        streak = streak - 1 if streak < 0 else -1
+    aggregate['current_streak'] = streak
+    aggregate['best_streak'] = max(aggregate['best_streak'], streak)
+    
+    aggregate['form_bits'] = ((aggregate['form_bits'] << 1) | int(won)) & FORM_MASK
+    aggregate['form_len'] = min(aggregate['form_len'] + 1, FORM_WINDOW)
+    return aggregate
+
+def form_results(aggregate: Dict) -> List[bool]:
+    """Recent results, most recent first"""
+    return [bool(aggregate['form_bits'] >> i & 1) for i in range(aggregate['form_len'])]
\ No newline at end of file
@@ -0,0 +1,82 @@
+from discord.ext import commands
+from typing import Dict, List, Optional
+from utils.metrics import metrics
+import math
+import os
+
+def shard_config() -> Dict:
+    """Read the opt-in sharding settings from the environment
+    
+    SHARDING=auto         one process, Discord picks the shard count
+    SHARD_COUNT=N         one process running all N shards
+    SHARD_IDS=0,1,...     run only these shards (requires SHARD_COUNT; see launcher.py)
+    """
+    shard_count = os.getenv('SHARD_COUNT')
+    shard_ids = os.getenv('SHARD_IDS')
+    
+    config = {
+        'enabled': os.getenv('SHARDING') == 'auto' or bool(shard_count),
+        'shard_count': int(shard_count) if shard_count else None,
+        'shard_ids': [int(i) for i in shard_ids.split(',') if i.strip()] if shard_ids else None,
+    }
+    if config['shard_ids'] is not None and config['shard_count'] is None:
+        raise ValueError("SHARD_IDS requires SHARD_COUNT")
+    return config
+
+def create_bot(**kwargs) -> commands.Bot:
+    """Build a plain Bot, or an AutoShardedBot when sharding is configured"""
+    config = shard_config()
+    if not config['enabled']:
+        return commands.Bot(**kwargs)
+    
+    return commands.AutoShardedBot(shard_count=config['shard_count'], shard_ids=config['shard_ids'], **kwargs)
+
+def owns_shard_zero(bot: commands.Bot) -> bool:
+    """Whether this process runs shard 0; used to run once-per-cluster work like command sync"""
+    shard_ids = getattr(bot, 'shard_ids', None)
+    return shard_ids is None or 0 in shard_ids
+
+def shard_stats(bot: commands.Bot) -> List[Dict]:
+    """Latency and guild count for each shard this process runs"""
+    guild_counts: Dict[int, int] = {}
+    for guild in bot.guilds:
+        guild_counts[guild.shard_id] = guild_counts.get(guild.shard_id, 0) + 1
+    
+    if isinstance(bot, commands.AutoShardedBot):
+        return [
+            {
+                'shard_id': shard_id,
+                'latency': shard.latency,
+                'guilds': guild_counts.get(shard_id, 0),
+                'closed': shard.is_closed()
+            }
+            for shard_id, shard in sorted(bot.shards.items())
+        ]
+    
+    return [{'shard_id': 0, 'latency': bot.latency, 'guilds': len(bot.guilds), 'closed': bot.is_closed()}]
+
+def install_shard_metrics(bot: commands.Bot):
+    """Publish per-shard gauges on every scrape and count shard lifecycle events"""
+    metrics.describe('bot_shard_latency_seconds', 'gauge', 'Gateway heartbeat latency per shard')
+    metrics.describe('bot_shard_guilds', 'gauge', 'Guilds served per shard')
+    metrics.describe('bot_shard_events_total', 'counter', 'Shard connect, disconnect and resume events')
+    
+    def collect():
+        for stats in shard_stats(bot):
+            labels = {'shard': stats['shard_id']}
+            # latency is inf until the first heartbeat ack
+            if not math.isinf(stats['latency']):
+                metrics.set_gauge('bot_shard_latency_seconds', stats['latency'], labels)
+            metrics.set_gauge('bot_shard_guilds', stats['guilds'], labels)
+    
+    metrics.register_collector(collect)
+    
+    def counter(event: str):
+        async def listener(shard_id: Optional[int] = None):
+            metrics.inc('bot_shard_events_total', {'shard': shard_id if shard_id is not None else 0, 'event': event})
+        return listener
+    
+    for event in ('connect', 'disconnect', 'resumed'):
+        # Sharded bots dispatch on_shard_<event>(shard_id); plain bots dispatch on_<event>()
+        name = f'on_shard_{event}' if isinstance(bot, commands.AutoShardedBot) else f'on_{event}'
+        bot.add_listener(counter(event), name)
\ No newline at end of file
@@ -0,0 +1,80 @@
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+from utils.metrics import metrics
+
+# Imported first thing by bot.py, so this is as close to process start as we get
+_PROCESS_START = time.perf_counter()
+
+class StartupTimeline:
+    """Records how long each phase of a cold start takes
+    
+    Milestones are points in time measured from process start; spans
+    (e.g. loading a single cog) time the steps within a phase, or work
+    running alongside it.
+    """
+    
+    def __init__(self, origin: float = _PROCESS_START):
+        self.origin = origin
+        self.milestones: List[Tuple[str, float]] = []
+        self.spans: Dict[str, float] = {}
+        self.reported = False
+        
+        metrics.describe('bot_startup_phase_seconds', 'gauge', 'Duration of each cold start phase')
+        metrics.describe('bot_startup_span_seconds', 'gauge', 'Duration of individual startup tasks such as cog loads')
+    
+    def mark(self, milestone: str):
+        """Record that a startup phase finished now"""
+        self.milestones.append((milestone, time.perf_counter() - self.origin))
+    
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans[name] = time.perf_counter() - started
+    
+    def phases(self) -> List[Tuple[str, float]]:
+        """Duration of each phase, i.e. the time since the previous milestone"""
+        previous = 0.0
+        phases = []
+        for milestone, at in self.milestones:
+            phases.append((milestone, at - previous))
+            previous = at
+        return phases
+    
+    @property
+    def total(self) -> float:
+        return self.milestones[-1][1] if self.milestones else 0.0
+    
+    def report(self, release: Optional[str] = None, log_path: Optional[str] = None) -> str:
+        """Publish the timeline as metrics, optionally append it to a JSONL log, and format it"""
+        self.reported = True
+        for phase, seconds in self.phases():
+            metrics.set_gauge('bot_startup_phase_seconds', seconds, {'phase': phase})
+        for name, seconds in self.spans.items():
+            metrics.set_gauge('bot_startup_span_seconds', seconds, {'span': name})
+        
+        if log_path:
+            entry = {
+                'at': datetime.now(timezone.utc).isoformat(),
+                'release': release,
+                'total': round(self.total, 4),
+                'phases': {phase: round(seconds, 4) for phase, seconds in self.phases()},
+                'spans': {name: round(seconds, 4) for name, seconds in self.spans.items()}
+            }
+            with open(log_path, 'a') as f:
+                f.write(json.dumps(entry) + '\n')
+        
+        lines = [f"Startup timeline{f' ({release})' if release else ''}: {self.total * 1000:.0f}ms total"]
+        for phase, seconds in self.phases():
+            lines.append(f"  {phase:<12} {seconds * 1000:>8.0f}ms")
+        for name, seconds in sorted(self.spans.items(), key=lambda item: item[1], reverse=True):
+            lines.append(f"  - {name:<30} {seconds * 1000:>6.0f}ms")
+        return '\n'.join(lines)
+
+# Global instance
+timeline = StartupTimeline()
\ No newline at end of file
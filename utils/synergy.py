@@ -0,0 +1,148 @@
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+class SynergyMatrix:
+    """Player x player win/loss counts for teammates and opponents
+
+    together_games[a, b] / together_wins[a, b]: games a and b played on the same
+    team and how many of them they won (the diagonal is each player's own record).
+    against_games[a, b] / against_wins[a, b]: games a played against b and how
+    many of them a won. Memory is 16 bytes per player pair.
+    """
+    
+    def __init__(self, capacity: int = 64):
+        self.index: Dict[int, int] = {}
+        self.players: List[int] = []
+        self.games = 0
+        self._allocate(capacity)
+    
+    def _allocate(self, capacity: int):
+        # numpy is only imported once a matrix is built, so loading the
+        # analytics commands doesn't pull it in at startup
+        import numpy as np
+        old = getattr(self, 'together_games', None)
+        self.capacity = capacity
+        for name in ('together_games', 'together_wins', 'against_games', 'against_wins'):
+            grown = np.zeros((capacity, capacity), dtype=np.int32)
+            if old is not None:
+                previous = getattr(self, name)
+                grown[:previous.shape[0], :previous.shape[1]] = previous
+            setattr(self, name, grown)
+    
+    def _indices(self, player_ids: Iterable[int]) -> List[int]:
+        """Matrix rows for players, adding unseen players (and growing) as needed"""
+        rows = []
+        for player_id in player_ids:
+            row = self.index.get(player_id)
+            if row is None:
+                row = self.index[player_id] = len(self.players)
+                self.players.append(player_id)
+            rows.append(row)
+        if len(self.players) > self.capacity:
+            capacity = self.capacity
+            while capacity < len(self.players):
+                capacity *= 2
+            self._allocate(capacity)
+        return rows
+    
+    @staticmethod
+    def _sides(game: Dict) -> Optional[Tuple[List[int], List[int]]]:
+        """(winning team, losing team) of a games row"""
+        if game.get('winner') == 1:
+            return game['team1_players'], game['team2_players']
+        if game.get('winner') == 2:
+            return game['team2_players'], game['team1_players']
+        return None
+    
+    def add_game(self, game: Dict):
+        """Count one recorded game (a games row)"""
+        self.add_games([game])
+    
+    def remove_game(self, game: Dict):
+        """Take back a game counted earlier, e.g. the old result of a re-recorded one"""
+        self.add_games([game], -1)
+    
+    def add_games(self, games: Iterable[Dict], sign: int = 1):
+        """Count many games at once, scattering every player pair in one pass per team shape"""
+        import numpy as np
+        shapes: Dict[Tuple[int, int], List[Tuple[List[int], List[int]]]] = {}
+        for sides in map(self._sides, games):
+            if sides is None:
+                continue
+            winners, losers = self._indices(sides[0]), self._indices(sides[1])
+            shapes.setdefault((len(winners), len(losers)), []).append((winners, losers))
+        
+        for group in shapes.values():
+            won = np.array([winners for winners, _ in group], dtype=np.intp).reshape(len(group), -1)
+            lost = np.array([losers for _, losers in group], dtype=np.intp).reshape(len(group), -1)
+            
+            # (games, a, b) index grids for every teammate and opponent pair
+            won_a, won_b = np.broadcast_arrays(won[:, :, None], won[:, None, :])
+            lost_a, lost_b = np.broadcast_arrays(lost[:, :, None], lost[:, None, :])
+            beat_a, beat_b = np.broadcast_arrays(won[:, :, None], lost[:, None, :])
+            
+            np.add.at(self.together_games, (won_a.ravel(), won_b.ravel()), sign)
+            np.add.at(self.together_wins, (won_a.ravel(), won_b.ravel()), sign)
+            np.add.at(self.together_games, (lost_a.ravel(), lost_b.ravel()), sign)
+            np.add.at(self.against_games, (beat_a.ravel(), beat_b.ravel()), sign)
+            np.add.at(self.against_games, (beat_b.ravel(), beat_a.ravel()), sign)
+            np.add.at(self.against_wins, (beat_a.ravel(), beat_b.ravel()), sign)
+            self.games += sign * len(group)
+    
+    def pair(self, player_id: int, other_id: int) -> Dict:
+        """Record of two players together and against each other"""
+        a, b = self.index.get(player_id), self.index.get(other_id)
+        if a is None or b is None:
+            return {'together_games': 0, 'together_wins': 0, 'against_games': 0, 'against_wins': 0}
+        return {
+            'together_games': int(self.together_games[a, b]),
+            'together_wins': int(self.together_wins[a, b]),
+            'against_games': int(self.against_games[a, b]),
+            'against_wins': int(self.against_wins[a, b])
+        }
+    
+    def record(self, player_id: int) -> Tuple[int, int]:
+        """(games, wins) of a player"""
+        row = self.index.get(player_id)
+        if row is None:
+            return 0, 0
+        return int(self.together_games[row, row]), int(self.together_wins[row, row])
+    
+    def _ranked(self, games: 'np.ndarray', wins: 'np.ndarray', exclude: int, min_games: int,
+                limit: int, best: bool) -> List[Tuple[int, int, int]]:
+        import numpy as np
+        size = len(self.players)
+        games, wins = games[:size], wins[:size]
+        eligible = games >= max(min_games, 1)
+        eligible[exclude] = False
+        candidates = np.flatnonzero(eligible)
+        rates = wins[candidates] / games[candidates]
+        # Win rate first, then sample size
+        order = np.lexsort((-games[candidates], -rates if best else rates))[:limit]
+        return [(self.players[i], int(games[i]), int(wins[i])) for i in candidates[order]]
+    
+    def partners(self, player_id: int, min_games: int = 3, limit: int = 5, best: bool = True) -> List[Tuple[int, int, int]]:
+        """Teammates by win rate together: (partner_id, games, wins)"""
+        row = self.index.get(player_id)
+        if row is None:
+            return []
+        return self._ranked(self.together_games[row], self.together_wins[row], row, min_games, limit, best)
+    
+    def opponents(self, player_id: int, min_games: int = 3, limit: int = 5, best: bool = True) -> List[Tuple[int, int, int]]:
+        """Opponents by the player's win rate against them: (opponent_id, games, wins)"""
+        row = self.index.get(player_id)
+        if row is None:
+            return []
+        return self._ranked(self.against_games[row], self.against_wins[row], row, min_games, limit, best)
+
+def build_matrix(games) -> SynergyMatrix:
+    """Build a matrix from games rows; module level so it can run in the compute pool"""
+    matrix = SynergyMatrix()
+    matrix.add_games(games)
+    return matrix
+
+def build_matrices(games: Dict[Optional[int], List[Dict]]) -> Dict[Optional[int], SynergyMatrix]:
+    """Build one matrix per guild from its games rows"""
+    return {guild_id: build_matrix(guild_games) for guild_id, guild_games in games.items()}
\ No newline at end of file
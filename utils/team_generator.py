@@ -61,24 +61,14 @@ class TeamGenerator:
         Returns list of captain numbers in pick order
         Example for 10 picks: [1, 2, 2, 1, 1, 2, 2, 1, 1, 2]
         """
-        order = []
-        current_captain = first_captain
         other_captain = 2 if first_captain == 1 else 1
         
-        # Snake draft pattern
-        for round_num in range(total_picks // 2):
-            if round_num == 0:
-                # First round: 1 pick each
-                order.append(current_captain)
-                order.append(other_captain)
-            else:
-                # Subsequent rounds: 2 picks each, alternating
-                if round_num % 2 == 1:
-                    order.extend([other_captain, other_captain])
-                    order.extend([current_captain, current_captain])
-                else:
-                    order.extend([current_captain, current_captain])
-                    order.extend([other_captain, other_captain])
+        # Snake draft pattern: one pick for the first captain, then two each
+        order = [first_captain]
+        pair = other_captain
+        while len(order) < total_picks:
+            order.extend([pair, pair])
+            pair = first_captain if pair == other_captain else other_captain
         
         return order[:total_picks]
 